@@ -0,0 +1,306 @@
+# C:\LabelAI\backend\annotation_index.py
+
+"""
+Inverted index over a project's annotation files.
+
+One small record is kept per annotation file (labels and types with counts,
+the annotation count, the smallest object size per type and the file's
+modification time), plus label -> images and type -> images maps built from
+them. Questions like "images with a person and more than five objects" are
+answered from memory instead of by parsing every JSON file.
+
+The index lives in <project>/annotation_index.json. ProjectManager updates
+it on every save and delete; files changed by anything else (batch jobs,
+other tools) are picked up by refresh(), which re-reads only files whose
+modification time differs from the one recorded.
+
+Queries are whitespace-separated terms that must all match, e.g.
+
+    label=person count>5
+    unannotated
+    type=polygon polygon_size<32
+    edited>yesterday
+
+Supported keys: label, type (= and !=), count, size and <type>_size (the
+smallest object, as the square root of its area in pixels), edited (today,
+yesterday, Nd, Nh or YYYY-MM-DD). "annotated" and "unannotated" are bare
+keywords; any other bare word matches image file names.
+"""
+
+import os
+import re
+import json
+import math
+from datetime import datetime, timedelta
+
+INDEX_VERSION = 1
+_TERM_PATTERN = re.compile(r"^([a-z_]+)(>=|<=|!=|=|>|<)(.+)$")
+
+
+def _object_size(ann):
+    """Square root of an annotation's pixel area, or None for types without one."""
+    points = ann.get("points") or []
+    if ann.get("type") == "bbox" and len(points) == 4:
+        area = abs(points[2] - points[0]) * abs(points[3] - points[1])
+    elif ann.get("type") == "polygon":
+        # Points are stored either as [[x1, y1], [x2, y2], ...] or flat
+        if points and not isinstance(points[0], (list, tuple)):
+            points = list(zip(points[0::2], points[1::2]))
+        if len(points) < 3:
+            return None
+        area = 0.0
+        for (x0, y0), (x1, y1) in zip(points, points[1:] + points[:1]):
+            area += x0 * y1 - x1 * y0
+        area = abs(area) / 2.0
+    else:
+        return None
+    return math.sqrt(area)
+
+
+def build_record(image_name, annotations, mtime):
+    """Summarizes one image's absolute-coordinate annotations for the index."""
+    labels, types, min_size = {}, {}, {}
+    for ann in annotations:
+        if not isinstance(ann, dict):
+            continue
+        label, ann_type = ann.get("label"), ann.get("type")
+        if label is not None:
+            labels[label] = labels.get(label, 0) + 1
+        if ann_type is not None:
+            types[ann_type] = types.get(ann_type, 0) + 1
+            size = _object_size(ann)
+            if size is not None and (ann_type not in min_size or size < min_size[ann_type]):
+                min_size[ann_type] = size
+    return {
+        "image": image_name,
+        "mtime": mtime,
+        "count": sum(types.values()),
+        "labels": labels,
+        "types": types,
+        "min_size": min_size
+    }
+
+
+def _parse_time(value):
+    """Timestamp for today, yesterday, Nd / Nh (ago) or an ISO date."""
+    now = datetime.now()
+    midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    if value == "today":
+        return midnight.timestamp()
+    if value == "yesterday":
+        return (midnight - timedelta(days=1)).timestamp()
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)([dh])", value)
+    if match:
+        amount = float(match.group(1))
+        delta = timedelta(days=amount) if match.group(2) == "d" else timedelta(hours=amount)
+        return (now - delta).timestamp()
+    return datetime.fromisoformat(value).timestamp()
+
+
+def _compare(left, op, right):
+    if left is None:
+        return False
+    return {
+        ">": left > right, ">=": left >= right, "<": left < right,
+        "<=": left <= right, "=": left == right, "!=": left != right
+    }[op]
+
+
+def parse_query(text):
+    """
+    Parses query text into a list of (key, op, value) terms.
+    Raises ValueError for a malformed term.
+    """
+    terms = []
+    for token in text.split():
+        lowered = token.lower()
+        if lowered in ("annotated", "unannotated"):
+            terms.append((lowered, "=", True))
+            continue
+        match = _TERM_PATTERN.match(token)
+        if not match:
+            terms.append(("name", "=", lowered))
+            continue
+        key, op, value = match.group(1).lower(), match.group(2), match.group(3)
+        if key in ("label", "type"):
+            if op not in ("=", "!="):
+                raise ValueError(f"'{key}' only supports = and !=: {token}")
+        elif key == "edited":
+            value = _parse_time(value.lower())
+        elif key == "count" or key == "size" or key.endswith("_size"):
+            value = float(value)
+        else:
+            raise ValueError(f"Unknown query key '{key}'")
+        terms.append((key, op, value))
+    return terms
+
+
+def is_structured_query(text):
+    """True if the text uses anything beyond plain file name words."""
+    try:
+        return any(key != "name" for key, _, _ in parse_query(text))
+    except ValueError:
+        return True
+
+
+class AnnotationIndex:
+    def __init__(self, index_path, annotation_dir):
+        self.index_path = index_path
+        self.annotation_dir = annotation_dir
+        self.records = {}       # annotation file stem -> record
+        self.by_label = {}      # label -> set of stems
+        self.by_type = {}       # type -> set of stems
+        self._dirty = False
+
+    # --- Maintenance ---
+    def load(self):
+        """Reads the saved index and brings it up to date with the annotation files."""
+        records = {}
+        if os.path.exists(self.index_path):
+            try:
+                with open(self.index_path, 'r') as f:
+                    data = json.load(f)
+                if data.get("version") == INDEX_VERSION:
+                    records = data.get("records", {})
+            except Exception as e:
+                print(f"Could not read annotation index {self.index_path}: {e}")
+        self.records = {}
+        self.by_label, self.by_type = {}, {}
+        for stem, record in records.items():
+            self._insert(stem, record)
+        self.refresh()
+
+    def refresh(self):
+        """Re-indexes annotation files added, changed or removed since they were last indexed."""
+        on_disk = {}
+        if self.annotation_dir and os.path.isdir(self.annotation_dir):
+            with os.scandir(self.annotation_dir) as entries:
+                for entry in entries:
+                    if entry.name.endswith(".json") and entry.is_file():
+                        on_disk[entry.name[:-5]] = (entry.path, entry.stat().st_mtime)
+
+        for stem in [s for s in self.records if s not in on_disk]:
+            self.remove(stem)
+        changed = 0
+        for stem, (path, mtime) in on_disk.items():
+            record = self.records.get(stem)
+            if record is not None and record.get("mtime") == mtime:
+                continue
+            try:
+                with open(path, 'r') as f:
+                    data = json.load(f)
+            except Exception as e:
+                print(f"Could not index annotation file {path}: {e}")
+                continue
+            try:
+                if isinstance(data, dict):
+                    image_name = os.path.basename(data.get("image_path") or stem)
+                    annotations = data.get("annotations", [])
+                else:
+                    image_name, annotations = stem, []
+                record = build_record(image_name, annotations, mtime)
+            except Exception as e:
+                print(f"Could not index annotation file {path}: {e}")
+                continue
+            self.update(stem, record)
+            changed += 1
+        return changed
+
+    def update(self, stem, record):
+        self._discard(stem)
+        self._insert(stem, record)
+        self._dirty = True
+
+    def remove(self, stem):
+        if stem in self.records:
+            self._discard(stem)
+            self._dirty = True
+
+    def clear(self):
+        self.records, self.by_label, self.by_type = {}, {}, {}
+        self._dirty = True
+
+    def flush(self):
+        """Writes the index to disk if it changed since the last flush."""
+        if not self._dirty:
+            return
+        tmp_path = f"{self.index_path}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump({"version": INDEX_VERSION, "records": self.records}, f)
+            os.replace(tmp_path, self.index_path)
+            self._dirty = False
+        except Exception as e:
+            print(f"Could not save annotation index {self.index_path}: {e}")
+
+    def _insert(self, stem, record):
+        self.records[stem] = record
+        for label in record.get("labels", {}):
+            self.by_label.setdefault(label, set()).add(stem)
+        for ann_type in record.get("types", {}):
+            self.by_type.setdefault(ann_type, set()).add(stem)
+
+    def _discard(self, stem):
+        record = self.records.pop(stem, None)
+        if record is None:
+            return
+        for key, inverted in (("labels", self.by_label), ("types", self.by_type)):
+            for value in record.get(key, {}):
+                stems = inverted.get(value)
+                if stems is not None:
+                    stems.discard(stem)
+                    if not stems:
+                        del inverted[value]
+
+    # --- Queries ---
+    def labels(self):
+        return sorted(self.by_label)
+
+    def query(self, text, image_names):
+        """
+        Returns the subset of `image_names` (image file names) matching the
+        query text, in their original order. Raises ValueError for bad queries.
+        """
+        terms = parse_query(text)
+        stems = {name: os.path.splitext(name)[0] for name in image_names}
+
+        # Label/type equality narrows the candidates through the inverted maps
+        candidates = None
+        for key, op, value in terms:
+            if op == "=" and key in ("label", "type"):
+                matches = (self.by_label if key == "label" else self.by_type).get(value, set())
+                candidates = matches if candidates is None else candidates & matches
+
+        results = []
+        for name in image_names:
+            stem = stems[name]
+            if candidates is not None and stem not in candidates:
+                continue
+            record = self.records.get(stem)
+            if all(self._matches(record, name, term) for term in terms):
+                results.append(name)
+        return results
+
+    def _matches(self, record, name, term):
+        key, op, value = term
+        count = record.get("count", 0) if record else 0
+        if key == "name":
+            return value in name.lower()
+        if key == "annotated":
+            return count > 0
+        if key == "unannotated":
+            return count == 0
+        if key == "count":
+            return _compare(count, op, value)
+        if record is None:
+            return op == "!=" and key in ("label", "type")
+        if key == "label":
+            return (value in record["labels"]) == (op == "=")
+        if key == "type":
+            return (value in record["types"]) == (op == "=")
+        if key == "edited":
+            return _compare(record.get("mtime"), op, value)
+        if key == "size":
+            sizes = record.get("min_size", {}).values()
+            return _compare(min(sizes) if sizes else None, op, value)
+        return _compare(record.get("min_size", {}).get(key[:-len("_size")]), op, value)
@@ -0,0 +1,110 @@
+# C:\LabelAI\backend\coco_writer.py
+
+"""
+Streaming writer for COCO-style JSON files (COCO, PoseTrack).
+
+Images and annotations are written as they are added instead of being
+collected into one dict and dumped at the end, so memory use does not grow
+with the dataset. COCO lists all images before all annotations, so while
+images go straight to the output, annotations are spooled to a temporary
+file next to it and appended when the writer is closed.
+
+Output is compact by default; pass indent for human-readable files.
+compression="gzip" or "xz" writes annotations.json.gz / .json.xz.
+"""
+
+import os
+import gzip
+import json
+import lzma
+import shutil
+import tempfile
+
+COMPRESSION_SUFFIXES = {None: "", "gzip": ".gz", "xz": ".xz"}
+_COMPACT_SEPARATORS = (",", ":")
+
+
+def _open_text(path, compression):
+    if compression == "gzip":
+        return gzip.open(path, "wt", encoding="utf-8")
+    if compression == "xz":
+        return lzma.open(path, "wt", encoding="utf-8")
+    return open(path, "w", encoding="utf-8")
+
+
+class CocoJSONWriter:
+    """
+    Usage:
+        with CocoJSONWriter(path, categories) as writer:
+            writer.add_image({...})
+            writer.add_annotation({...})
+    The final file name (with any compression suffix) is writer.path.
+    """
+
+    def __init__(self, path, categories, indent=None, compression=None):
+        if compression not in COMPRESSION_SUFFIXES:
+            raise ValueError(f"Unknown compression '{compression}'. Expected gzip, xz or None.")
+        self.path = path + COMPRESSION_SUFFIXES[compression]
+        self.categories = categories
+        self.indent = indent
+        self.image_count = 0
+        self.annotation_count = 0
+
+        self._tmp_path = f"{self.path}.tmp"
+        self._out = _open_text(self._tmp_path, compression)
+        self._spool = tempfile.TemporaryFile("w+", encoding="utf-8", dir=os.path.dirname(path) or None)
+        self._out.write("{" + self._newline(1) + '"images":' + self._space() + "[")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    # --- Formatting helpers ---
+    def _newline(self, level):
+        return "\n" + " " * (self.indent * level) if self.indent else ""
+
+    def _space(self):
+        return " " if self.indent else ""
+
+    def _dumps(self, obj, level):
+        if not self.indent:
+            return json.dumps(obj, separators=_COMPACT_SEPARATORS)
+        return json.dumps(obj, indent=self.indent).replace("\n", self._newline(level))
+
+    def _element(self, obj, first):
+        return ("" if first else ",") + self._newline(2) + self._dumps(obj, 2)
+
+    # --- Public API ---
+    def add_image(self, image):
+        self._out.write(self._element(image, self.image_count == 0))
+        self.image_count += 1
+
+    def add_annotation(self, annotation):
+        self._spool.write(self._element(annotation, self.annotation_count == 0))
+        self.annotation_count += 1
+
+    def close(self):
+        """Appends the spooled annotations and categories and moves the file into place."""
+        out = self._out
+        out.write((self._newline(1) if self.image_count else "") + "]," + self._newline(1))
+        out.write('"annotations":' + self._space() + "[")
+        self._spool.seek(0)
+        shutil.copyfileobj(self._spool, out)
+        self._spool.close()
+        out.write((self._newline(1) if self.annotation_count else "") + "]," + self._newline(1))
+        out.write('"categories":' + self._space() + self._dumps(self.categories, 1))
+        out.write(self._newline(0) + "}")
+        out.close()
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self):
+        """Discards a partially written file."""
+        self._spool.close()
+        self._out.close()
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
@@ -0,0 +1,240 @@
+# C:\LabelAI\backend\columnar.py
+
+"""
+Columnar label files that data loaders can memory-map instead of parsing
+text every epoch.
+
+All annotations of an export become a handful of arrays:
+
+    image_file, image_width, image_height        one row per image
+    object_image_id, object_class_id,
+    object_type, bbox (x_min, y_min, x_max, y_max),
+    area, polygon_offsets, polygon_vertices      one row per bbox/polygon
+    keypoint_image_id, keypoint_class_id,
+    keypoints (N x K x 3: x, y, visibility)      one row per keypoint instance
+    class_names
+
+Image ids are row numbers in the image columns. Polygon i's vertices are
+polygon_vertices[polygon_offsets[i]:polygon_offsets[i + 1]] (empty for
+boxes). Instances with fewer than K keypoints are padded with zeros.
+
+With pyarrow installed the columns are written as images/objects/keypoints
+.parquet tables (polygons as a list column, which is the same offsets plus
+vertex array); otherwise as one uncompressed labels.npz. columns.json
+names the format and the classes, and load_columns() reads either back,
+memory-mapped.
+"""
+
+import os
+import json
+import struct
+import zipfile
+import importlib.util
+
+import numpy as np
+
+from .geometry import compute_geometry
+
+META_FILENAME = "columns.json"
+NPZ_FILENAME = "labels.npz"
+OBJECT_TYPES = ("bbox", "polygon")
+
+
+def has_pyarrow():
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def build_columns(items, class_map, warnings):
+    """Columns for the annotation items of an export. Problems go into `warnings`."""
+    class_names = sorted(class_map, key=class_map.get)
+    objects = [[ann for ann in item.get("annotations", []) if ann.get("label") in class_map]
+               for item in items]
+    geometry = compute_geometry([(anns, item.get("image_width"), item.get("image_height"))
+                                 for anns, item in zip(objects, items)])
+    for image_id, _, message in geometry.problems:
+        warnings.append(f"{message} in {items[image_id]['image_path']}. Skipping.")
+    for row in np.flatnonzero(~geometry.valid):
+        ann = objects[geometry.image[row]][geometry.index[row]]
+        warnings.append(f"Zero-area {ann['type']} for '{ann['label']}' in "
+                        f"{items[geometry.image[row]]['image_path']}. Skipping.")
+
+    keep = np.flatnonzero(geometry.valid)
+    rows_image, rows_index = geometry.image[keep], geometry.index[keep]
+    is_polygon = geometry.is_polygon[keep]
+    vertex_counts = np.array([len(geometry.segments[row]) // 2 if geometry.is_polygon[row] else 0
+                              for row in keep], dtype=np.int64)
+    vertices = [c for row in keep if geometry.is_polygon[row] for c in geometry.segments[row]]
+
+    keypoint_rows = [(image_id, class_map[ann["label"]], ann["points"])
+                     for image_id, item in enumerate(items)
+                     for ann in item.get("annotations", [])
+                     if ann.get("type") == "keypoint" and ann.get("label") in class_map and ann.get("points")]
+    max_keypoints = max((len(points) for _, _, points in keypoint_rows), default=0)
+    keypoints = np.zeros((len(keypoint_rows), max_keypoints, 3), dtype=np.float32)
+    for row, (_, _, points) in enumerate(keypoint_rows):
+        for k, point in enumerate(points):
+            # Points without a visibility flag count as visible
+            keypoints[row, k] = (point[0], point[1], point[2] if len(point) > 2 else 2)
+
+    return {
+        "image_file": np.array([os.path.basename(item["image_path"]) for item in items], dtype=str),
+        "image_width": np.array([item.get("image_width") or 0 for item in items], dtype=np.int32),
+        "image_height": np.array([item.get("image_height") or 0 for item in items], dtype=np.int32),
+        "object_image_id": rows_image.astype(np.int32),
+        "object_class_id": np.array([class_map[objects[i][j]["label"]] for i, j in zip(rows_image, rows_index)],
+                                    dtype=np.int32),
+        "object_type": is_polygon.astype(np.uint8),  # index into OBJECT_TYPES
+        "bbox": geometry.boxes[keep].astype(np.float32),
+        "area": geometry.area[keep].astype(np.float32),
+        "polygon_offsets": np.concatenate(([0], np.cumsum(vertex_counts))).astype(np.int64),
+        "polygon_vertices": np.asarray(vertices, dtype=np.float32).reshape(-1, 2),
+        "keypoint_image_id": np.array([row[0] for row in keypoint_rows], dtype=np.int32),
+        "keypoint_class_id": np.array([row[1] for row in keypoint_rows], dtype=np.int32),
+        "keypoints": keypoints,
+        "class_names": np.array(class_names, dtype=str),
+    }
+
+
+def write_columns(columns, directory, use_parquet=None):
+    """
+    Writes the columns to `directory` as Parquet (when pyarrow is available,
+    unless use_parquet says otherwise) or NPZ. Returns the file names written.
+    """
+    if use_parquet is None:
+        use_parquet = has_pyarrow()
+    files = _write_parquet(columns, directory) if use_parquet else _write_npz(columns, directory)
+    meta = {
+        "format": "parquet" if use_parquet else "npz",
+        "files": files,
+        "classes": columns["class_names"].tolist(),
+        "object_types": list(OBJECT_TYPES),
+        "keypoints_per_instance": int(columns["keypoints"].shape[1])
+    }
+    with open(os.path.join(directory, META_FILENAME), "w") as f:
+        json.dump(meta, f, indent=2)
+    return files + [META_FILENAME]
+
+
+def _write_npz(columns, directory):
+    path = os.path.join(directory, NPZ_FILENAME)
+    tmp_path = f"{path}.tmp"
+    # Uncompressed, so every array can be memory-mapped in place
+    with open(tmp_path, "wb") as f:
+        np.savez(f, **columns)
+    os.replace(tmp_path, path)
+    return [NPZ_FILENAME]
+
+
+def _write_parquet(columns, directory):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    def nested(values, *sizes):
+        array = pa.array(values.reshape(-1))
+        for size in reversed(sizes):
+            array = pa.FixedSizeListArray.from_arrays(array, size)
+        return array
+
+    keypoints = columns["keypoints"]
+    tables = {
+        "images": pa.table({
+            "file_name": pa.array(columns["image_file"].tolist(), pa.string()),
+            "width": columns["image_width"],
+            "height": columns["image_height"]
+        }),
+        "objects": pa.table({
+            "image_id": columns["object_image_id"],
+            "class_id": columns["object_class_id"],
+            "type": columns["object_type"],
+            "bbox": nested(columns["bbox"], 4),
+            "area": columns["area"],
+            "polygon": pa.LargeListArray.from_arrays(pa.array(columns["polygon_offsets"]),
+                                                     nested(columns["polygon_vertices"], 2))
+        }),
+        "keypoints": pa.table({
+            "image_id": columns["keypoint_image_id"],
+            "class_id": columns["keypoint_class_id"],
+            # K is 0 only when there are no instances; keep the column type valid
+            "keypoints": nested(keypoints, max(keypoints.shape[1], 1), 3)
+        })
+    }
+    files = []
+    for name, table in tables.items():
+        filename = f"{name}.parquet"
+        path = os.path.join(directory, filename)
+        pq.write_table(table, f"{path}.tmp")
+        os.replace(f"{path}.tmp", path)
+        files.append(filename)
+    return files
+
+
+def load_columns(directory, mmap=True):
+    """Reads columns written by write_columns() back as NumPy arrays, memory-mapped where possible."""
+    with open(os.path.join(directory, META_FILENAME), "r") as f:
+        meta = json.load(f)
+    if meta["format"] == "npz":
+        path = os.path.join(directory, NPZ_FILENAME)
+        if mmap:
+            return _mmap_npz(path)
+        with np.load(path) as data:
+            return {name: data[name] for name in data.files}
+    return _load_parquet(directory, meta, mmap)
+
+
+def _mmap_npz(path):
+    """Memory-maps each array stored in an uncompressed .npz file."""
+    arrays = {}
+    with zipfile.ZipFile(path) as archive, open(path, "rb") as f:
+        for info in archive.infolist():
+            # Member data follows the local file header, its name and extra field
+            f.seek(info.header_offset)
+            name_length, extra_length = struct.unpack("<HH", f.read(30)[26:30])
+            f.seek(info.header_offset + 30 + name_length + extra_length)
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+            name = info.filename[:-len(".npy")]
+            if not shape or 0 in shape:
+                arrays[name] = np.zeros(shape, dtype=dtype)
+                continue
+            arrays[name] = np.memmap(path, dtype=dtype, mode="r", offset=f.tell(), shape=shape,
+                                     order="F" if fortran_order else "C")
+    return arrays
+
+
+def _load_parquet(directory, meta, mmap):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    def read(name):
+        return pq.read_table(os.path.join(directory, f"{name}.parquet"), memory_map=mmap)
+
+    def values(column):
+        """The flat values of a (nested) fixed-size list column."""
+        array = column.combine_chunks()
+        while pa.types.is_fixed_size_list(array.type):
+            array = array.flatten()
+        return array.to_numpy()
+
+    images, objects, keypoint_table = read("images"), read("objects"), read("keypoints")
+    polygon = objects.column("polygon").combine_chunks()
+    k = meta["keypoints_per_instance"]
+    return {
+        "image_file": np.array(images.column("file_name").to_pylist(), dtype=str),
+        "image_width": images.column("width").to_numpy(),
+        "image_height": images.column("height").to_numpy(),
+        "object_image_id": objects.column("image_id").to_numpy(),
+        "object_class_id": objects.column("class_id").to_numpy(),
+        "object_type": objects.column("type").to_numpy(),
+        "bbox": values(objects.column("bbox")).reshape(-1, 4),
+        "area": objects.column("area").to_numpy(),
+        "polygon_offsets": polygon.offsets.to_numpy(),
+        "polygon_vertices": polygon.flatten().flatten().to_numpy().reshape(-1, 2),
+        "keypoint_image_id": keypoint_table.column("image_id").to_numpy(),
+        "keypoint_class_id": keypoint_table.column("class_id").to_numpy(),
+        "keypoints": (values(keypoint_table.column("keypoints")).reshape(-1, k, 3) if k
+                      else np.zeros((keypoint_table.num_rows, 0, 3), dtype=np.float32)),
+        "class_names": np.array(meta["classes"], dtype=str),
+    }
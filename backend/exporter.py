@@ -1,24 +1,112 @@
 import os
+import io
 import json
+import time
+import random
+import hashlib
 import shutil
+import tarfile
 import xml.etree.ElementTree as ET
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 from PIL import Image, ImageDraw
 
+from .coco_writer import CocoJSONWriter
+from .geometry import image_geometry
+from .columnar import build_columns, write_columns
+from .tensor_pack import IMAGES_FILENAME, INDEX_FILENAME, scale_columns, write_tensor_pack
+from .splits import DEFAULT_SPLITS, SplitAssigner
+
 # ---------------------------
 # Base Exporter
 # ---------------------------
 
+def _geometry_warnings(geometry, image_path, warnings):
+    """Adds a warning for each annotation the geometry kernel skipped as malformed."""
+    for _, _, message in geometry.problems:
+        warnings.append(f"{message} in {image_path}. Skipping.")
+
+def _box_lists(values, ints, decimals=2):
+    """
+    Box rows as lists, rounded to `decimals` (None keeps them as they are).
+    Values derived only from int coordinates (see geometry box_ints and
+    size_ints) stay ints, so they are written as 10, not 10.0.
+    """
+    if decimals is not None:
+        values = np.round(values, decimals)
+    return [[int(v) if is_int else v for v, is_int in zip(row, row_ints)]
+            for row, row_ints in zip(values.tolist(), ints.tolist())]
+
+def _corner_boxes(geometry):
+    """(x_min, y_min, x_max, y_max) rows for JSON output."""
+    return _box_lists(geometry.boxes, geometry.box_ints)
+
+def _xywh_boxes(geometry, decimals=2):
+    """(x_min, y_min, width, height) rows for JSON/text output."""
+    return _box_lists(np.hstack([geometry.boxes[:, :2], geometry.sizes]),
+                      np.hstack([geometry.box_ints[:, :2], geometry.size_ints]), decimals)
+
+def _known_label_annotations(item, class_map, warnings):
+    """The item's annotations whose label is in the class map, warning about the others."""
+    annotations = []
+    for ann in item.get("annotations", []):
+        label = ann.get("label")
+        if label not in class_map:
+            warnings.append(f"Label '{label}' not in class map. Skipping annotation in {item['image_path']}.")
+            continue
+        annotations.append(ann)
+    return annotations
+
 class Exporter(ABC):
-    """Abstract base class for annotation exporters."""
+    """
+    Abstract base class for annotation exporters.
+
+    Images are placed in images/ by copy_images(), a shared stage that runs
+    on a thread pool. copy_mode selects how:
+        "copy"      - copy with metadata (skipped if size and mtime already match)
+        "hardlink"  - hard link, falling back to a copy across file systems
+        "symlink"   - symbolic link to the project image
+        "reference" - nothing is placed; images.txt lists the source paths
+
+    Exports are incremental. Each exporter converts one image at a time in
+    build_fragment(); the result is cached as a small file in .fragments/,
+    and the files it wrote and its warnings are recorded in
+    export_manifest.json with a hash of the image's annotations.
+    Exporting again into the same folder with the same exporter and options
+    reuses the recorded fragments of unchanged images (aggregate formats are
+    reassembled from them without reconverting) and deletes the outputs of
+    images that are no longer part of the export.
+
+    COCO-style JSON is streamed to disk (see coco_writer); json_indent and
+    json_compression ("gzip" or "xz") control its layout.
+    """
+    COPY_MODES = ("copy", "hardlink", "symlink", "reference")
+    DEFAULT_COPY_WORKERS = 8
+    MANIFEST_FILENAME = "export_manifest.json"
+    MANIFEST_VERSION = 2
+    FRAGMENT_DIR = ".fragments"
+    # Layout exporters that repackage another exporter's labels take it as label_exporter
+    WRAPS_MODEL_FORMAT = False
     
-    def __init__(self, annotations_data, output_dir, class_map, project_name=None, model_name=None):
+    def __init__(self, annotations_data, output_dir, class_map, project_name=None, model_name=None,
+                 copy_mode="copy", copy_workers=None, incremental=True,
+                 json_indent=None, json_compression=None):
+        if copy_mode not in self.COPY_MODES:
+            raise ValueError(f"Unknown copy mode '{copy_mode}'. Expected one of {self.COPY_MODES}.")
         self.annotations_data = annotations_data
         self.output_dir = output_dir
         self.class_map = class_map
         self.project_name = project_name or "dataset_export"  # Default project name
         self.model_name = model_name
+        self.copy_mode = copy_mode
+        self.copy_workers = copy_workers or self.DEFAULT_COPY_WORKERS
+        self.copy_stats = None
+        self.incremental = incremental
+        self.json_indent = json_indent
+        self.json_compression = json_compression
+        self._manifest_entries = {}
+        self.reused_count = 0
         
         # Create project structure: project_name/images/ and project_name/labels/
         self.project_path = os.path.join(self.output_dir, self.project_name)
@@ -33,6 +121,252 @@ class Exporter(ABC):
         """Exports the annotations to the specified format."""
         pass
 
+    def _place_image(self, source, dest):
+        """
+        Puts one image at `dest` according to the copy mode.
+        Returns the number of bytes copied, or None if `dest` was already up to date.
+        """
+        src_stat = os.stat(source)
+        if self.copy_mode == "symlink":
+            if os.path.islink(dest) and os.readlink(dest) == os.path.abspath(source):
+                return None
+            if os.path.lexists(dest):
+                os.remove(dest)
+            os.symlink(os.path.abspath(source), dest)
+            return 0
+
+        if os.path.lexists(dest):
+            dest_stat = os.lstat(dest)
+            if self.copy_mode == "hardlink" and os.path.samestat(src_stat, dest_stat):
+                return None
+            if (self.copy_mode == "copy" and dest_stat.st_size == src_stat.st_size
+                    and int(dest_stat.st_mtime) == int(src_stat.st_mtime)):
+                return None
+            os.remove(dest)
+
+        if self.copy_mode == "hardlink":
+            try:
+                os.link(source, dest)
+                return 0
+            except OSError:
+                pass  # Different file system or no link support; copy instead
+        # copy2 keeps the mtime, which is what lets the next export skip this file
+        shutil.copy2(source, dest)
+        return src_stat.st_size
+
+    def source_images(self, warnings):
+        """Source image paths of the export that exist on disk, warning about the others."""
+        sources = []
+        for item in self.annotations_data:
+            image_path = item.get("image_path")
+            if not image_path:
+                continue
+            if not os.path.exists(image_path):
+                warnings.append(f"Source image not found: {image_path}")
+                continue
+            sources.append(image_path)
+        return sources
+
+    def copy_images(self, warnings):
+        """
+        Places every source image of the export in images/ in parallel.
+        Appends problems to `warnings` and returns the set of source paths
+        that are available to the exported dataset.
+        """
+        sources = {path: os.path.join(self.images_dir, os.path.basename(path))
+                   for path in self.source_images(warnings)}
+
+        start = time.perf_counter()
+        if self.copy_mode == "reference":
+            with open(os.path.join(self.project_path, "images.txt"), "w") as f:
+                f.write("\n".join(os.path.abspath(path) for path in sources))
+            placed, total_bytes, skipped = set(sources), 0, 0
+        else:
+            def place(entry):
+                source, dest = entry
+                try:
+                    return source, self._place_image(source, dest), None
+                except Exception as e:
+                    return source, None, f"Could not {self.copy_mode} image {source} to {dest}: {e}"
+
+            placed, total_bytes, skipped = set(), 0, 0
+            with ThreadPoolExecutor(max_workers=self.copy_workers) as pool:
+                for source, written, error in pool.map(place, sources.items()):
+                    if error:
+                        warnings.append(error)
+                        continue
+                    placed.add(source)
+                    if written is None:
+                        skipped += 1
+                    else:
+                        total_bytes += written
+
+        elapsed = max(time.perf_counter() - start, 1e-6)
+        self.copy_stats = {
+            "images": len(placed),
+            "skipped": skipped,
+            "bytes": total_bytes,
+            "seconds": elapsed,
+            "mb_per_second": total_bytes / elapsed / 1e6,
+            "images_per_second": len(placed) / elapsed
+        }
+        print(f"Placed {len(placed)} images ({self.copy_mode}, {skipped} already up to date) in {elapsed:.2f}s: "
+              f"{total_bytes / 1e6:.1f} MB at {self.copy_stats['mb_per_second']:.1f} MB/s, "
+              f"{self.copy_stats['images_per_second']:.0f} images/s")
+        return placed
+
+    def prepare(self, placed_images):
+        """
+        Called with the set of source images available to the export before
+        any fragment is built. Exporters that need export-wide state in
+        build_fragment() set it up here.
+        """
+        self.placed_images = placed_images
+
+    def build_fragment(self, item, warnings):
+        """
+        Converts one image's annotations. Returns (fragment, outputs): a
+        JSON-serializable fragment used to assemble aggregate files (or None)
+        and the paths, relative to the export folder, of files written for
+        this image. Problems go into `warnings`.
+        """
+        raise NotImplementedError
+
+    def _options_signature(self):
+        options = {
+            "exporter": type(self).__name__,
+            "model_name": self.model_name,
+            "class_map": self.class_map,
+            "copy_mode": self.copy_mode
+        }
+        return hashlib.sha1(json.dumps(options, sort_keys=True).encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _item_signature(item, placed):
+        digest = hashlib.sha1(json.dumps(item, sort_keys=True, default=str).encode("utf-8"))
+        # An image that failed to place gets no outputs, which must not be reused once it places
+        digest.update(b"placed" if placed else b"unplaced")
+        try:
+            stat = os.stat(item["image_path"])
+            digest.update(f"{stat.st_mtime_ns}:{stat.st_size}".encode("utf-8"))
+        except OSError:
+            digest.update(b"missing")
+        return digest.hexdigest()
+
+    def _load_manifest(self):
+        path = os.path.join(self.project_path, self.MANIFEST_FILENAME)
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path, "r") as f:
+                manifest = json.load(f)
+        except Exception as e:
+            print(f"Ignoring unreadable export manifest {path}: {e}")
+            return {}
+        if manifest.get("version") != self.MANIFEST_VERSION:
+            return {}
+        return manifest
+
+    def iter_fragments(self, warnings):
+        """
+        Yields (item, fragment) for every item with an image, calling
+        build_fragment() only for images whose annotations changed since the
+        export recorded in the manifest. self.item_position is the 1-based
+        position of the yielded item among all items, skipped ones included.
+        """
+        manifest = self._load_manifest()
+        self._previous_entries = manifest.get("items", {})
+        self._previous_files = manifest.get("files", [])
+        options = self._options_signature()
+        reusable = self.incremental and manifest.get("options") == options
+        self._manifest_entries = {}
+        self.reused_count = 0
+
+        for self.item_position, item in enumerate(self.annotations_data, start=1):
+            image_path = item.get("image_path")
+            if not image_path:
+                warnings.append("Skipping item with missing 'image_path'.")
+                continue
+
+            signature = self._item_signature(item, image_path in self.placed_images)
+            entry = self._previous_entries.get(image_path) if reusable else None
+            if (entry is not None and entry.get("signature") == signature
+                    and all(os.path.exists(os.path.join(self.project_path, out)) for out in entry["outputs"])):
+                fragment = self._read_fragment(entry["fragment"]) if entry.get("fragment") else None
+                self.reused_count += 1
+            else:
+                item_warnings = []
+                fragment, outputs = self.build_fragment(item, item_warnings)
+                fragment_file = None
+                if fragment is not None:
+                    fragment_file = self._write_fragment(image_path, fragment)
+                    outputs = outputs + [fragment_file]
+                entry = {"signature": signature, "fragment": fragment_file,
+                         "outputs": outputs, "warnings": item_warnings}
+            warnings.extend(entry["warnings"])
+            # Only the small entry stays in memory; the fragment lives on disk
+            self._manifest_entries[image_path] = entry
+            yield item, fragment
+
+    def _write_fragment(self, image_path, fragment):
+        """Caches a fragment in its own file. Returns its path relative to the export folder."""
+        digest = hashlib.sha1(image_path.encode("utf-8")).hexdigest()
+        relative_path = os.path.join(self.FRAGMENT_DIR, digest[:2], f"{digest}.json")
+        full_path = os.path.join(self.project_path, relative_path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, "w") as f:
+            json.dump(fragment, f, separators=(",", ":"))
+        return relative_path
+
+    def _read_fragment(self, relative_path):
+        with open(os.path.join(self.project_path, relative_path), "r") as f:
+            return json.load(f)
+
+    def json_writer(self, filename, categories):
+        """Streaming writer for labels/<filename> using this export's JSON options."""
+        return CocoJSONWriter(os.path.join(self.labels_dir, filename), categories,
+                              indent=self.json_indent, compression=self.json_compression)
+
+    def finish_manifest(self, aggregate_outputs=()):
+        """
+        Deletes outputs of images no longer exported, and files of a previous
+        export that this one did not write, then writes the new manifest.
+        `aggregate_outputs` are the export-wide files (relative paths) just written.
+        """
+        current_images = {os.path.basename(path) for path in self._manifest_entries}
+        current_outputs = {out for entry in self._manifest_entries.values() for out in entry["outputs"]}
+        current_outputs.update(aggregate_outputs)
+        stale = [out for out in getattr(self, "_previous_files", []) if out not in current_outputs]
+        for image_path, entry in getattr(self, "_previous_entries", {}).items():
+            # Outputs can go stale for current images too, e.g. after switching format
+            stale.extend(out for out in entry.get("outputs", []) if out not in current_outputs)
+            if os.path.basename(image_path) not in current_images:
+                stale.append(os.path.join("images", os.path.basename(image_path)))
+
+        removed = 0
+        for out in stale:
+            out_path = os.path.join(self.project_path, out)
+            if os.path.lexists(out_path):
+                try:
+                    os.remove(out_path)
+                    removed += 1
+                except OSError as e:
+                    print(f"Could not remove stale export file {out_path}: {e}")
+
+        manifest = {
+            "version": self.MANIFEST_VERSION,
+            "options": self._options_signature(),
+            "files": list(aggregate_outputs),
+            "items": self._manifest_entries
+        }
+        path = os.path.join(self.project_path, self.MANIFEST_FILENAME)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, path)
+        print(f"Reused {self.reused_count} of {len(self._manifest_entries)} unchanged images, "
+              f"removed {removed} stale files")
+
 # ---------------------------
 # COCO Exporter (Fixed for Faster R-CNN and EfficientDet)
 # ---------------------------
@@ -42,139 +376,77 @@ class COCOExporter(Exporter):
     Exports annotations to COCO format for Faster R-CNN and EfficientDet models.
     Both models require proper COCO JSON format with images, annotations, and categories.
     """
-    
+
+    def prepare(self, placed_images):
+        super().prepare(placed_images)
+
+        # Create a 1-based ID map to ensure COCO compliance
+        self.coco_id_map = {}
+        self.categories = []
+        for category_id, label in enumerate(sorted(self.class_map.keys()), start=1):
+            self.coco_id_map[label] = category_id
+            self.categories.append({"id": category_id, "name": label})
+
     def export(self):
         print(f"Exporting to COCO format in: {self.project_name}/")
-        
-        # Create a 1-based ID map to ensure COCO compliance
-        coco_id_map = {}
-        category_id_counter = 1
-        sorted_labels = sorted(self.class_map.keys())
-        categories_list = []
-        
-        for label in sorted_labels:
-            coco_id_map[label] = category_id_counter
-            categories_list.append({"id": category_id_counter, "name": label})
-            category_id_counter += 1
-        
-        coco = {
-            "images": [],
-            "annotations": [],
-            "categories": categories_list  # Always include categories for both models
-        }
-        
+
         warnings = []
+        self.prepare(self.copy_images(warnings))
         ann_id = 1
-        
-        for img_id, item in enumerate(self.annotations_data, start=1):
-            image_path = item.get("image_path")
-            if not image_path:
-                continue
-                
-            # Copy image to images/ subfolder
-            image_filename = os.path.basename(image_path)
-            image_dest_path = os.path.join(self.images_dir, image_filename)
-            if os.path.exists(image_path):
-                try:
-                    shutil.copy(image_path, image_dest_path)
-                except Exception as e:
-                    warnings.append(f"Could not copy image {image_path} to {image_dest_path}: {e}")
-            else:
-                warnings.append(f"Source image not found: {image_path}")
-                
-            coco["images"].append({
-                "id": img_id,
-                "file_name": image_filename,
+
+        # Stream annotations.json into the labels/ subfolder (categories are
+        # always included for both models). Image and annotation ids are
+        # assigned here, so cached fragments stay valid.
+        with self.json_writer("annotations.json", self.categories) as writer:
+            for img_id, (item, fragment) in enumerate(self.iter_fragments(warnings), start=1):
+                writer.add_image({"id": img_id, **fragment["image"]})
+                for ann in fragment["annotations"]:
+                    writer.add_annotation({"id": ann_id, "image_id": img_id, **ann})
+                    ann_id += 1
+
+        self.finish_manifest([os.path.relpath(writer.path, self.project_path)])
+        print(f"Export completed successfully to: {self.project_path}")
+        return warnings
+
+    def build_fragment(self, item, warnings):
+        image_path = item["image_path"]
+        fragment = {
+            "image": {
+                "file_name": os.path.basename(image_path),
                 "width": item.get("image_width", 0),
                 "height": item.get("image_height", 0)
+            },
+            "annotations": []
+        }
+
+        annotations = [ann for ann in item.get("annotations", []) if ann.get("label") in self.coco_id_map]
+        geometry = image_geometry(annotations)
+        _geometry_warnings(geometry, image_path, warnings)
+        bboxes = _xywh_boxes(geometry)
+        areas = np.round(geometry.area, 2).tolist()
+
+        for row, ann_id in enumerate(geometry.index):
+            ann = annotations[ann_id]
+            # Skip zero-area bounding boxes
+            if not geometry.valid[row]:
+                warnings.append(f"Zero-area {ann['type']} for '{ann['label']}' in {image_path}. Skipping.")
+                continue
+
+            if geometry.is_polygon[row]:
+                segmentation = [geometry.segments[row]]
+            else:
+                # Create segmentation from bbox coordinates
+                x_min, y_min, x_max, y_max = geometry.segments[row]
+                segmentation = [[x_min, y_min, x_max, y_min, x_max, y_max, x_min, y_max]]
+
+            fragment["annotations"].append({
+                "category_id": self.coco_id_map[ann["label"]],
+                "bbox": bboxes[row],
+                "segmentation": segmentation,
+                "area": areas[row],
+                "iscrowd": 0
             })
-            
-            for ann in item.get("annotations", []):
-                label = ann.get("label")
-                if label not in coco_id_map:
-                    continue
-                    
-                category_id = coco_id_map[label]
-                points = ann.get("points", [])
-                bbox, segmentation, area = [], [], 0.0
-                
-                if ann.get("type") == "polygon":
-                    if not points or len(points) < 3:
-                        continue
-                        
-                    seg = points
-                    if isinstance(seg[0], list):
-                        try:
-                            seg = [c for point in seg for c in point]
-                        except TypeError:
-                            warnings.append(f"Malformed polygon points for '{label}' in {image_path}. Skipping.")
-                            continue
-                    
-                    if len(seg) < 6:
-                        continue
-                        
-                    xs = seg[0::2]
-                    ys = seg[1::2]
-                    x_min, y_min = min(xs), min(ys)
-                    x_max, y_max = max(xs), max(ys)
-                    
-                    width, height = x_max - x_min, y_max - y_min
-                    
-                    # Skip zero-area bounding boxes
-                    if width <= 0 or height <= 0:
-                        warnings.append(f"Zero-area polygon for '{label}' in {image_path}. Skipping.")
-                        continue
-                    
-                    bbox = [x_min, y_min, width, height]
-                    segmentation = [seg]
-                    
-                    # Shoelace formula for area
-                    poly_area = 0.0
-                    for i in range(0, len(seg), 2):
-                        x1, y1 = seg[i], seg[i+1]
-                        x2, y2 = seg[(i+2) % len(seg)], seg[(i+3) % len(seg)]
-                        poly_area += x1 * y2 - x2 * y1
-                    area = abs(poly_area) / 2.0
-                    
-                elif ann.get("type") == "bbox":
-                    if len(points) != 4:
-                        continue
-                        
-                    x_min, y_min, x_max, y_max = points
-                    width, height = x_max - x_min, y_max - y_min
-                    
-                    # Skip zero-area bounding boxes
-                    if width <= 0 or height <= 0:
-                        warnings.append(f"Zero-area bbox for '{label}' in {image_path}. Skipping.")
-                        continue
-                    
-                    bbox = [x_min, y_min, width, height]
-                    area = float(width * height)
-                    
-                    # Create segmentation from bbox coordinates
-                    segmentation = [[x_min, y_min, x_max, y_min, x_max, y_max, x_min, y_max]]
-                    
-                else:
-                    continue  # Skip unknown annotation types
-                
-                coco["annotations"].append({
-                    "id": ann_id,
-                    "image_id": img_id,
-                    "category_id": category_id,
-                    "bbox": [round(v, 2) for v in bbox],
-                    "segmentation": segmentation,
-                    "area": round(area, 2),
-                    "iscrowd": 0
-                })
-                ann_id += 1
-        
-        # Save annotations.json to labels/ subfolder
-        outpath = os.path.join(self.labels_dir, "annotations.json")
-        with open(outpath, "w") as f:
-            json.dump(coco, f, indent=2)
-            
-        print(f"Export completed successfully to: {self.project_path}")
-        return warnings
+        return fragment, []
 
 # ---------------------------
 # YOLO Exporter (Enhanced)
@@ -182,89 +454,57 @@ class COCOExporter(Exporter):
 
 class YOLOExporter(Exporter):
     """Exports annotations to YOLO format with a structured project folder."""
-    
+
     def export(self):
         print(f"Exporting to YOLO format in: {self.project_name}/")
         print(f" └── {self.project_name}/")
         print(f"     ├── images/")
         print(f"     └── labels/")
-        
+
         warnings = []
-        
-        for item in self.annotations_data:
-            image_path = item.get("image_path")
-            if not image_path:
-                warnings.append("Skipping item with missing 'image_path'.")
-                continue
-                
-            if not os.path.exists(image_path):
-                warnings.append(f"Source image not found, cannot copy: {image_path}")
-                continue
-            
-            image_filename = os.path.basename(image_path)
-            txt_filename = f"{os.path.splitext(image_filename)[0]}.txt"
-            
-            # Define destination paths within the project structure
-            label_dest_path = os.path.join(self.labels_dir, txt_filename)
-            image_dest_path = os.path.join(self.images_dir, image_filename)
-            
-            # Copy the image file to the 'images' subdirectory
-            try:
-                shutil.copy(image_path, image_dest_path)
-            except Exception as e:
-                warnings.append(f"Could not copy image {image_path} to {image_dest_path}: {e}")
-                continue
-            
-            image_width = item.get("image_width")
-            image_height = item.get("image_height")
-            
-            if not image_width or not image_height:
-                warnings.append(f"Missing dimensions for {image_path}. Skipping label generation.")
-                continue
-            
-            lines = []
-            for ann in item.get("annotations", []):
-                if ann.get("type") == "polygon":
-                    points = ann.get("points", [])
-                    if not points:
-                        continue
-                    
-                    if isinstance(points[0], list):
-                        points = [c for point in points for c in point]
-                    
-                    if len(points) < 6:
-                        continue
-                    
-                    xs = points[0::2]; ys = points[1::2]
-                    x_min, y_min, x_max, y_max = min(xs), min(ys), max(xs), max(ys)
-                    
-                elif ann.get("type") == "bbox":
-                    points = ann.get("points")
-                    if not isinstance(points, list) or len(points) != 4:
-                        continue
-                    x_min, y_min, x_max, y_max = points
-                else:
-                    continue
-                
-                label = ann.get("label")
-                if label not in self.class_map:
-                    continue
-                
-                class_id = self.class_map[label]
-                
-                x_center = ((x_min + x_max) / 2) / image_width
-                y_center = ((y_min + y_max) / 2) / image_height
-                w = (x_max - x_min) / image_width
-                h = (y_max - y_min) / image_height
-                
-                lines.append(f"{class_id} {x_center:.6f} {y_center:.6f} {w:.6f} {h:.6f}")
-            
-            with open(label_dest_path, "w") as f:
-                f.write("\n".join(lines))
-        
+        self.prepare(self.copy_images(warnings))
+
+        # Label files are written by build_fragment, only for changed images
+        for _ in self.iter_fragments(warnings):
+            pass
+
+        self.finish_manifest()
         print(f"Export completed successfully to: {self.project_path}")
         return warnings
 
+    def build_fragment(self, item, warnings):
+        image_path = item["image_path"]
+        if image_path not in self.placed_images:
+            return None, []
+
+        image_filename = os.path.basename(image_path)
+        txt_filename = f"{os.path.splitext(image_filename)[0]}.txt"
+
+        # Define destination paths within the project structure
+        label_dest_path = os.path.join(self.labels_dir, txt_filename)
+
+        image_width = item.get("image_width")
+        image_height = item.get("image_height")
+
+        if not image_width or not image_height:
+            warnings.append(f"Missing dimensions for {image_path}. Skipping label generation.")
+            return None, []
+
+        annotations = [ann for ann in item.get("annotations", []) if ann.get("label") in self.class_map]
+        geometry = image_geometry(annotations, image_width, image_height)
+        _geometry_warnings(geometry, image_path, warnings)
+
+        lines = []
+        for row, ann_id in enumerate(geometry.index):
+            class_id = self.class_map[annotations[ann_id]["label"]]
+            x_center, y_center = geometry.centers[row]
+            w, h = geometry.norm_sizes[row]
+            lines.append(f"{class_id} {x_center:.6f} {y_center:.6f} {w:.6f} {h:.6f}")
+
+        with open(label_dest_path, "w") as f:
+            f.write("\n".join(lines))
+        return None, [os.path.join("labels", txt_filename)]
+
 # ---------------------------
 # GroundingDINO and OWL-ViT Exporter
 # ---------------------------
@@ -274,171 +514,95 @@ class GroundingDINOStrictExporter(Exporter):
     Exports annotations to a strict GroundingDINO format.
     The format is a dictionary with "boxes," "scores," and "labels."
     """
-    
+
     def export(self):
         print(f"Exporting to strict GroundingDINO format in: {self.project_name}/")
-        
+
         boxes = []
         scores = []
         labels = []
         warnings = []
-        
-        for item in self.annotations_data:
-            image_path = item.get("image_path")
-            if not image_path:
-                warnings.append("Skipping item with missing 'image_path'.")
-                continue
-            
-            # Copy image to images/ subfolder
-            image_filename = os.path.basename(image_path)
-            image_dest_path = os.path.join(self.images_dir, image_filename)
-            if os.path.exists(image_path):
-                try:
-                    shutil.copy(image_path, image_dest_path)
-                except Exception as e:
-                    warnings.append(f"Could not copy image {image_path} to {image_dest_path}: {e}")
-            else:
-                warnings.append(f"Source image not found: {image_path}")
-            
-            for ann in item.get("annotations", []):
-                label = ann.get("label")
-                if label not in self.class_map:
-                    warnings.append(f"Label '{label}' not in class map. Skipping annotation in {image_path}.")
-                    continue
-                
-                points = ann.get("points", [])
-                
-                if ann.get("type") == "polygon":
-                    if not points or len(points) < 3:
-                        warnings.append(f"Skipping malformed polygon with < 3 points in {image_path}.")
-                        continue
-                    
-                    if isinstance(points[0], list):
-                        try:
-                            points = [c for point in points for c in point]
-                        except TypeError:
-                            warnings.append(f"Malformed polygon points for '{label}' in {image_path}. Skipping.")
-                            continue
-                    
-                    if len(points) < 6:
-                        warnings.append(f"Skipping malformed polygon with < 6 values in {image_path}.")
-                        continue
-                    
-                    xs = points[0::2]
-                    ys = points[1::2]
-                    x_min, y_min = min(xs), min(ys)
-                    x_max, y_max = max(xs), max(ys)
-                    
-                elif ann.get("type") == "bbox":
-                    if not isinstance(points, list) or len(points) != 4:
-                        warnings.append(f"Skipping malformed bbox in {image_path}.")
-                        continue
-                    x_min, y_min, x_max, y_max = points
-                else:
-                    continue
-                
-                boxes.append([round(x_min, 2), round(y_min, 2), round(x_max, 2), round(y_max, 2)])
-                scores.append(ann.get("score", 1.0))
-                labels.append(label)
-        
+        self.prepare(self.copy_images(warnings))
+
+        for item, fragment in self.iter_fragments(warnings):
+            boxes.extend(fragment["boxes"])
+            scores.extend(fragment["scores"])
+            labels.extend(fragment["labels"])
+
         export_data = {
             "boxes": boxes,
             "scores": scores,
             "labels": labels
         }
-        
+
         # Save annotations.json to labels/ subfolder
         output_path = os.path.join(self.labels_dir, "annotations.json")
         with open(output_path, "w") as f:
             json.dump(export_data, f, indent=2)
-        
+
+        self.finish_manifest([os.path.join("labels", "annotations.json")])
         print(f"Successfully exported {len(boxes)} annotations")
         print(f"Export completed successfully to: {self.project_path}")
         return warnings
 
+    def build_fragment(self, item, warnings):
+        image_path = item["image_path"]
+        fragment = {"boxes": [], "scores": [], "labels": []}
+        annotations = _known_label_annotations(item, self.class_map, warnings)
+        geometry = image_geometry(annotations)
+        _geometry_warnings(geometry, image_path, warnings)
+        boxes = _corner_boxes(geometry)
+
+        for row, ann_id in enumerate(geometry.index):
+            ann = annotations[ann_id]
+            fragment["boxes"].append(boxes[row])
+            fragment["scores"].append(ann.get("score", 1.0))
+            fragment["labels"].append(ann["label"])
+        return fragment, []
+
 class GroundingDINOExporter(Exporter):
     """
     Exports annotations to a JSON list format compatible with GroundingDINO and OWL-ViT.
     The format is a list of dictionaries, each with "bbox", "score", and "label".
     """
-    
+
     def export(self):
         print(f"Exporting to GroundingDINO/OWL-ViT format in: {self.project_name}/")
-        
+
         export_data = []
         warnings = []
-        
-        for item in self.annotations_data:
-            image_path = item.get("image_path")
-            if not image_path:
-                warnings.append("Skipping item with missing 'image_path'.")
-                continue
-            
-            # Copy image to images/ subfolder
-            image_filename = os.path.basename(image_path)
-            image_dest_path = os.path.join(self.images_dir, image_filename)
-            if os.path.exists(image_path):
-                try:
-                    shutil.copy(image_path, image_dest_path)
-                except Exception as e:
-                    warnings.append(f"Could not copy image {image_path} to {image_dest_path}: {e}")
-            else:
-                warnings.append(f"Source image not found: {image_path}")
-            
-            for ann in item.get("annotations", []):
-                label = ann.get("label")
-                if label not in self.class_map:
-                    warnings.append(f"Label '{label}' not in class map. Skipping annotation in {image_path}.")
-                    continue
-                
-                points = ann.get("points", [])
-                
-                if ann.get("type") == "polygon":
-                    if not points or len(points) < 3:
-                        warnings.append(f"Skipping malformed polygon with < 3 points in {image_path}.")
-                        continue
-                    
-                    # Flatten points if they are in [[x1, y1], [x2, y2]] format
-                    if isinstance(points[0], list):
-                        try:
-                            points = [c for point in points for c in point]
-                        except TypeError:
-                            warnings.append(f"Malformed polygon points for '{label}' in {image_path}. Skipping.")
-                            continue
-                    
-                    if len(points) < 6:
-                        warnings.append(f"Skipping malformed polygon with < 6 values in {image_path}.")
-                        continue
-                    
-                    xs = points[0::2]
-                    ys = points[1::2]
-                    x_min, y_min = min(xs), min(ys)
-                    x_max, y_max = max(xs), max(ys)
-                    
-                elif ann.get("type") == "bbox":
-                    if not isinstance(points, list) or len(points) != 4:
-                        warnings.append(f"Skipping malformed bbox in {image_path}.")
-                        continue
-                    x_min, y_min, x_max, y_max = points
-                else:
-                    # Skip unsupported annotation types
-                    continue
-                
-                export_data.append({
-                    "bbox": [round(x_min, 2), round(y_min, 2), round(x_max, 2), round(y_max, 2)],
-                    "score": ann.get("score", 1.0),  # Use existing score or default to 1.0
-                    "label": label
-                })
-        
+        self.prepare(self.copy_images(warnings))
+
+        for item, fragment in self.iter_fragments(warnings):
+            export_data.extend(fragment)
+
         # Save annotations.json to labels/ subfolder
         output_path = os.path.join(self.labels_dir, "annotations.json")
         with open(output_path, "w") as f:
             json.dump(export_data, f, indent=2)
-        
+
+        self.finish_manifest([os.path.join("labels", "annotations.json")])
         print(f"Successfully exported {len(export_data)} annotations")
         print(f"Export completed successfully to: {self.project_path}")
         return warnings
 
+    def build_fragment(self, item, warnings):
+        image_path = item["image_path"]
+        fragment = []
+        annotations = _known_label_annotations(item, self.class_map, warnings)
+        geometry = image_geometry(annotations)
+        _geometry_warnings(geometry, image_path, warnings)
+        boxes = _corner_boxes(geometry)
+
+        for row, ann_id in enumerate(geometry.index):
+            ann = annotations[ann_id]
+            fragment.append({
+                "bbox": boxes[row],
+                "score": ann.get("score", 1.0),  # Use existing score or default to 1.0
+                "label": ann["label"]
+            })
+        return fragment, []
+
 # ---------------------------
 # SSD Exporter
 # ---------------------------
@@ -448,459 +612,605 @@ class SSDExporter(Exporter):
     Exports annotations to a simplified JSON format suitable for SSD models.
     The format is a list of dictionaries, each with "image" and "annotations".
     """
-    
+
     def export(self):
         print(f"Exporting to SSD JSON format in: {self.project_name}/")
-        
-        export_data = []
+
         warnings = []
-        
-        for item in self.annotations_data:
-            image_path = item.get("image_path")
-            if not image_path:
-                warnings.append("Skipping item with missing 'image_path'.")
-                continue
-            
-            # Copy image to images/ subfolder
-            image_filename = os.path.basename(image_path)
-            image_dest_path = os.path.join(self.images_dir, image_filename)
-            if os.path.exists(image_path):
-                try:
-                    shutil.copy(image_path, image_dest_path)
-                except Exception as e:
-                    warnings.append(f"Could not copy image {image_path} to {image_dest_path}: {e}")
-            else:
-                warnings.append(f"Source image not found: {image_path}")
-                
-            image_annotations = []
-            
-            for ann in item.get("annotations", []):
-                label = ann.get("label")
-                if not label:
-                    warnings.append(f"Skipping annotation with missing 'label' in {image_path}.")
-                    continue
-                
-                points = ann.get("points", [])
-                
-                if ann.get("type") == "polygon":
-                    if not points or len(points) < 3:
-                        warnings.append(f"Skipping malformed polygon with < 3 points in {image_path}.")
-                        continue
-                    
-                    if isinstance(points[0], list):
-                        try:
-                            points = [c for point in points for c in point]
-                        except TypeError:
-                            warnings.append(f"Malformed polygon points for '{label}' in {image_path}. Skipping.")
-                            continue
-                    
-                    if len(points) < 6:
-                        warnings.append(f"Skipping malformed polygon with < 6 values in {image_path}.")
-                        continue
-                    
-                    xs = points[0::2]
-                    ys = points[1::2]
-                    x_min, y_min = min(xs), min(ys)
-                    x_max, y_max = max(xs), max(ys)
-                    
-                elif ann.get("type") == "bbox":
-                    if not isinstance(points, list) or len(points) != 4:
-                        warnings.append(f"Skipping malformed bbox in {image_path}.")
-                        continue
-                    x_min, y_min, x_max, y_max = points
-                else:
-                    continue
-                
-                image_annotations.append({
-                    "category": label,
-                    "bbox": [round(x_min, 2), round(y_min, 2), round(x_max, 2), round(y_max, 2)]
-                })
-            
-            export_data.append({
-                "image": image_filename,
-                "annotations": image_annotations
-            })
-        
+        self.prepare(self.copy_images(warnings))
+        export_data = [fragment for item, fragment in self.iter_fragments(warnings)]
+
         # Save annotations.json to labels/ subfolder
         output_path = os.path.join(self.labels_dir, "annotations.json")
         with open(output_path, "w") as f:
             json.dump(export_data, f, indent=2)
-        
+
+        self.finish_manifest([os.path.join("labels", "annotations.json")])
         print(f"Successfully exported {len(export_data)} images")
         print(f"Export completed successfully to: {self.project_path}")
         return warnings
 
+    def build_fragment(self, item, warnings):
+        image_path = item["image_path"]
+        annotations = []
+        for ann in item.get("annotations", []):
+            if not ann.get("label"):
+                warnings.append(f"Skipping annotation with missing 'label' in {image_path}.")
+                continue
+            annotations.append(ann)
+
+        geometry = image_geometry(annotations)
+        _geometry_warnings(geometry, image_path, warnings)
+        boxes = _corner_boxes(geometry)
+        image_annotations = [
+            {"category": annotations[ann_id]["label"], "bbox": boxes[row]}
+            for row, ann_id in enumerate(geometry.index)
+        ]
+
+        return {"image": os.path.basename(image_path), "annotations": image_annotations}, []
+
 # ---------------------------
 # Pascal VOC Exporter
 # ---------------------------
 
 class PascalVOCExporter(Exporter):
     """Exports annotations to Pascal VOC XML format."""
-    
+
     def export(self):
         print(f"Exporting to Pascal VOC format in: {self.project_name}/")
-        
+
         warnings = []
-        
-        for item in self.annotations_data:
-            image_path = item.get("image_path")
-            if not image_path:
-                continue
-            
-            # Copy image to images/ subfolder
-            image_filename = os.path.basename(image_path)
-            image_dest_path = os.path.join(self.images_dir, image_filename)
-            if os.path.exists(image_path):
-                try:
-                    shutil.copy(image_path, image_dest_path)
-                except Exception as e:
-                    warnings.append(f"Could not copy image {image_path} to {image_dest_path}: {e}")
-            else:
-                warnings.append(f"Source image not found: {image_path}")
-            
-            xml_filename = f"{os.path.splitext(image_filename)[0]}.xml"
-            xml_filepath = os.path.join(self.labels_dir, xml_filename)
-            
-            root = ET.Element("annotation")
-            ET.SubElement(root, "filename").text = image_filename
-            
-            size = ET.SubElement(root, "size")
-            ET.SubElement(size, "width").text = str(item.get("image_width", 0))
-            ET.SubElement(size, "height").text = str(item.get("image_height", 0))
-            ET.SubElement(size, "depth").text = "3"
-            
-            for ann in item.get("annotations", []):
-                if ann.get("type") != "bbox":
-                    continue
-                
-                label = ann.get("label")
-                if label not in self.class_map:
-                    continue
-                
-                points = ann.get("points")
-                if not isinstance(points, list) or len(points) != 4:
-                    continue
-                
-                x_min, y_min, x_max, y_max = points
-                
-                obj = ET.SubElement(root, "object")
-                ET.SubElement(obj, "name").text = label
-                
-                bndbox = ET.SubElement(obj, "bndbox")
-                ET.SubElement(bndbox, "xmin").text = str(int(x_min))
-                ET.SubElement(bndbox, "ymin").text = str(int(y_min))
-                ET.SubElement(bndbox, "xmax").text = str(int(x_max))
-                ET.SubElement(bndbox, "ymax").text = str(int(y_max))
-            
-            tree = ET.ElementTree(root)
-            tree.write(xml_filepath, encoding='utf-8', xml_declaration=True)
-        
+        self.prepare(self.copy_images(warnings))
+
+        for _ in self.iter_fragments(warnings):
+            pass
+
+        self.finish_manifest()
         print(f"Export completed successfully to: {self.project_path}")
         return warnings
 
+    def build_fragment(self, item, warnings):
+        image_filename = os.path.basename(item["image_path"])
+
+        xml_filename = f"{os.path.splitext(image_filename)[0]}.xml"
+        xml_filepath = os.path.join(self.labels_dir, xml_filename)
+
+        root = ET.Element("annotation")
+        ET.SubElement(root, "filename").text = image_filename
+
+        size = ET.SubElement(root, "size")
+        ET.SubElement(size, "width").text = str(item.get("image_width", 0))
+        ET.SubElement(size, "height").text = str(item.get("image_height", 0))
+        ET.SubElement(size, "depth").text = "3"
+
+        annotations = [ann for ann in item.get("annotations", []) if ann.get("label") in self.class_map]
+        geometry = image_geometry(annotations, types=("bbox",))
+        _geometry_warnings(geometry, item["image_path"], warnings)
+
+        for row, ann_id in enumerate(geometry.index):
+            x_min, y_min, x_max, y_max = geometry.boxes[row]
+
+            obj = ET.SubElement(root, "object")
+            ET.SubElement(obj, "name").text = annotations[ann_id]["label"]
+
+            bndbox = ET.SubElement(obj, "bndbox")
+            ET.SubElement(bndbox, "xmin").text = str(int(x_min))
+            ET.SubElement(bndbox, "ymin").text = str(int(y_min))
+            ET.SubElement(bndbox, "xmax").text = str(int(x_max))
+            ET.SubElement(bndbox, "ymax").text = str(int(y_max))
+
+        tree = ET.ElementTree(root)
+        tree.write(xml_filepath, encoding='utf-8', xml_declaration=True)
+        return None, [os.path.join("labels", xml_filename)]
+
 # ---------------------------
 # DeepSORT Exporter
 # ---------------------------
 
 class DeepSORTExporter(Exporter):
     """Exports annotations to DeepSORT (MOT) format."""
-    
+
     def export(self):
         print(f"Exporting to DeepSORT (MOT) format in: {self.project_name}/")
-        
+
         lines = []
         warnings = []
-        
-        for frame_id, item in enumerate(self.annotations_data, start=1):
-            image_path = item.get("image_path")
-            if image_path:
-                # Copy image to images/ subfolder
-                image_filename = os.path.basename(image_path)
-                image_dest_path = os.path.join(self.images_dir, image_filename)
-                if os.path.exists(image_path):
-                    try:
-                        shutil.copy(image_path, image_dest_path)
-                    except Exception as e:
-                        warnings.append(f"Could not copy image {image_path} to {image_dest_path}: {e}")
-                else:
-                    warnings.append(f"Source image not found: {image_path}")
-            
-            for ann in item.get("annotations", []):
-                if ann.get("type") != "bbox":
-                    continue
-                
-                track_id = ann.get("track_id", -1)
-                points = ann.get("points")
-                if not isinstance(points, list) or len(points) != 4:
-                    continue
-                
-                x_min, y_min, x_max, y_max = points
-                w, h = x_max - x_min, y_max - y_min
-                lines.append(f"{frame_id},{track_id},{x_min},{y_min},{w},{h},1,-1,-1,-1")
-        
+        self.prepare(self.copy_images(warnings))
+
+        # Frame numbers depend on position, so fragments hold only the boxes; items
+        # without an image still take up a frame number, as they always have
+        for item, fragment in self.iter_fragments(warnings):
+            for track_id, x_min, y_min, w, h in fragment:
+                lines.append(f"{self.item_position},{track_id},{x_min},{y_min},{w},{h},1,-1,-1,-1")
+
         # Save gt.txt to labels/ subfolder
         outpath = os.path.join(self.labels_dir, "gt.txt")
         with open(outpath, "w") as f:
             f.write("\n".join(lines))
-        
+
+        self.finish_manifest([os.path.join("labels", "gt.txt")])
         print(f"Export completed successfully to: {self.project_path}")
         return warnings
 
+    def build_fragment(self, item, warnings):
+        annotations = item.get("annotations", [])
+        geometry = image_geometry(annotations, types=("bbox",))
+        _geometry_warnings(geometry, item["image_path"], warnings)
+
+        boxes = _xywh_boxes(geometry, decimals=None)
+        return [[annotations[ann_id].get("track_id", -1), *box] for ann_id, box in zip(geometry.index, boxes)], []
+
 class OpenPoseExporter(Exporter):
     """Exports annotations to OpenPose JSON format."""
-    
+
     def export(self):
         print(f"Exporting to OpenPose format in: {self.project_name}/")
-        
+
         warnings = []
-        
-        for item in self.annotations_data:
-            image_path = item.get("image_path")
-            if not image_path:
-                warnings.append("Skipping item with missing 'image_path'.")
-                continue
+        self.prepare(self.copy_images(warnings))
 
-            image_filename = os.path.basename(image_path)
-            json_filename = f"{os.path.splitext(image_filename)[0]}_keypoints.json"
-            json_filepath = os.path.join(self.labels_dir, json_filename)
+        for _ in self.iter_fragments(warnings):
+            pass
 
-            # Copy image to images/ subfolder
-            image_dest_path = os.path.join(self.images_dir, image_filename)
-            if os.path.exists(image_path):
-                try:
-                    shutil.copy(image_path, image_dest_path)
-                except Exception as e:
-                    warnings.append(f"Could not copy image {image_path} to {image_dest_path}: {e}")
-            else:
-                warnings.append(f"Source image not found: {image_path}")
+        self.finish_manifest()
+        print(f"Export completed successfully to: {self.project_path}")
+        return warnings
 
-            openpose_data = {
-                "version": 1.1,
-                "people": []
-            }
+    def build_fragment(self, item, warnings):
+        image_filename = os.path.basename(item["image_path"])
+        json_filename = f"{os.path.splitext(image_filename)[0]}_keypoints.json"
+        json_filepath = os.path.join(self.labels_dir, json_filename)
 
-            for ann in item.get("annotations", []):
-                if ann.get("type") == "keypoint":
-                    points = ann.get("points", [])
-                    # Flatten the points list: [[x,y,c], [x,y,c]] -> [x,y,c,x,y,c]
-                    pose_keypoints_2d = [coord for point in points for coord in point]
-                    
-                    person_data = {
-                        "pose_keypoints_2d": pose_keypoints_2d,
-                        "face_keypoints_2d": [],
-                        "hand_left_keypoints_2d": [],
-                        "hand_right_keypoints_2d": []
-                    }
-                    openpose_data["people"].append(person_data)
-
-            with open(json_filepath, "w") as f:
-                json.dump(openpose_data, f, indent=2)
+        openpose_data = {
+            "version": 1.1,
+            "people": []
+        }
 
-        print(f"Export completed successfully to: {self.project_path}")
-        return warnings
+        for ann in item.get("annotations", []):
+            if ann.get("type") == "keypoint":
+                points = ann.get("points", [])
+                # Flatten the points list: [[x,y,c], [x,y,c]] -> [x,y,c,x,y,c]
+                pose_keypoints_2d = [coord for point in points for coord in point]
+
+                person_data = {
+                    "pose_keypoints_2d": pose_keypoints_2d,
+                    "face_keypoints_2d": [],
+                    "hand_left_keypoints_2d": [],
+                    "hand_right_keypoints_2d": []
+                }
+                openpose_data["people"].append(person_data)
+
+        with open(json_filepath, "w") as f:
+            json.dump(openpose_data, f, indent=2)
+        return None, [os.path.join("labels", json_filename)]
 
 class HRNetExporter(Exporter):
     """Exports annotations to HRNet JSON format."""
-    
+
     def export(self):
         print(f"Exporting to HRNet format in: {self.project_name}/")
-        
+
         warnings = []
-        
-        for item in self.annotations_data:
-            image_path = item.get("image_path")
-            if not image_path:
-                warnings.append("Skipping item with missing 'image_path'.")
-                continue
+        self.prepare(self.copy_images(warnings))
 
-            image_filename = os.path.basename(image_path)
-            json_filename = f"{os.path.splitext(image_filename)[0]}_keypoints.json"
-            json_filepath = os.path.join(self.labels_dir, json_filename)
+        for _ in self.iter_fragments(warnings):
+            pass
 
-            # Copy image to images/ subfolder
-            image_dest_path = os.path.join(self.images_dir, image_filename)
-            if os.path.exists(image_path):
-                try:
-                    shutil.copy(image_path, image_dest_path)
-                except Exception as e:
-                    warnings.append(f"Could not copy image {image_path} to {image_dest_path}: {e}")
-            else:
-                warnings.append(f"Source image not found: {image_path}")
+        self.finish_manifest()
+        print(f"Export completed successfully to: {self.project_path}")
+        return warnings
 
-            hrnet_data = {
-                "people": []
-            }
+    def build_fragment(self, item, warnings):
+        image_filename = os.path.basename(item["image_path"])
+        json_filename = f"{os.path.splitext(image_filename)[0]}_keypoints.json"
+        json_filepath = os.path.join(self.labels_dir, json_filename)
 
-            for ann in item.get("annotations", []):
-                if ann.get("type") == "keypoint":
-                    points = ann.get("points", [])
-                    keypoints_2d = [coord for point in points for coord in point]
-                    
-                    person_data = {
-                        "keypoints_2d": keypoints_2d
-                    }
-                    hrnet_data["people"].append(person_data)
+        hrnet_data = {
+            "people": []
+        }
 
-            with open(json_filepath, "w") as f:
-                json.dump(hrnet_data, f, indent=2)
+        for ann in item.get("annotations", []):
+            if ann.get("type") == "keypoint":
+                points = ann.get("points", [])
+                keypoints_2d = [coord for point in points for coord in point]
 
-        print(f"Export completed successfully to: {self.project_path}")
-        return warnings
+                person_data = {
+                    "keypoints_2d": keypoints_2d
+                }
+                hrnet_data["people"].append(person_data)
+
+        with open(json_filepath, "w") as f:
+            json.dump(hrnet_data, f, indent=2)
+        return None, [os.path.join("labels", json_filename)]
 
 class MediaPipePoseExporter(Exporter):
     """Exports annotations to MediaPipe Pose JSON format."""
-    
+
     def export(self):
         print(f"Exporting to MediaPipe Pose format in: {self.project_name}/")
-        
+
         warnings = []
-        
-        for item in self.annotations_data:
-            image_path = item.get("image_path")
-            if not image_path:
-                warnings.append("Skipping item with missing 'image_path'.")
-                continue
+        self.prepare(self.copy_images(warnings))
 
-            image_filename = os.path.basename(image_path)
-            json_filename = f"{os.path.splitext(image_filename)[0]}_keypoints.json"
-            json_filepath = os.path.join(self.labels_dir, json_filename)
+        for _ in self.iter_fragments(warnings):
+            pass
 
-            # Copy image to images/ subfolder
-            image_dest_path = os.path.join(self.images_dir, image_filename)
-            if os.path.exists(image_path):
-                try:
-                    shutil.copy(image_path, image_dest_path)
-                except Exception as e:
-                    warnings.append(f"Could not copy image {image_path} to {image_dest_path}: {e}")
-            else:
-                warnings.append(f"Source image not found: {image_path}")
+        self.finish_manifest()
+        print(f"Export completed successfully to: {self.project_path}")
+        return warnings
 
-            mediapipe_data = {
-                "pose_landmarks": [],
-                "pose_world_landmarks": []
-            }
+    def build_fragment(self, item, warnings):
+        image_filename = os.path.basename(item["image_path"])
+        json_filename = f"{os.path.splitext(image_filename)[0]}_keypoints.json"
+        json_filepath = os.path.join(self.labels_dir, json_filename)
 
-            for ann in item.get("annotations", []):
-                if ann.get("type") == "keypoint":
-                    points = ann.get("points", [])
-                    landmarks = []
-                    for point in points:
-                        x, y, confidence = point
-                        landmarks.append({
-                            "x": x,
-                            "y": y,
-                            "z": 0.0,  # Z-coordinate is not available
-                            "visibility": confidence
-                        })
-                    # In a multi-person scenario, mediapipe returns a list of landmarks for each person.
-                    # Here we are adding all landmarks to a single list.
-                    # This might need adjustment based on how multi-person is handled.
-                    mediapipe_data["pose_landmarks"].extend(landmarks)
-
-            with open(json_filepath, "w") as f:
-                json.dump(mediapipe_data, f, indent=2)
+        mediapipe_data = {
+            "pose_landmarks": [],
+            "pose_world_landmarks": []
+        }
 
-        print(f"Export completed successfully to: {self.project_path}")
-        return warnings
+        for ann in item.get("annotations", []):
+            if ann.get("type") == "keypoint":
+                points = ann.get("points", [])
+                landmarks = []
+                for point in points:
+                    x, y, confidence = point
+                    landmarks.append({
+                        "x": x,
+                        "y": y,
+                        "z": 0.0,  # Z-coordinate is not available
+                        "visibility": confidence
+                    })
+                # In a multi-person scenario, mediapipe returns a list of landmarks for each person.
+                # Here we are adding all landmarks to a single list.
+                # This might need adjustment based on how multi-person is handled.
+                mediapipe_data["pose_landmarks"].extend(landmarks)
+
+        with open(json_filepath, "w") as f:
+            json.dump(mediapipe_data, f, indent=2)
+        return None, [os.path.join("labels", json_filename)]
 
 class PoseTrackExporter(Exporter):
     """Exports annotations to PoseTrack JSON format."""
-    
+
     def export(self):
         print(f"Exporting to PoseTrack format in: {self.project_name}/")
-        
-        warnings = []
-        
-        posetrack_data = {
-            "images": [],
-            "annotations": [],
-            "categories": [
-                {
-                    "supercategory": "person",
-                    "id": 1,
-                    "name": "person",
-                    "keypoints": [
-                        "nose", "head_bottom", "head_top", "left_ear", "right_ear",
-                        "left_shoulder", "right_shoulder", "left_elbow", "right_elbow",
-                        "left_wrist", "right_wrist", "left_hip", "right_hip",
-                        "left_knee", "right_knee", "left_ankle", "right_ankle"
-                    ],
-                    "skeleton": [
-                        [16, 14], [14, 12], [17, 15], [15, 13], [12, 13], [6, 8], [7, 9],
-                        [8, 10], [9, 11], [2, 3], [1, 2], [1, 3], [2, 4], [3, 5], [4, 6], [5, 7]
-                    ]
-                }
-            ]
-        }
 
-        ann_id_counter = 1
-        for img_id, item in enumerate(self.annotations_data, start=1):
-            image_path = item.get("image_path")
-            if not image_path:
-                warnings.append("Skipping item with missing 'image_path'.")
-                continue
+        warnings = []
+        self.prepare(self.copy_images(warnings))
 
-            image_filename = os.path.basename(image_path)
-            # Copy image to images/ subfolder
-            image_dest_path = os.path.join(self.images_dir, image_filename)
-            if os.path.exists(image_path):
-                try:
-                    shutil.copy(image_path, image_dest_path)
-                except Exception as e:
-                    warnings.append(f"Could not copy image {image_path} to {image_dest_path}: {e}")
-            else:
-                warnings.append(f"Source image not found: {image_path}")
-            
-            posetrack_data["images"].append({
-                "file_name": image_filename,
-                "id": img_id
-            })
+        categories = [
+            {
+                "supercategory": "person",
+                "id": 1,
+                "name": "person",
+                "keypoints": [
+                    "nose", "head_bottom", "head_top", "left_ear", "right_ear",
+                    "left_shoulder", "right_shoulder", "left_elbow", "right_elbow",
+                    "left_wrist", "right_wrist", "left_hip", "right_hip",
+                    "left_knee", "right_knee", "left_ankle", "right_ankle"
+                ],
+                "skeleton": [
+                    [16, 14], [14, 12], [17, 15], [15, 13], [12, 13], [6, 8], [7, 9],
+                    [8, 10], [9, 11], [2, 3], [1, 2], [1, 3], [2, 4], [3, 5], [4, 6], [5, 7]
+                ]
+            }
+        ]
 
-            for ann in item.get("annotations", []):
-                if ann.get("type") == "keypoint":
-                    points = ann.get("points", [])
-                    if not points:
-                        continue
+        ann_id_counter = 1
+        with self.json_writer("posetrack_annotations.json", categories) as writer:
+            for img_id, (item, fragment) in enumerate(self.iter_fragments(warnings), start=1):
+                writer.add_image({
+                    "file_name": fragment["file_name"],
+                    "id": img_id
+                })
 
-                    # Calculate bounding box
-                    visible_points = [p for p in points if p[2] > 0]
-                    if not visible_points:
-                        continue
-                    
-                    xs = [p[0] for p in visible_points]
-                    ys = [p[1] for p in visible_points]
-                    x_min, y_min = min(xs), min(ys)
-                    x_max, y_max = max(xs), max(ys)
-                    bbox = [x_min, y_min, x_max - x_min, y_max - y_min]
-
-                    # Flatten keypoints and set visibility
-                    keypoints = []
-                    num_keypoints = 0
-                    for p in points:
-                        x, y, conf = p
-                        v = 2 if conf > 0 else 0 # 2=visible, 1=occluded, 0=not labeled
-                        if v > 0:
-                            num_keypoints += 1
-                        keypoints.extend([x, y, v])
-
-                    posetrack_data["annotations"].append({
-                        "person_id": ann.get("track_id", ann_id_counter),
+                for person in fragment["people"]:
+                    track_id = person["track_id"]
+                    writer.add_annotation({
+                        "person_id": track_id if track_id is not None else ann_id_counter,
                         "image_id": img_id,
                         "category_id": 1,
-                        "keypoints": keypoints,
-                        "num_keypoints": num_keypoints,
-                        "bbox": bbox,
+                        "keypoints": person["keypoints"],
+                        "num_keypoints": person["num_keypoints"],
+                        "bbox": person["bbox"],
                         "id": ann_id_counter
                     })
                     ann_id_counter += 1
 
-        json_filepath = os.path.join(self.labels_dir, "posetrack_annotations.json")
-        with open(json_filepath, "w") as f:
-            json.dump(posetrack_data, f, indent=2)
+        self.finish_manifest([os.path.relpath(writer.path, self.project_path)])
+        print(f"Export completed successfully to: {self.project_path}")
+        return warnings
+
+    def build_fragment(self, item, warnings):
+        people = []
+        for ann in item.get("annotations", []):
+            if ann.get("type") == "keypoint":
+                points = ann.get("points", [])
+                if not points:
+                    continue
+
+                # Calculate bounding box
+                visible_points = [p for p in points if p[2] > 0]
+                if not visible_points:
+                    continue
+
+                xs = [p[0] for p in visible_points]
+                ys = [p[1] for p in visible_points]
+                x_min, y_min = min(xs), min(ys)
+                x_max, y_max = max(xs), max(ys)
+                bbox = [x_min, y_min, x_max - x_min, y_max - y_min]
+
+                # Flatten keypoints and set visibility
+                keypoints = []
+                num_keypoints = 0
+                for p in points:
+                    x, y, conf = p
+                    v = 2 if conf > 0 else 0 # 2=visible, 1=occluded, 0=not labeled
+                    if v > 0:
+                        num_keypoints += 1
+                    keypoints.extend([x, y, v])
+
+                people.append({
+                    "track_id": ann.get("track_id"),
+                    "keypoints": keypoints,
+                    "num_keypoints": num_keypoints,
+                    "bbox": bbox
+                })
+        return {"file_name": os.path.basename(item["image_path"]), "people": people}, []
+
+# ---------------------------
+# Columnar Label Exporter
+# ---------------------------
+
+class ColumnarExporter(Exporter):
+    """
+    Exports every label as columnar arrays in labels/ (see columnar):
+    Parquet tables when pyarrow is installed, otherwise labels.npz. Images
+    are placed as usual; the columns are the same for every model.
+    """
+
+    def export(self):
+        print(f"Exporting columnar labels in: {self.project_name}/")
+
+        warnings = []
+        self.prepare(self.copy_images(warnings))
+        items = [item for item, _ in self.iter_fragments(warnings)]
+
+        columns = build_columns(items, self.class_map, warnings)
+        files = write_columns(columns, self.labels_dir)
+
+        self.finish_manifest([os.path.join("labels", name) for name in files])
+        print(f"Successfully exported {len(columns['bbox'])} objects and "
+              f"{len(columns['keypoints'])} keypoint instances ({', '.join(files)})")
+        print(f"Export completed successfully to: {self.project_path}")
+        return warnings
+
+    def build_fragment(self, item, warnings):
+        # Columns are built for the whole export in one vectorized pass
+        return None, []
+
+# ---------------------------
+# Image Tensor Pack Exporter
+# ---------------------------
+
+class TensorPackExporter(Exporter):
+    """
+    Decodes every image once into a memory-mapped uint8 tensor pack in
+    tensor_pack/ (see tensor_pack), with the labels as columns next to it in
+    pack pixel coordinates. image_size resizes while packing: an int bounds
+    the longer side, a (width, height) pair is exact. Decoding runs on
+    pack_workers processes (default: one per CPU).
+    """
+    PACK_DIR = "tensor_pack"
 
+    def __init__(self, annotations_data, output_dir, class_map, project_name=None, model_name=None,
+                 image_size=None, pack_workers=None, **kwargs):
+        super().__init__(annotations_data, output_dir, class_map, project_name, model_name, **kwargs)
+        self.image_size = image_size or None
+        self.pack_workers = pack_workers
+        self.pack_dir = os.path.join(self.project_path, self.PACK_DIR)
+        os.makedirs(self.pack_dir, exist_ok=True)
+
+    def export(self):
+        print(f"Exporting image tensor pack in: {self.project_name}/")
+
+        warnings = []
+        available = set(self.source_images(warnings))
+        self.prepare(available)
+        items = [item for item, _ in self.iter_fragments(warnings) if item["image_path"] in available]
+
+        start = time.perf_counter()
+        index, pack_warnings = write_tensor_pack([item["image_path"] for item in items], self.pack_dir,
+                                                 self.image_size, self.pack_workers)
+        warnings.extend(pack_warnings)
+        elapsed = max(time.perf_counter() - start, 1e-6)
+
+        # Labels follow the images that made it into the pack, scaled to their packed size
+        packed = set(index["source_path"].tolist())
+        items = [item for item in items if item["image_path"] in packed]
+        columns = scale_columns(build_columns(items, self.class_map, warnings), index["scale"])
+        columns["image_width"] = index["shape"][:, 1].copy()
+        columns["image_height"] = index["shape"][:, 0].copy()
+        files = write_columns(columns, self.pack_dir)
+
+        total_bytes = int(index["shape"].prod(axis=1).sum())
+        print(f"Packed {len(items)} images ({total_bytes / 1e6:.1f} MB) in {elapsed:.2f}s "
+              f"({len(items) / elapsed:.0f} images/s)")
+        outputs = [IMAGES_FILENAME, INDEX_FILENAME] + files
+        self.finish_manifest([os.path.join(self.PACK_DIR, name) for name in outputs])
         print(f"Export completed successfully to: {self.project_path}")
         return warnings
 
+    def build_fragment(self, item, warnings):
+        # The pack and its label columns are rebuilt for the whole export
+        return None, []
+
+# ---------------------------
+# WebDataset Shard Exporter
+# ---------------------------
+
+class WebDatasetExporter(Exporter):
+    """
+    Packs the export into WebDataset-style .tar shards for sequential reading.
+
+    Labels come from the model's exporter (label_exporter): every sample is
+    the image plus the label files that exporter writes for it (YOLO .txt,
+    Pascal VOC .xml, ...) or, for formats that build one file for the whole
+    dataset, its per-image part as COCO-style JSON. Members are named
+    <key>.<ext>, the key being the image name without its extension.
+
+    Samples are shuffled deterministically (shuffle_seed), cut into shards of
+    about shard_size_mb and written in parallel. shards/index.json records
+    each sample's shard and the offset and size of its members, so single
+    samples can be read without scanning a shard.
+    """
+    WRAPS_MODEL_FORMAT = True
+    TARGET_SHARD_MB = 256
+    SHARD_DIR = "shards"
+    INDEX_FILENAME = "index.json"
+    _TAR_BLOCK = tarfile.BLOCKSIZE
+
+    def __init__(self, annotations_data, output_dir, class_map, project_name=None, model_name=None,
+                 label_exporter=None, shard_size_mb=None, shuffle_seed=0, **kwargs):
+        super().__init__(annotations_data, output_dir, class_map, project_name, model_name, **kwargs)
+        label_exporter = label_exporter or EXPORTER_MAPPING.get(model_name, COCOExporter)
+        # The label exporter shares the export folder, so its manifest keeps labels incremental
+        self.label_exporter = label_exporter(annotations_data, output_dir, class_map, project_name,
+                                             model_name, **kwargs)
+        self.shard_bytes = (shard_size_mb or self.TARGET_SHARD_MB) * 1024 * 1024
+        self.shuffle_seed = shuffle_seed
+        self.shards_dir = os.path.join(self.project_path, self.SHARD_DIR)
+        os.makedirs(self.shards_dir, exist_ok=True)
+
+    def export(self):
+        print(f"Exporting WebDataset shards ({type(self.label_exporter).__name__} labels) in: {self.project_name}/")
+
+        warnings = []
+        labels = self.label_exporter
+        available = set(self.source_images(warnings))
+        labels.prepare(available)
+
+        samples = []
+        for item, fragment in labels.iter_fragments(warnings):
+            image_path = item["image_path"]
+            if image_path not in available:
+                continue
+            samples.append(self._sample(image_path, fragment, labels._manifest_entries[image_path]["outputs"]))
+
+        # Sort first so the shuffle depends only on the seed and the set of images
+        samples.sort(key=lambda sample: sample["image_path"])
+        self._unique_keys(samples, warnings)
+        random.Random(self.shuffle_seed).shuffle(samples)
+        shards = self._plan_shards(samples)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.copy_workers) as pool:
+            results = list(pool.map(self._write_shard, enumerate(shards)))
+        elapsed = max(time.perf_counter() - start, 1e-6)
+
+        index = {"version": 1, "seed": self.shuffle_seed, "shards": [], "samples": []}
+        for shard_id, (name, size, entries) in enumerate(results):
+            index["shards"].append({"file": name, "samples": len(entries), "bytes": size})
+            for entry in entries:
+                entry["shard"] = shard_id
+            index["samples"].extend(entries)
+        index_path = os.path.join(self.shards_dir, self.INDEX_FILENAME)
+        with open(index_path, "w") as f:
+            json.dump(index, f, separators=(",", ":"))
+
+        total_bytes = sum(size for _, size, _ in results)
+        print(f"Wrote {len(samples)} samples in {len(results)} shards in {elapsed:.2f}s "
+              f"({total_bytes / 1e6 / elapsed:.1f} MB/s)")
+
+        outputs = [os.path.join(self.SHARD_DIR, name) for name, _, _ in results]
+        labels.finish_manifest(outputs + [os.path.join(self.SHARD_DIR, self.INDEX_FILENAME)])
+        print(f"Export completed successfully to: {self.project_path}")
+        return warnings
+
+    def _sample(self, image_path, fragment, outputs):
+        """The tar members of one image: (extension, file path or bytes) pairs."""
+        stem, image_ext = os.path.splitext(os.path.basename(image_path))
+        # WebDataset splits keys from extensions at the first dot
+        key = stem.replace(".", "_")
+        members = [(image_ext.lstrip(".").lower(), image_path)]
+        for out in outputs:
+            if out.startswith(self.FRAGMENT_DIR + os.sep):
+                continue
+            name = os.path.basename(out)
+            ext = name[len(stem):].lstrip("._") if name.startswith(stem) else name
+            members.append((ext, os.path.join(self.project_path, out)))
+        if fragment is not None:
+            members.append(("json", json.dumps(fragment, separators=(",", ":")).encode("utf-8")))
+
+        size = sum(len(data) if isinstance(data, bytes) else os.path.getsize(data) for _, data in members)
+        return {"image_path": image_path, "key": key, "members": members, "size": size}
+
+    def _unique_keys(self, samples, warnings):
+        """
+        Renames samples whose keys collide (a.b.jpg and a_b.png are both
+        "a_b"), which loaders would otherwise merge into one sample. Each
+        gets a short hash of its file name, then a counter if that still collides.
+        """
+        counts = {}
+        for sample in samples:
+            counts[sample["key"]] = counts.get(sample["key"], 0) + 1
+        used = {key for key, count in counts.items() if count == 1}
+        for sample in samples:
+            key = sample["key"]
+            if counts[key] == 1:
+                continue
+            name = os.path.basename(sample["image_path"])
+            base = unique = f"{key}_{hashlib.sha1(name.encode('utf-8')).hexdigest()[:8]}"
+            suffix = 1
+            while unique in used:
+                unique = f"{base}_{suffix}"
+                suffix += 1
+            used.add(unique)
+            sample["key"] = unique
+            warnings.append(f"WebDataset key '{key}' is shared by several images; {sample['image_path']} "
+                            f"is stored as '{unique}'.")
+
+    def _plan_shards(self, samples):
+        """Cuts the shuffled samples into consecutive shards of about the target size."""
+        shards, current, current_size = [], [], 0
+        for sample in samples:
+            if current and current_size + sample["size"] > self.shard_bytes:
+                shards.append(current)
+                current, current_size = [], 0
+            current.append(sample)
+            current_size += sample["size"]
+        if current:
+            shards.append(current)
+        return shards
+
+    def _write_shard(self, numbered_shard):
+        """Writes one shard. Returns (file name, size, index entries)."""
+        shard_id, samples = numbered_shard
+        name = f"{self.project_name}-{shard_id:06d}.tar"
+        path = os.path.join(self.shards_dir, name)
+        tmp_path = f"{path}.tmp"
+        entries = []
+        with tarfile.open(tmp_path, "w", format=tarfile.PAX_FORMAT) as tar:
+            for sample in samples:
+                entry = {"key": sample["key"], "members": {}}
+                for ext, data in sample["members"]:
+                    if isinstance(data, bytes):
+                        payload, size = io.BytesIO(data), len(data)
+                    else:
+                        payload, size = open(data, "rb"), os.path.getsize(data)
+                    # Fixed metadata keeps shards byte-identical between runs
+                    info = tarfile.TarInfo(f"{sample['key']}.{ext}")
+                    info.size, info.mtime, info.mode = size, 0, 0o644
+                    with payload:
+                        tar.addfile(info, payload)
+                    # Member data ends at the current offset, padded to whole blocks
+                    padded = -(-size // self._TAR_BLOCK) * self._TAR_BLOCK
+                    entry["members"][ext] = [tar.offset - padded, size]
+                entries.append(entry)
+        os.replace(tmp_path, path)
+        return name, os.path.getsize(path), entries
+
 # ---------------------------
 # Dispatcher
 # ---------------------------
@@ -926,14 +1236,42 @@ EXPORTER_MAPPING = {
     "SAM": COCOExporter,
 }
 
-def export_annotations(annotations, output_dir, model_name, class_map, project_name=None):
-    """Dispatches annotation export task to the correct exporter class."""
+# Dataset layouts other than the model's own files
+LAYOUT_EXPORTERS = {
+    "webdataset": WebDatasetExporter,
+    "columnar": ColumnarExporter,
+    "tensor_pack": TensorPackExporter,
+}
+# Layouts that place image files in images/ (and so use copy_mode)
+IMAGE_PLACING_LAYOUTS = ("files", "columnar")
+
+def export_annotations(annotations, output_dir, model_name, class_map, project_name=None,
+                       copy_mode="copy", copy_workers=None, incremental=True,
+                       json_indent=None, json_compression=None, layout="files", **exporter_options):
+    """
+    Dispatches annotation export task to the correct exporter class.
+    copy_mode and copy_workers control how images are placed; with
+    incremental, unchanged images of an earlier export are reused;
+    json_indent and json_compression apply to COCO-style JSON (see Exporter).
+    layout "webdataset" packs the model's format into tar shards and
+    "columnar" writes all labels as Parquet/NPZ arrays, "tensor_pack"
+    decodes the images into one memory-mapped array. Other keyword
+    arguments go to the exporter (e.g. shard_size_mb, image_size).
+    """
     if model_name not in EXPORTER_MAPPING:
         raise ValueError(f"Exporter for {model_name} not implemented.")
     
     exporter_cls = EXPORTER_MAPPING[model_name]
+    if layout != "files":
+        if layout not in LAYOUT_EXPORTERS:
+            raise ValueError(f"Unknown export layout '{layout}'.")
+        if LAYOUT_EXPORTERS[layout].WRAPS_MODEL_FORMAT:
+            exporter_options["label_exporter"] = exporter_cls
+        exporter_cls = LAYOUT_EXPORTERS[layout]
     # Pass the project_name and model_name to the exporter's constructor
-    exporter = exporter_cls(annotations, output_dir, class_map, project_name, model_name=model_name)
+    exporter = exporter_cls(annotations, output_dir, class_map, project_name, model_name=model_name,
+                            copy_mode=copy_mode, copy_workers=copy_workers, incremental=incremental,
+                            json_indent=json_indent, json_compression=json_compression, **exporter_options)
     warnings = exporter.export()
     
     if warnings:
@@ -945,6 +1283,65 @@ def export_annotations(annotations, output_dir, model_name, class_map, project_n
     
     return warnings
 
+class LazyAnnotations:
+    """
+    Annotation items read with load_item(image_path) each time they are
+    iterated, so an export never holds all of them at once. Images for
+    which load_item() returns None are skipped.
+    """
+
+    def __init__(self, image_paths, load_item):
+        self.image_paths = list(image_paths)
+        self.load_item = load_item
+
+    def __iter__(self):
+        for image_path in self.image_paths:
+            item = self.load_item(image_path)
+            if item:
+                yield item
+
+def export_split_annotations(image_paths, load_item, output_dir, model_name, class_map, project_name=None,
+                             splits=DEFAULT_SPLITS, split_by="name", image_labels=None, split_layout="folders",
+                             **export_options):
+    """
+    Exports `image_paths` divided into deterministic splits (see splits).
+    Annotations are read with load_item(image_path) as the export goes
+    instead of up front. split_layout "folders" exports each split into
+    <project_name>/<split>/; "lists" exports once and writes <split>.txt
+    files naming each split's images. Passing image_labels
+    ({path: {label: count}}) stratifies the splits by label.
+    Other arguments are as for export_annotations.
+    """
+    if split_layout not in ("folders", "lists"):
+        raise ValueError(f"Unknown split layout '{split_layout}'. Expected 'folders' or 'lists'.")
+    project_name = project_name or "dataset_export"
+    project_path = os.path.join(output_dir, project_name)
+
+    assigner = SplitAssigner(splits, split_by, stratified=image_labels is not None)
+    assigner.load(project_path)
+    split_of = assigner.assign(image_paths, image_labels)
+    assigner.save(project_path)
+    split_paths = {name: [path for path in image_paths if split_of[path] == name] for name, _ in assigner.splits}
+    print("Split: " + ", ".join(f"{name} {len(paths)}" for name, paths in split_paths.items()))
+
+    if split_layout == "folders":
+        warnings = []
+        for name, paths in split_paths.items():
+            warnings.extend(export_annotations(LazyAnnotations(paths, load_item), project_path, model_name,
+                                               class_map, name, **export_options))
+        return warnings
+
+    warnings = export_annotations(LazyAnnotations(image_paths, load_item), output_dir, model_name,
+                                  class_map, project_name, **export_options)
+    # Lists point at placed images where there are any, otherwise name them
+    placed = (export_options.get("layout", "files") in IMAGE_PLACING_LAYOUTS
+              and export_options.get("copy_mode", "copy") != "reference")
+    for name, paths in split_paths.items():
+        with open(os.path.join(project_path, f"{name}.txt"), "w") as f:
+            f.write("\n".join(f"images/{os.path.basename(path)}" if placed else os.path.basename(path)
+                              for path in paths))
+    return warnings
+
 # ---------------------------
 # Example Usage
 # ---------------------------
@@ -0,0 +1,166 @@
+# C:\LabelAI\backend\geometry.py
+
+"""
+Vectorized geometry for bbox and polygon annotations, shared by the exporters.
+
+compute_geometry() takes the annotations of one image or of a whole project
+and returns one row per well-formed annotation: its box, size, area, whether
+the box has a positive width and height, and the box centre and size
+normalized by the image dimensions. Points are flattened once into a single
+coordinate array and everything else is computed with array operations
+(min/max and the shoelace sum per polygon via reduceat), so exporters only
+format the results.
+
+Boxes are taken as stored, (x_min, y_min, x_max, y_max), so a box with its
+corners swapped has a non-positive size and is reported as not valid.
+"""
+
+import numpy as np
+
+SUPPORTED_TYPES = ("bbox", "polygon")
+
+
+def _flatten(ann):
+    """Flat [x1, y1, x2, y2, ...] coordinates of an annotation. Raises ValueError if malformed."""
+    label = ann.get("label")
+    points = ann.get("points")
+
+    if ann.get("type") == "bbox":
+        if not isinstance(points, (list, tuple)) or len(points) != 4:
+            raise ValueError(f"Malformed bbox for '{label}'")
+        return list(points)
+
+    if not points or len(points) < 3:
+        raise ValueError(f"Polygon for '{label}' has fewer than 3 points")
+    # Points are stored either as [[x1, y1], [x2, y2], ...] or flat
+    if isinstance(points[0], (list, tuple)):
+        if any(not isinstance(p, (list, tuple)) or len(p) != 2 for p in points):
+            raise ValueError(f"Malformed polygon points for '{label}'")
+        points = [c for point in points for c in point]
+    if len(points) < 6 or len(points) % 2:
+        raise ValueError(f"Malformed polygon points for '{label}'")
+    return list(points)
+
+
+class AnnotationGeometry:
+    """
+    Results of compute_geometry(), one row per well-formed annotation:
+
+        image       index of the image in the input
+        index       index of the annotation in that image's list
+        is_polygon  True for polygons, False for boxes
+        boxes       (x_min, y_min, x_max, y_max)
+        sizes       (width, height)
+        area        polygon area (shoelace) or width * height
+        valid       width and height are both positive
+        box_ints    which box values come from coordinates given as ints
+        size_ints   which sizes are differences of two such values
+        centers     box centre divided by the image size (NaN if unknown)
+        norm_sizes  box size divided by the image size (NaN if unknown)
+
+    segments holds each row's flat coordinate list as given, and problems
+    (image, index, message) for annotations that were skipped as malformed.
+    """
+
+    def __init__(self, image, index, is_polygon, box_ints, boxes, area, image_sizes, segments, problems):
+        self.image = image
+        self.index = index
+        self.is_polygon = is_polygon
+        self.box_ints = box_ints
+        self.size_ints = box_ints[:, 2:] & box_ints[:, :2]
+        self.boxes = boxes
+        self.area = area
+        self.segments = segments
+        self.problems = problems
+
+        self.sizes = boxes[:, 2:] - boxes[:, :2]
+        self.valid = np.all(self.sizes > 0, axis=1)
+        dims = image_sizes[image] if len(image) else np.zeros((0, 2))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.centers = (boxes[:, :2] + boxes[:, 2:]) / 2.0 / dims
+            self.norm_sizes = self.sizes / dims
+
+    def __len__(self):
+        return len(self.index)
+
+
+def compute_geometry(images, types=SUPPORTED_TYPES):
+    """
+    `images` is a sequence of (annotations, image_width, image_height); a
+    missing or zero dimension leaves the normalized values as NaN.
+    Only annotations whose type is in `types` are considered.
+    """
+    image_rows, index_rows, polygon_rows, segments, problems = [], [], [], [], []
+    polygon_coords, polygon_counts, box_values = [], [], []
+    polygon_ints, box_value_ints = [], []
+    image_sizes = np.full((len(images), 2), np.nan)
+
+    for image_id, (annotations, width, height) in enumerate(images):
+        if width and height:
+            image_sizes[image_id] = (width, height)
+        for ann_id, ann in enumerate(annotations):
+            if ann.get("type") not in types:
+                continue
+            try:
+                coords = _flatten(ann)
+            except ValueError as e:
+                problems.append((image_id, ann_id, str(e)))
+                continue
+
+            is_polygon = ann["type"] == "polygon"
+            ints = [isinstance(c, int) for c in coords]
+            if is_polygon:
+                polygon_coords.extend(coords)
+                polygon_counts.append(len(coords) // 2)
+                polygon_ints.extend(ints)
+            else:
+                box_values.extend(coords)
+                box_value_ints.extend(ints)
+            image_rows.append(image_id)
+            index_rows.append(ann_id)
+            polygon_rows.append(is_polygon)
+            segments.append(coords)
+
+    is_polygon = np.array(polygon_rows, dtype=bool)
+    boxes = np.zeros((len(index_rows), 4))
+    box_ints = np.zeros((len(index_rows), 4), dtype=bool)
+    area = np.zeros(len(index_rows))
+
+    if polygon_counts:
+        xy = np.asarray(polygon_coords, dtype=np.float64).reshape(-1, 2)
+        x, y = xy[:, 0], xy[:, 1]
+        counts = np.asarray(polygon_counts)
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        # Each vertex's successor, wrapping around within its own polygon
+        following = np.arange(1, len(xy) + 1)
+        following[starts + counts - 1] = starts
+        cross = x * y[following] - x[following] * y
+
+        extremes = [np.minimum.reduceat(x, starts), np.minimum.reduceat(y, starts),
+                    np.maximum.reduceat(x, starts), np.maximum.reduceat(y, starts)]
+        boxes[is_polygon] = np.stack(extremes, axis=1)
+
+        # A box value counts as an int when the first vertex attaining it was given as one
+        ints = np.asarray(polygon_ints, dtype=bool).reshape(-1, 2)
+        position = np.arange(len(xy))
+        polygon_box_ints = []
+        for axis, extreme in zip((0, 1, 0, 1), extremes):
+            hits = xy[:, axis] == np.repeat(extreme, counts)
+            first = np.minimum.reduceat(np.where(hits, position, len(xy)), starts)
+            polygon_box_ints.append(ints[first, axis])
+        box_ints[is_polygon] = np.stack(polygon_box_ints, axis=1)
+        area[is_polygon] = np.abs(np.add.reduceat(cross, starts)) / 2.0
+
+    if box_values:
+        box_array = np.asarray(box_values, dtype=np.float64).reshape(-1, 4)
+        boxes[~is_polygon] = box_array
+        box_ints[~is_polygon] = np.asarray(box_value_ints, dtype=bool).reshape(-1, 4)
+        area[~is_polygon] = (box_array[:, 2] - box_array[:, 0]) * (box_array[:, 3] - box_array[:, 1])
+
+    return AnnotationGeometry(np.array(image_rows, dtype=np.intp), np.array(index_rows, dtype=np.intp),
+                              is_polygon, box_ints, boxes, area, image_sizes, segments, problems)
+
+
+def image_geometry(annotations, image_width=None, image_height=None, types=SUPPORTED_TYPES):
+    """compute_geometry() for the annotations of a single image."""
+    return compute_geometry([(annotations, image_width, image_height)], types)
@@ -0,0 +1,215 @@
+# C:\LabelAI\backend\grabcut_refine.py
+
+"""
+Batch refinement of bounding boxes into polygons with GrabCut.
+
+Each bbox annotation is used as the GrabCut rectangle; the resulting
+foreground mask is traced and simplified into a polygon annotation that
+replaces the box. Images are processed in a process pool.
+
+The job works directly on a project's annotation files, so it can run
+without the UI:
+
+    python -m backend.grabcut_refine LabelAI_Projects/<project> --workers 8
+
+Originals are copied to annotations_original/ before a file is first
+modified, and finished images are recorded in grabcut_progress.json, so an
+interrupted run picks up where it stopped.
+"""
+
+import os
+import sys
+import json
+import shutil
+import argparse
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import cv2
+import numpy as np
+
+from .mask_polygons import mask_to_polygons
+
+PROGRESS_FILENAME = "grabcut_progress.json"
+BACKUP_DIRNAME = "annotations_original"
+# Longest wait for a result before progress_callback runs again (keeps a UI responsive)
+POLL_INTERVAL = 0.1
+
+
+def grabcut_box(image, box, iterations=5, epsilon=1.5):
+    """
+    Runs GrabCut inside an absolute [x_min, y_min, x_max, y_max] box.
+    Returns the foreground outline as [[x, y], ...], or None if GrabCut found nothing.
+    """
+    height, width = image.shape[:2]
+    x_min, y_min = max(0, int(box[0])), max(0, int(box[1]))
+    x_max, y_max = min(width, int(box[2])), min(height, int(box[3]))
+    if x_max - x_min < 2 or y_max - y_min < 2:
+        return None
+
+    # Work on a padded crop around the box instead of the whole image
+    pad = max(8, (x_max - x_min + y_max - y_min) // 10)
+    cx0, cy0 = max(0, x_min - pad), max(0, y_min - pad)
+    cx1, cy1 = min(width, x_max + pad), min(height, y_max + pad)
+    crop = np.ascontiguousarray(image[cy0:cy1, cx0:cx1])
+
+    mask = np.zeros(crop.shape[:2], dtype=np.uint8)
+    bgd_model = np.zeros((1, 65), dtype=np.float64)
+    fgd_model = np.zeros((1, 65), dtype=np.float64)
+    rect = (x_min - cx0, y_min - cy0, x_max - x_min, y_max - y_min)
+    cv2.grabCut(crop, mask, rect, bgd_model, fgd_model, iterations, cv2.GC_INIT_WITH_RECT)
+
+    foreground = ((mask == cv2.GC_FGD) | (mask == cv2.GC_PR_FGD)).view(np.uint8)
+    polygons = mask_to_polygons(foreground, tolerance=epsilon)
+    if not polygons:
+        return None
+    return [[x + cx0, y + cy0] for x, y in polygons[0]]
+
+
+def refine_annotation_file(annotation_path, iterations=5, epsilon=1.5):
+    """
+    Worker: refines every bbox in one annotation file.
+    Returns (annotation data with boxes replaced, number of boxes refined).
+    The file itself is not written here; the parent process does that.
+    """
+    with open(annotation_path, 'r') as f:
+        data = json.load(f)
+
+    annotations = data.get("annotations", [])
+    is_box = [ann.get("type") == "bbox" and len(ann.get("points", [])) == 4 for ann in annotations]
+    if not any(is_box):
+        return data, 0
+
+    # Box points are in the stored, unrotated pixel frame; don't apply EXIF orientation
+    image = cv2.imread(data.get("image_path", ""), cv2.IMREAD_COLOR | cv2.IMREAD_IGNORE_ORIENTATION)
+    if image is None:
+        raise IOError(f"Could not read image {data.get('image_path')}")
+
+    refined = 0
+    new_annotations = []
+    for ann, box in zip(annotations, is_box):
+        if box:
+            polygon = grabcut_box(image, ann["points"], iterations, epsilon)
+            if polygon is not None:
+                new_ann = {k: v for k, v in ann.items() if k != "points"}
+                new_ann["type"] = "polygon"
+                new_ann["points"] = polygon
+                new_ann["source"] = "grabcut"
+                new_annotations.append(new_ann)
+                refined += 1
+                continue
+        new_annotations.append(ann)
+
+    data["annotations"] = new_annotations
+    return data, refined
+
+
+def _load_progress(progress_path):
+    if not os.path.exists(progress_path):
+        return {}
+    try:
+        with open(progress_path, 'r') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"Could not read {progress_path}, starting over: {e}")
+        return {}
+
+
+def _write_json_atomic(path, data, indent=None):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=indent)
+    os.replace(tmp_path, path)
+
+
+def refine_project(project_path, workers=None, iterations=5, epsilon=1.5, progress_callback=None):
+    """
+    Refines all bbox annotations in a project into polygons.
+
+    progress_callback(done, total) is called after each image and at least
+    every POLL_INTERVAL seconds while images are in flight; returning False
+    from it stops the job after the images already in flight.
+    Returns a summary dict with the number of images and boxes processed.
+    """
+    annotation_dir = os.path.join(project_path, "annotations")
+    backup_dir = os.path.join(project_path, BACKUP_DIRNAME)
+    progress_path = os.path.join(project_path, PROGRESS_FILENAME)
+
+    progress = _load_progress(progress_path)
+    pending = []
+    for filename in sorted(os.listdir(annotation_dir)):
+        if not filename.endswith(".json"):
+            continue
+        path = os.path.join(annotation_dir, filename)
+        # Skip files that haven't changed since they were refined
+        if progress.get(filename) == os.path.getmtime(path):
+            continue
+        pending.append(filename)
+
+    summary = {"images": 0, "boxes": 0, "errors": [], "cancelled": False}
+    total = len(pending)
+    if progress_callback is not None:
+        progress_callback(0, total)
+    if not pending:
+        return summary
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(refine_annotation_file, os.path.join(annotation_dir, filename), iterations, epsilon): filename
+            for filename in pending
+        }
+        running, done = set(futures), 0
+        while running:
+            finished, running = wait(running, timeout=POLL_INTERVAL, return_when=FIRST_COMPLETED)
+            for future in finished:
+                done += 1
+                filename = futures[future]
+                path = os.path.join(annotation_dir, filename)
+                try:
+                    data, refined = future.result()
+                except Exception as e:
+                    summary["errors"].append(f"{filename}: {e}")
+                    refined = None
+
+                if refined:
+                    os.makedirs(backup_dir, exist_ok=True)
+                    backup_path = os.path.join(backup_dir, filename)
+                    if not os.path.exists(backup_path):
+                        shutil.copy2(path, backup_path)
+                    _write_json_atomic(path, data, indent=4)
+                    summary["boxes"] += refined
+                if refined is not None:
+                    progress[filename] = os.path.getmtime(path)
+                    _write_json_atomic(progress_path, progress)
+                    summary["images"] += 1
+
+            if (progress_callback is not None and progress_callback(done, total) is False
+                    and not summary["cancelled"]):
+                # Drop queued images; those already running finish and are saved
+                summary["cancelled"] = True
+                for pending_future in running:
+                    pending_future.cancel()
+                running = {future for future in running if not future.cancelled()}
+
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Refine bbox annotations into polygons with GrabCut.")
+    parser.add_argument("project_path", help="Path to a LabelAI project directory")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--iterations", type=int, default=5, help="GrabCut iterations per box")
+    parser.add_argument("--epsilon", type=float, default=1.5, help="Polygon simplification tolerance in pixels")
+    args = parser.parse_args(argv)
+
+    def report(done, total):
+        print(f"\rRefined {done}/{total} images", end="", flush=True)
+
+    summary = refine_project(args.project_path, args.workers, args.iterations, args.epsilon, report)
+    print(f"\nDone: {summary['boxes']} boxes refined in {summary['images']} images.")
+    for error in summary["errors"]:
+        print(f"- {error}")
+    return 1 if summary["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
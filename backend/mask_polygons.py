@@ -0,0 +1,143 @@
+# C:\LabelAI\backend\mask_polygons.py
+
+"""
+Mask to polygon conversion.
+
+Binary masks (model outputs, brush masks, GrabCut results) are traced with
+OpenCV, simplified with Douglas-Peucker and returned as the single-ring
+polygons that the viewer, ProjectManager and the exporters understand.
+
+Holes are kept by bridging each one into its outer ring with a zero-width
+cut, so an even-odd fill of the polygon reproduces the hole. Whole batches
+of masks are converted on a thread pool; OpenCV releases the GIL, so the
+work runs in parallel without copying masks between processes.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+DEFAULT_TOLERANCE = 1.0   # Douglas-Peucker tolerance in pixels
+DEFAULT_MIN_AREA = 10.0   # smaller regions and holes are dropped, in pixels
+_MAX_SIMPLIFY_ROUNDS = 20
+
+
+def _bridge_holes(exterior, holes):
+    """Splices each hole into the exterior ring at the closest pair of vertices."""
+    ring = exterior
+    for hole in holes:
+        dist = ((ring[:, None, :] - hole[None, :, :]) ** 2).sum(axis=2)
+        i, j = np.unravel_index(np.argmin(dist), dist.shape)
+        hole = np.roll(hole, -j, axis=0)
+        ring = np.concatenate((ring[:i + 1], hole, hole[:1], ring[i:]))
+    return ring
+
+
+def _simplify_region(exterior, holes, tolerance, max_vertices, min_area):
+    """
+    Simplifies an outer contour and its holes, raising the tolerance until the
+    bridged polygon fits in max_vertices. Returns an (N, 2) array or None.
+    """
+    epsilon = tolerance
+    for _ in range(_MAX_SIMPLIFY_ROUNDS):
+        outer = cv2.approxPolyDP(exterior, epsilon, True).reshape(-1, 2)
+        if len(outer) < 3:
+            return None
+        kept_holes = []
+        for hole in holes:
+            simplified = cv2.approxPolyDP(hole, epsilon, True).reshape(-1, 2)
+            if len(simplified) >= 3 and cv2.contourArea(simplified) >= min_area:
+                kept_holes.append(simplified)
+        # Every bridged hole adds its own vertices plus the two ends of the cut
+        vertex_count = len(outer) + sum(len(h) + 2 for h in kept_holes)
+        if not max_vertices or vertex_count <= max_vertices:
+            break
+        # Holes are the first thing to give up when the budget is tight
+        if kept_holes and len(outer) <= max_vertices:
+            holes = sorted(holes, key=cv2.contourArea, reverse=True)[:len(kept_holes) - 1]
+            continue
+        epsilon *= 1.5
+    return _bridge_holes(outer, kept_holes) if kept_holes else outer
+
+
+def mask_to_polygons(mask, tolerance=DEFAULT_TOLERANCE, min_area=DEFAULT_MIN_AREA,
+                     max_vertices=None, keep_holes=True):
+    """
+    Converts a binary mask (any non-zero pixel is foreground) to polygons.
+
+    Args:
+        mask (np.ndarray): 2D mask.
+        tolerance (float): Maximum distance, in pixels, between the traced
+            outline and the simplified polygon.
+        min_area (float): Regions and holes smaller than this are dropped.
+        max_vertices (int): Optional vertex budget per polygon; the tolerance
+            is raised as needed to meet it.
+        keep_holes (bool): Bridge holes into their outer ring instead of
+            filling them.
+
+    Returns:
+        list: Polygons as [[x, y], ...] in absolute pixel coordinates,
+        largest first.
+    """
+    mask = np.ascontiguousarray(mask)
+    if mask.dtype != np.uint8:
+        mask = (mask != 0).astype(np.uint8)
+    mode = cv2.RETR_CCOMP if keep_holes else cv2.RETR_EXTERNAL
+    contours, hierarchy = cv2.findContours(mask, mode, cv2.CHAIN_APPROX_SIMPLE)
+    if not contours:
+        return []
+
+    # In RETR_CCOMP's two-level hierarchy, holes point at their outer contour
+    parents = hierarchy[0][:, 3]
+    holes_of = {}
+    for index in np.flatnonzero(parents >= 0):
+        holes_of.setdefault(parents[index], []).append(contours[index])
+
+    results = []
+    for index in np.flatnonzero(parents < 0):
+        exterior = contours[index]
+        area = cv2.contourArea(exterior)
+        if area < min_area:
+            continue
+        polygon = _simplify_region(exterior, holes_of.get(index, []), tolerance, max_vertices, min_area)
+        if polygon is not None:
+            results.append((area, polygon.tolist()))
+
+    results.sort(key=lambda item: item[0], reverse=True)
+    return [polygon for _, polygon in results]
+
+
+def masks_to_polygons(masks, workers=None, **options):
+    """
+    Converts a batch of binary masks in parallel.
+    Returns one list of polygons per mask, in input order.
+    """
+    masks = list(masks)
+    if len(masks) <= 1:
+        return [mask_to_polygons(mask, **options) for mask in masks]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(lambda mask: mask_to_polygons(mask, **options), masks))
+
+
+def label_array_to_polygons(label_array, class_names, workers=None, **options):
+    """
+    Converts a label array (0 = background, i = class_names[i - 1]) to polygons.
+    Returns a list of (label, polygon) tuples with absolute pixel coordinates.
+    """
+    present = np.flatnonzero(np.bincount(label_array.ravel(), minlength=len(class_names) + 1))
+    values = [v for v in present if 0 < v <= len(class_names)]
+    polygon_lists = masks_to_polygons(((label_array == v).view(np.uint8) for v in values), workers, **options)
+    return [(class_names[v - 1], polygon) for v, polygons in zip(values, polygon_lists) for polygon in polygons]
+
+
+def polygons_to_annotations(label_polygons, image_width, image_height):
+    """
+    Builds viewer annotations (relative "coords") from (label, polygon) tuples
+    in absolute pixel coordinates.
+    """
+    annotations = []
+    for label, polygon in label_polygons:
+        points = np.asarray(polygon, dtype=np.float64) / (image_width, image_height)
+        annotations.append({"label": label, "type": "polygon", "coords": points.tolist(), "pinned": True})
+    return annotations
@@ -0,0 +1,83 @@
+# C:\LabelAI\backend\mask_utils.py
+
+"""
+Helpers for raster mask annotations.
+
+Masks are stored as COCO-style uncompressed run-length encodings:
+{"size": [height, width], "counts": [...]}, where counts alternate between
+runs of 0s and 1s over the column-major (Fortran order) flattened mask,
+starting with a (possibly empty) run of 0s.
+"""
+
+import numpy as np
+
+
+def rle_encode(binary_mask):
+    """Encodes a 2D boolean mask as an uncompressed COCO RLE dict."""
+    mask = np.asarray(binary_mask, dtype=bool)
+    height, width = mask.shape
+    flat = mask.ravel(order="F")
+    if flat.size == 0:
+        return {"size": [height, width], "counts": []}
+
+    # Run boundaries are the positions where the value flips
+    changes = np.flatnonzero(flat[1:] != flat[:-1]) + 1
+    boundaries = np.concatenate(([0], changes, [flat.size]))
+    counts = np.diff(boundaries)
+    if flat[0]:
+        counts = np.concatenate(([0], counts))
+    return {"size": [height, width], "counts": counts.tolist()}
+
+
+def rle_decode(rle):
+    """Decodes an uncompressed COCO RLE dict into a 2D boolean mask."""
+    height, width = rle["size"]
+    counts = np.asarray(rle["counts"], dtype=np.int64)
+    values = np.zeros(len(counts), dtype=bool)
+    values[1::2] = True
+    flat = np.repeat(values, counts)
+    if flat.size != height * width:
+        raise ValueError(f"RLE covers {flat.size} pixels, expected {height * width}.")
+    return flat.reshape((height, width), order="F")
+
+
+def rle_area(rle):
+    """Number of foreground pixels, computed without decoding."""
+    return int(sum(rle["counts"][1::2]))
+
+
+def encode_label_array(label_array, class_names):
+    """
+    Splits a label array (0 = background, i = class_names[i - 1]) into one RLE
+    per class that is actually present.
+
+    Returns a list of {"label": name, "rle": {...}} dicts.
+    """
+    present = np.flatnonzero(np.bincount(label_array.ravel(), minlength=len(class_names) + 1))
+    masks = []
+    for value in present:
+        if value == 0 or value > len(class_names):
+            continue
+        masks.append({"label": class_names[value - 1], "rle": rle_encode(label_array == value)})
+    return masks
+
+
+def decode_label_array(masks, height, width):
+    """
+    Rebuilds a label array from per-class RLE masks.
+
+    Returns (label_array, class_names). Later masks win where masks overlap.
+    """
+    label_array = np.zeros((height, width), dtype=np.uint8)
+    class_names = []
+    for entry in masks:
+        label = entry.get("label")
+        rle = entry.get("rle")
+        if not label or not rle or list(rle.get("size", [])) != [height, width]:
+            continue
+        if label not in class_names:
+            if len(class_names) >= 255:
+                continue
+            class_names.append(label)
+        label_array[rle_decode(rle)] = class_names.index(label) + 1
+    return label_array, class_names
@@ -91,7 +91,7 @@ class DeepLabv3Adapter:
     def infer(self, image_path):
         print(f"Running DeepLabv3+ on {image_path}")
         dummy_mask = {
-            "type": "mask",
+            "type": "polygon",
             "label": "DeepLabv3-Object",
             "coords": [[0.1, 0.1], [0.1, 0.5], [0.5, 0.5], [0.5, 0.1]],
         }
@@ -102,7 +102,7 @@ class UNetAdapter:
     def infer(self, image_path):
         print(f"Running U-Net on {image_path}")
         dummy_mask = {
-            "type": "mask",
+            "type": "polygon",
             "label": "UNet-Object",
             "coords": [[0.1, 0.1], [0.1, 0.5], [0.5, 0.5], [0.5, 0.1]],
         }
@@ -113,7 +113,7 @@ class SegFormerAdapter:
     def infer(self, image_path):
         print(f"Running SegFormer on {image_path}")
         dummy_mask = {
-            "type": "mask",
+            "type": "polygon",
             "label": "SegFormer-Object",
             "coords": [[0.1, 0.1], [0.1, 0.5], [0.5, 0.5], [0.5, 0.1]],
         }
@@ -34,9 +34,9 @@ MODEL_DATABASE = {
         "description": "Precise Shape & Differentiation",
         "models": [
             {"name": "Mask R-CNN", "adapter": "MaskRCNNAdapter", "tool": "polygon", "exporter": "export_to_coco"},
-            {"name": "DeepLabv3+", "adapter": "DeepLabv3Adapter", "tool": "polygon", "exporter": "export_to_mask"},
-            {"name": "U-Net", "adapter": "UNetAdapter", "tool": "polygon", "exporter": "export_to_mask"},
-            {"name": "SegFormer", "adapter": "SegFormerAdapter", "tool": "polygon", "exporter": "export_to_mask"},
+            {"name": "DeepLabv3+", "adapter": "DeepLabv3Adapter", "tool": "mask", "exporter": "export_to_mask"},
+            {"name": "U-Net", "adapter": "UNetAdapter", "tool": "mask", "exporter": "export_to_mask"},
+            {"name": "SegFormer", "adapter": "SegFormerAdapter", "tool": "mask", "exporter": "export_to_mask"},
             {"name": "Segment Anything (SAM)", "adapter": "SAMAdapter", "tool": "prompt", "exporter": "export_to_coco"},
             {"name": "Detectron2", "adapter": "Detectron2Adapter", "tool": "polygon", "exporter": "export_to_coco"},
             {"name": "MMDetection", "adapter": "MMDetectionAdapter", "tool": "polygon", "exporter": "export_to_coco"},
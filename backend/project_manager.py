@@ -4,11 +4,16 @@ import os
 import json
 import shutil
 from datetime import datetime
+
+from .mask_utils import encode_label_array, decode_label_array
+from .annotation_index import AnnotationIndex, build_record
+
 class ProjectManager:
     def __init__(self, base_projects_dir="LabelAI_Projects"):
         self.base_dir = os.path.abspath(base_projects_dir)
         self.current_project_path = None
         self.current_project_name = None
+        self.annotation_index = None
         
         if not os.path.exists(self.base_dir):
             os.makedirs(self.base_dir)
@@ -59,10 +64,16 @@ class ProjectManager:
         print(f"Opening existing project '{name}'")
         self.current_project_path = project_path
         self.current_project_name = name
+        self.annotation_index = AnnotationIndex(
+            os.path.join(project_path, "annotation_index.json"), self.get_annotation_dir())
+        self.annotation_index.load()
         return project_path
 
     def close_project(self):
         """Closes the current project, resetting the manager's state."""
+        if self.annotation_index is not None:
+            self.annotation_index.flush()
+            self.annotation_index = None
         self.current_project_path = None
         self.current_project_name = None
         print("Project closed.")
@@ -75,6 +86,14 @@ class ProjectManager:
         if not self.is_project_active(): return None
         return os.path.join(self.current_project_path, "annotations")
 
+    def get_mask_dir(self):
+        if not self.is_project_active(): return None
+        return os.path.join(self.current_project_path, "masks")
+
+    def get_thumbnail_dir(self):
+        if not self.is_project_active(): return None
+        return os.path.join(self.current_project_path, ".thumbnails")
+
     # --- NEW METHODS FOR STATE MANAGEMENT ---
     def _get_state_file_path(self):
         """Returns the path to the project's state file."""
@@ -100,6 +119,8 @@ class ProjectManager:
             print(f"Project state saved to {state_file}")
         except Exception as e:
             print(f"Error saving project state: {e}")
+        if self.annotation_index is not None:
+            self.annotation_index.flush()
 
     def load_state(self):
         """Loads and returns the data from project.json."""
@@ -114,6 +135,28 @@ class ProjectManager:
             print(f"Error loading project state: {e}")
             return {}
 
+    def load_review_status(self):
+        """Returns the grid review results as {image_filename: "approved" | "flagged"}."""
+        if not self.is_project_active(): return {}
+        review_path = os.path.join(self.current_project_path, "review.json")
+        if not os.path.exists(review_path):
+            return {}
+        try:
+            with open(review_path, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"Error loading review status: {e}")
+            return {}
+
+    def save_review_status(self, statuses):
+        if not self.is_project_active(): return
+        review_path = os.path.join(self.current_project_path, "review.json")
+        try:
+            with open(review_path, 'w') as f:
+                json.dump(statuses, f)
+        except Exception as e:
+            print(f"Error saving review status: {e}")
+
     def list_projects(self):
         """Returns a list of all project names."""
         return [d for d in os.listdir(self.base_dir) if os.path.isdir(os.path.join(self.base_dir, d))]
@@ -241,6 +284,11 @@ class ProjectManager:
                 json.dump(output_data, f, indent=4)
         except Exception as e:
             print(f"Error saving annotations for {image_filename}: {e}")
+            return
+
+        if self.annotation_index is not None:
+            record = build_record(image_filename, abs_annotations, os.path.getmtime(annotation_path))
+            self.annotation_index.update(os.path.splitext(image_filename)[0], record)
 
     def load_annotations(self, image_filename):
         """Loads annotations from a JSON file, supporting both old and new formats."""
@@ -301,10 +349,88 @@ class ProjectManager:
         # If the format is unknown, return empty list
         return []
 
+    def query_images(self, query_text, image_paths):
+        """
+        Returns the image paths whose annotations match an annotation index
+        query (see backend.annotation_index), in their original order.
+        Raises ValueError for a malformed query.
+        """
+        if self.annotation_index is None: return list(image_paths)
+        paths_by_name = {os.path.basename(path): path for path in image_paths}
+        names = self.annotation_index.query(query_text, list(paths_by_name))
+        return [paths_by_name[name] for name in names]
+
+    def image_label_counts(self, image_paths):
+        """{image path: {label: count}} from the annotation index, without reading annotation files."""
+        records = self.annotation_index.records if self.annotation_index is not None else {}
+        return {path: records.get(os.path.splitext(os.path.basename(path))[0], {}).get("labels", {})
+                for path in image_paths}
+
+    def refresh_annotation_index(self):
+        """Re-indexes annotation files written outside save_annotations (e.g. batch jobs)."""
+        if self.annotation_index is not None:
+            self.annotation_index.refresh()
+
+    def save_masks(self, image_filename, label_array, class_names, image_width, image_height):
+        """
+        Saves a brush mask label array (0 = background, i = class_names[i - 1])
+        as one run-length encoded mask per class, in masks/<image>.json.
+        """
+        if not self.is_project_active(): return
+
+        mask_dir = self.get_mask_dir()
+        mask_path = os.path.join(mask_dir, f"{os.path.splitext(image_filename)[0]}.json")
+        masks = encode_label_array(label_array, class_names)
+
+        try:
+            if not masks:
+                if os.path.exists(mask_path):
+                    os.remove(mask_path)
+                return
+            os.makedirs(mask_dir, exist_ok=True)
+            output_data = {
+                "image_width": image_width,
+                "image_height": image_height,
+                "masks": masks
+            }
+            with open(mask_path, 'w') as f:
+                json.dump(output_data, f)
+        except Exception as e:
+            print(f"Error saving masks for {image_filename}: {e}")
+
+    def load_masks(self, image_filename):
+        """
+        Loads the brush masks for an image.
+        Returns (label_array, class_names), or None if the image has no masks.
+        """
+        if not self.is_project_active(): return None
+
+        mask_path = os.path.join(self.get_mask_dir(), f"{os.path.splitext(image_filename)[0]}.json")
+        if not os.path.exists(mask_path):
+            return None
+
+        try:
+            with open(mask_path, 'r') as f:
+                data = json.load(f)
+            return decode_label_array(data.get("masks", []), data["image_height"], data["image_width"])
+        except Exception as e:
+            print(f"Error loading masks for {image_filename}: {e}")
+            return None
+
     def delete_annotations(self, image_filename):
         """Deletes the annotation file for a given image."""
         if not self.is_project_active(): return
 
+        if self.annotation_index is not None:
+            self.annotation_index.remove(os.path.splitext(image_filename)[0])
+
+        mask_path = os.path.join(self.get_mask_dir(), f"{os.path.splitext(image_filename)[0]}.json")
+        if os.path.exists(mask_path):
+            try:
+                os.remove(mask_path)
+            except OSError as e:
+                print(f"Error deleting mask file {mask_path}: {e}")
+
         annotation_dir = self.get_annotation_dir()
         annotation_filename = f"{image_filename}.json"
         annotation_path = os.path.join(annotation_dir, annotation_filename)
@@ -332,6 +458,8 @@ class ProjectManager:
                 if filename.endswith(".json"):
                     file_path = os.path.join(annotation_dir, filename)
                     os.remove(file_path)
+            if self.annotation_index is not None:
+                self.annotation_index.clear()
             print("All annotations have been cleared for the current project.")
             return True
         except OSError as e:
@@ -0,0 +1,133 @@
+# C:\LabelAI\backend\splits.py
+
+"""
+Deterministic train/val/test splits for exports.
+
+Each image is hashed by its file name (or, with split_by="content", by its
+bytes) to a fraction in [0, 1) and goes to the split whose share of that
+range contains it. The hash of one image does not depend on any other, so
+adding images never moves the existing ones.
+
+With stratification, each image's stratum is its rarest label (by counts
+over the exported images, e.g. from the annotation index). New images are
+taken in hash order and each goes to the split furthest below its target
+share within its stratum. That depends on the images that came before, so
+the assignment is kept in splits.json in the export folder and entries in
+it are never reassigned. Changing the ratios, split_by or stratification
+starts a new assignment.
+"""
+
+import os
+import json
+import hashlib
+
+DEFAULT_SPLITS = (("train", 0.8), ("val", 0.1), ("test", 0.1))
+SPLITS_FILENAME = "splits.json"
+_HASH_DIGITS = 15
+
+
+def hash_fraction(key):
+    """A stable, uniformly distributed fraction in [0, 1) for a string key."""
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+    return int(digest[:_HASH_DIGITS], 16) / 16 ** _HASH_DIGITS
+
+
+def image_key(image_path, split_by="name"):
+    """What an image is hashed by: its file name, or a digest of its content."""
+    if split_by == "name":
+        return os.path.basename(image_path)
+    if split_by == "content":
+        digest = hashlib.sha1()
+        with open(image_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+    raise ValueError(f"Unknown split_by '{split_by}'. Expected 'name' or 'content'.")
+
+
+def split_for_fraction(fraction, splits):
+    """The split whose cumulative share of [0, 1) contains `fraction`."""
+    total = sum(ratio for _, ratio in splits)
+    upper = 0.0
+    for name, ratio in splits:
+        upper += ratio / total
+        if fraction < upper:
+            return name
+    return splits[-1][0]
+
+
+def stratum(labels, label_totals):
+    """The rarest of an image's labels, or "" for an image without labels."""
+    if not labels:
+        return ""
+    return min(labels, key=lambda label: (label_totals.get(label, 0), label))
+
+
+class SplitAssigner:
+    def __init__(self, splits=DEFAULT_SPLITS, split_by="name", stratified=False):
+        if not splits or any(ratio < 0 for _, ratio in splits) or sum(ratio for _, ratio in splits) <= 0:
+            raise ValueError(f"Invalid split ratios: {splits}")
+        self.splits = [(name, float(ratio)) for name, ratio in splits]
+        self.split_by = split_by
+        self.stratified = stratified
+        self.assignments = {}   # image key -> split name
+
+    def _config(self):
+        return {"splits": self.splits, "split_by": self.split_by, "stratified": self.stratified}
+
+    def load(self, directory):
+        """Restores an earlier assignment made with the same configuration."""
+        path = os.path.join(directory, SPLITS_FILENAME)
+        if not os.path.exists(path):
+            return
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"Ignoring unreadable split file {path}: {e}")
+            return
+        if data.get("config") == json.loads(json.dumps(self._config())):
+            self.assignments = data.get("assignments", {})
+
+    def save(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, SPLITS_FILENAME)
+        with open(f"{path}.tmp", "w") as f:
+            json.dump({"config": self._config(), "assignments": self.assignments}, f)
+        os.replace(f"{path}.tmp", path)
+
+    def assign(self, image_paths, image_labels=None):
+        """
+        Returns {image path: split name}. image_labels ({path: {label: count}})
+        is only used for stratification; images already assigned keep their split.
+        """
+        keys = {path: image_key(path, self.split_by) for path in image_paths}
+        new_keys = sorted({key for key in keys.values() if key not in self.assignments}, key=hash_fraction)
+
+        if not self.stratified:
+            for key in new_keys:
+                self.assignments[key] = split_for_fraction(hash_fraction(key), self.splits)
+        else:
+            image_labels = image_labels or {}
+            label_totals = {}
+            for path in image_paths:
+                for label, count in image_labels.get(path, {}).items():
+                    label_totals[label] = label_totals.get(label, 0) + count
+            strata = {keys[path]: stratum(image_labels.get(path, {}), label_totals) for path in image_paths}
+
+            counts = {}
+            for key in set(keys.values()) - set(new_keys):
+                per_split = counts.setdefault(strata[key], {})
+                per_split[self.assignments[key]] = per_split.get(self.assignments[key], 0) + 1
+            total_ratio = sum(ratio for _, ratio in self.splits)
+            for key in new_keys:
+                per_split = counts.setdefault(strata[key], {})
+                size = sum(per_split.values()) + 1
+                # Largest shortfall against the target share; the plain hash split breaks ties
+                hashed = split_for_fraction(hash_fraction(key), self.splits)
+                name = max(self.splits, key=lambda split: (
+                    round(split[1] / total_ratio * size - per_split.get(split[0], 0), 9), split[0] == hashed))[0]
+                self.assignments[key] = name
+                per_split[name] = per_split.get(name, 0) + 1
+
+        return {path: self.assignments[key] for path, key in keys.items()}
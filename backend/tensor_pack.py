@@ -0,0 +1,163 @@
+# C:\LabelAI\backend\tensor_pack.py
+
+"""
+Image tensor packs: every image of an export decoded once, optionally
+resized, and stored as RGB uint8 in one flat array file, so trainers read
+pixels straight from a memory map instead of decoding JPEGs each epoch.
+
+A pack directory holds
+
+    images.npy   flat uint8 array with all images back to back (H x W x 3 each)
+    index.npz    file_name, source_path, offset, shape (H, W, 3) and
+                 scale (sx, sy, pack pixels per source pixel) per image
+    labels       the export's labels as columns (see columnar), in pack pixels
+
+Image i is images[offset[i]:offset[i] + prod(shape[i])].reshape(shape[i]);
+TensorPack does this lazily and returns zero-copy views.
+
+Decoding runs in a process pool. Image sizes are read from the file headers
+first, so every image's offset is known up front and each worker writes its
+result directly into its own slice of the memory-mapped file.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+IMAGES_FILENAME = "images.npy"
+INDEX_FILENAME = "index.npz"
+
+
+def target_size(width, height, image_size):
+    """
+    Packed (width, height) of an image: unchanged for image_size None, the
+    longer side scaled down to at most image_size for an int, or exactly
+    (width, height) for a pair.
+    """
+    if image_size is None:
+        return width, height
+    if isinstance(image_size, (tuple, list)):
+        return int(image_size[0]), int(image_size[1])
+    scale = min(1.0, image_size / max(width, height))
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def _read_size(args):
+    path, image_size = args
+    try:
+        with Image.open(path) as img:
+            return target_size(img.width, img.height, image_size) + img.size
+    except Exception:
+        return None
+
+
+def _decode_into(args):
+    """Pool worker: decodes one image into its slice of the pack. Returns an error message or None."""
+    images_path, offset, path, width, height = args
+    try:
+        with Image.open(path) as img:
+            # JPEGs are decoded at a reduced scale when that still covers the target
+            img.draft("RGB", (width, height))
+            img = img.convert("RGB")
+            if img.size != (width, height):
+                img = img.resize((width, height), Image.BILINEAR)
+            pixels = np.asarray(img, dtype=np.uint8)
+        pack = np.load(images_path, mmap_mode="r+")
+        pack[offset:offset + pixels.size] = pixels.reshape(-1)
+        pack.flush()
+        return None
+    except Exception as e:
+        return f"Could not pack image {path}: {e}"
+
+
+def write_tensor_pack(image_paths, directory, image_size=None, workers=None):
+    """
+    Decodes `image_paths` into a pack in `directory`. Returns
+    (index, warnings): index holds the index.npz arrays and covers the
+    images that could be read and decoded, in the order given.
+    """
+    warnings = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        sizes = list(pool.map(_read_size, [(path, image_size) for path in image_paths], chunksize=32))
+
+        packed, shapes, scales = [], [], []
+        for path, size in zip(image_paths, sizes):
+            if size is None:
+                warnings.append(f"Could not read image {path}. Skipping.")
+                continue
+            width, height, source_width, source_height = size
+            packed.append(path)
+            shapes.append((height, width, 3))
+            scales.append((width / source_width, height / source_height))
+
+        shapes = np.array(shapes, dtype=np.int64).reshape(-1, 3)
+        lengths = shapes.prod(axis=1)
+        offsets = np.cumsum(lengths) - lengths
+
+        images_path = os.path.join(directory, IMAGES_FILENAME)
+        tmp_path = os.path.join(directory, f"tmp_{IMAGES_FILENAME}")
+        if packed:
+            pack = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.uint8, shape=(int(lengths.sum()),))
+            del pack  # Workers open the file themselves
+        else:
+            np.save(tmp_path, np.zeros(0, dtype=np.uint8))
+
+        jobs = [(tmp_path, int(offset), path, int(shape[1]), int(shape[0]))
+                for offset, path, shape in zip(offsets, packed, shapes)]
+        errors = list(pool.map(_decode_into, jobs, chunksize=8))
+    os.replace(tmp_path, images_path)
+
+    # Images that failed to decode leave an unused, zeroed slice in the pack but no index entry
+    warnings.extend(error for error in errors if error)
+    decoded = np.array([error is None for error in errors], dtype=bool)
+    packed = [path for path, ok in zip(packed, decoded) if ok]
+    shapes, offsets = shapes[decoded], offsets[decoded]
+    scales = [scale for scale, ok in zip(scales, decoded) if ok]
+
+    index = {
+        "file_name": np.array([os.path.basename(path) for path in packed], dtype=str),
+        "source_path": np.array(packed, dtype=str),
+        "offset": offsets,
+        "shape": shapes.astype(np.int32),
+        "scale": np.array(scales, dtype=np.float32).reshape(-1, 2)
+    }
+    index_path = os.path.join(directory, INDEX_FILENAME)
+    with open(f"{index_path}.tmp", "wb") as f:
+        np.savez(f, **index)
+    os.replace(f"{index_path}.tmp", index_path)
+    return index, warnings
+
+
+def scale_columns(columns, scale):
+    """Scales label columns (see columnar) from source to pack pixels; `scale` is (sx, sy) per image."""
+    scale = np.asarray(scale, dtype=np.float32).reshape(-1, 2)
+    object_scale = scale[columns["object_image_id"]]
+    columns["bbox"] = columns["bbox"] * np.tile(object_scale, 2)
+    columns["area"] = columns["area"] * object_scale.prod(axis=1)
+    vertex_image = np.repeat(columns["object_image_id"], np.diff(columns["polygon_offsets"]))
+    columns["polygon_vertices"] = columns["polygon_vertices"] * scale[vertex_image]
+    keypoints = columns["keypoints"].copy()
+    keypoints[..., :2] *= scale[columns["keypoint_image_id"]][:, None, :]
+    columns["keypoints"] = keypoints
+    return columns
+
+
+class TensorPack:
+    """Read access to a pack: len(pack), pack[i] -> H x W x 3 uint8 view."""
+
+    def __init__(self, directory):
+        self.images = np.load(os.path.join(directory, IMAGES_FILENAME), mmap_mode="r")
+        with np.load(os.path.join(directory, INDEX_FILENAME)) as index:
+            self.index = {name: index[name] for name in index.files}
+        self.offsets = self.index["offset"]
+        self.shapes = self.index["shape"]
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __getitem__(self, i):
+        shape = tuple(self.shapes[i])
+        start = self.offsets[i]
+        return self.images[start:start + shape[0] * shape[1] * shape[2]].reshape(shape)
@@ -0,0 +1,81 @@
+# C:\LabelAI\backend\thumbnail_cache.py
+
+"""
+Persistent, per-project thumbnail cache.
+
+Thumbnails are small JPEGs stored under <project>/.thumbnails, keyed by the
+image's absolute path, modification time and file size, so an image is only
+decoded again after it changes. JPEGs are decoded with PIL's draft mode,
+which lets libjpeg scale by 1/2, 1/4 or 1/8 while decoding instead of
+producing the full-resolution image first.
+
+Everything here is plain file and PIL work with no Qt objects, so it is
+safe to call from worker threads or processes.
+"""
+
+import os
+import hashlib
+import threading
+
+from PIL import Image
+
+
+class ThumbnailCache:
+    THUMBNAIL_SIZE = (256, 256)
+    JPEG_QUALITY = 85
+
+    def __init__(self, cache_dir, size=THUMBNAIL_SIZE):
+        self.cache_dir = cache_dir
+        self.size = size
+
+    def _cache_path(self, image_path):
+        try:
+            stat = os.stat(image_path)
+        except OSError:
+            return None
+        key = f"{os.path.abspath(image_path)}|{stat.st_mtime_ns}|{stat.st_size}|{self.size[0]}x{self.size[1]}"
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        # Two-level layout keeps directories small on very large projects
+        return os.path.join(self.cache_dir, digest[:2], f"{digest}.jpg")
+
+    def cached_path(self, image_path):
+        """Path of an up-to-date cached thumbnail, or None if it needs generating."""
+        path = self._cache_path(image_path)
+        return path if path and os.path.exists(path) else None
+
+    def get(self, image_path):
+        """
+        Returns the path of the thumbnail for `image_path`, generating it if
+        needed, or None if the image can't be read.
+        """
+        path = self._cache_path(image_path)
+        if path is None:
+            return None
+        if os.path.exists(path):
+            return path
+        try:
+            self._generate(image_path, path)
+        except Exception as e:
+            print(f"Could not create thumbnail for {image_path}: {e}")
+            return None
+        return path
+
+    def _generate(self, image_path, thumbnail_path):
+        with Image.open(image_path) as img:
+            # Only has an effect for JPEG: decode at the smallest scale >= size
+            img.draft("RGB", self.size)
+            img.thumbnail(self.size)
+            if img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info):
+                img = img.convert("RGBA")
+                background = Image.new("RGB", img.size, (255, 255, 255))
+                background.paste(img, mask=img.getchannel("A"))
+                img = background
+            elif img.mode != "RGB":
+                img = img.convert("RGB")
+
+            os.makedirs(os.path.dirname(thumbnail_path), exist_ok=True)
+            # Write under a temporary name so readers never see a partial file; the
+            # sidebar and review grid pools may generate the same thumbnail at once
+            tmp_path = f"{thumbnail_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            img.save(tmp_path, "JPEG", quality=self.JPEG_QUALITY)
+            os.replace(tmp_path, thumbnail_path)
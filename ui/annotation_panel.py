@@ -1,54 +1,282 @@
 # C:\LabelAI\ui\annotation_panel.py
 
-from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QListWidget, QListWidgetItem, QLabel, 
-                             QLineEdit, QPushButton, QHBoxLayout, QMessageBox, QToolButton, QStyle,
-                             QGroupBox, QCheckBox, QDoubleSpinBox, QFormLayout, QScrollArea)
-from PyQt5.QtCore import pyqtSignal, QSize, Qt
-from PyQt5.QtGui import QIcon
-
-class AnnotationListItem(QWidget):
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QListWidget, QLabel, 
+                             QLineEdit, QPushButton, QHBoxLayout, QMessageBox, QStyle,
+                             QGroupBox, QCheckBox, QDoubleSpinBox, QFormLayout,
+                             QTreeView, QAbstractItemView, QStyledItemDelegate, QStyleOptionViewItem,
+                             QApplication, QToolTip)
+from PyQt5.QtCore import (pyqtSignal, QSize, Qt, QAbstractItemModel, QModelIndex, QRect, QEvent,
+                          QItemSelection, QItemSelectionModel)
+
+# Custom data roles exposed by AnnotationListModel
+PinnedRole = Qt.UserRole + 1
+AnnotationIndexRole = Qt.UserRole + 2
+
+
+class _AnnotationRow:
+    """Book-keeping for one top-level row; keypoint children are fetched lazily."""
+    __slots__ = ("row", "ann", "signature", "fetched")
+
+    def __init__(self, row, ann):
+        self.row = row
+        self.ann = ann
+        self.signature = _row_signature(ann)
+        self.fetched = 0
+
+
+def _row_signature(ann):
+    """What a row displays, used to detect which rows actually changed."""
+    if not isinstance(ann, dict):
+        return None
+    points = ann.get("points", []) if ann.get("type") == "keypoint" else ()
+    return (ann.get("label", "N/A"), ann.get("type", "N/A"), ann.get("pinned", False),
+            tuple(tuple(p) for p in points))
+
+
+class AnnotationListModel(QAbstractItemModel):
+    """
+    Tree model over an image's annotation list.
+
+    Top-level rows map 1:1 to annotation indices. Keypoint annotations get one
+    child row per point, created only when the row is expanded. Updates are
+    diffed against the previous state so only inserted, removed or changed rows
+    are signalled to the view.
+    """
     pinStateChanged = pyqtSignal(int, bool)  # ann_index, is_pinned
 
-    def __init__(self, text, ann_index, is_pinned):
-        super().__init__()
-        self.ann_index = ann_index
-        self._is_pinned = is_pinned
-
-        layout = QHBoxLayout(self)
-        layout.setContentsMargins(5, 3, 5, 3)
-        layout.setSpacing(5)
-
-        self.label = QLabel(text)
-        layout.addWidget(self.label, 1)
-
-        self.pin_button = QToolButton()
-        self.pin_button.setCheckable(True)
-        self.pin_button.setFixedSize(24, 24)
-        self.pin_button.setIconSize(QSize(18, 18))
-        self.pin_button.setAutoRaise(True)
-        self.pin_button.clicked.connect(self.pin_toggled)
-        
-        layout.addWidget(self.pin_button)
-        self.update_pin_state(self._is_pinned)
-
-    def pin_toggled(self):
-        self._is_pinned = self.pin_button.isChecked()
-        self.update_pin_state(self._is_pinned)
-        self.pinStateChanged.emit(self.ann_index, self._is_pinned)
-
-    def update_pin_state(self, is_pinned):
-        self._is_pinned = is_pinned
-        self.pin_button.setChecked(is_pinned)
-        style = self.style()
-        icon = style.standardIcon(QStyle.SP_DialogApplyButton if is_pinned else QStyle.SP_DialogCloseButton)
-        self.pin_button.setIcon(icon)
-        self.pin_button.setToolTip("Pinned (cannot be moved)" if is_pinned else "Unpinned (can be moved)")
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows = []
+
+    # --- Structure ---
+    def index(self, row, column, parent=QModelIndex()):
+        if column != 0 or row < 0:
+            return QModelIndex()
+        if not parent.isValid():
+            if row < len(self._rows):
+                return self.createIndex(row, 0, None)
+            return QModelIndex()
+        if parent.internalPointer() is None:
+            node = self._rows[parent.row()]
+            if row < node.fetched:
+                return self.createIndex(row, 0, node)
+        return QModelIndex()
+
+    def parent(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        node = index.internalPointer()
+        if node is None:
+            return QModelIndex()
+        return self.createIndex(node.row, 0, None)
+
+    def rowCount(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return len(self._rows)
+        if parent.internalPointer() is None:
+            return self._rows[parent.row()].fetched
+        return 0
+
+    def columnCount(self, parent=QModelIndex()):
+        return 1
+
+    def hasChildren(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return bool(self._rows)
+        if parent.internalPointer() is None:
+            return bool(self._keypoints(self._rows[parent.row()]))
+        return False
+
+    def canFetchMore(self, parent):
+        if not parent.isValid() or parent.internalPointer() is not None:
+            return False
+        node = self._rows[parent.row()]
+        return node.fetched < len(self._keypoints(node))
+
+    def fetchMore(self, parent):
+        node = self._rows[parent.row()]
+        total = len(self._keypoints(node))
+        if node.fetched >= total:
+            return
+        self.beginInsertRows(parent, node.fetched, total - 1)
+        node.fetched = total
+        self.endInsertRows()
+
+    @staticmethod
+    def _keypoints(node):
+        if isinstance(node.ann, dict) and node.ann.get("type") == "keypoint":
+            return node.ann.get("points", [])
+        return []
+
+    # --- Data ---
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        if index.internalPointer() is None:
+            return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+        return Qt.ItemIsEnabled
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        node = index.internalPointer()
+        if node is not None:
+            if role == Qt.DisplayRole:
+                point = self._keypoints(node)[index.row()]
+                if len(point) == 3:
+                    x, y, conf = point
+                    return f"  - KP {index.row()}: ({x:.2f}, {y:.2f}), C: {conf:.2f}"
+                x, y = point[:2]
+                return f"  - KP {index.row()}: ({x:.2f}, {y:.2f})"
+            return None
+
+        node = self._rows[index.row()]
+        if role == AnnotationIndexRole:
+            return index.row()
+        if node.signature is None:
+            return f"{index.row()+1}: [Error] Invalid Annotation" if role == Qt.DisplayRole else None
+        if role == Qt.DisplayRole:
+            label, ann_type = node.signature[0], node.signature[1]
+            return f"{index.row()+1}: [{str(ann_type).upper()}] {label}"
+        if role == PinnedRole:
+            return node.signature[2]
+        return None
+
+    def set_pinned(self, row, is_pinned):
+        node = self._rows[row]
+        if not isinstance(node.ann, dict):
+            return
+        node.ann["pinned"] = is_pinned
+        node.signature = _row_signature(node.ann)
+        top_left = self.index(row, 0)
+        self.dataChanged.emit(top_left, top_left, [PinnedRole])
+        self.pinStateChanged.emit(row, is_pinned)
+
+    # --- Incremental updates ---
+    def set_annotations(self, annotations):
+        """Diff `annotations` against the current rows and emit minimal change signals."""
+        for ann in annotations:
+            if isinstance(ann, dict) and "pinned" not in ann:
+                ann["pinned"] = False
+        new_sigs = [_row_signature(ann) for ann in annotations]
+        old_sigs = [node.signature for node in self._rows]
+
+        # Unchanged rows at both ends are left alone; only the middle is touched
+        prefix = 0
+        limit = min(len(old_sigs), len(new_sigs))
+        while prefix < limit and old_sigs[prefix] == new_sigs[prefix]:
+            prefix += 1
+        suffix = 0
+        while (suffix < limit - prefix and
+               old_sigs[len(old_sigs) - 1 - suffix] == new_sigs[len(new_sigs) - 1 - suffix]):
+            suffix += 1
+
+        old_mid = len(old_sigs) - prefix - suffix
+        new_mid = len(new_sigs) - prefix - suffix
+        common = min(old_mid, new_mid)
+
+        # Rows present in both are updated in place
+        for offset in range(common):
+            self._update_row(prefix + offset, annotations[prefix + offset])
+        if old_mid > common:
+            first = prefix + common
+            self.beginRemoveRows(QModelIndex(), first, first + old_mid - common - 1)
+            del self._rows[first:first + old_mid - common]
+            self.endRemoveRows()
+        elif new_mid > common:
+            first = prefix + common
+            self.beginInsertRows(QModelIndex(), first, first + new_mid - common - 1)
+            self._rows[first:first] = [_AnnotationRow(first + k, annotations[first + k])
+                                       for k in range(new_mid - common)]
+            self.endInsertRows()
+
+        # Rebind annotation objects (the caller may pass a new list) and row numbers
+        for row, (node, ann) in enumerate(zip(self._rows, annotations)):
+            node.row = row
+            node.ann = ann
+        if old_mid != new_mid and prefix + common < len(self._rows):
+            # Row numbers in the display text shifted for everything below the change
+            self.dataChanged.emit(self.index(prefix + common, 0),
+                                  self.index(len(self._rows) - 1, 0), [Qt.DisplayRole])
+
+    def _update_row(self, row, ann):
+        node = self._rows[row]
+        parent = self.index(row, 0)
+        new_count = len(ann.get("points", [])) if isinstance(ann, dict) and ann.get("type") == "keypoint" else 0
+        node.ann = ann
+        node.signature = _row_signature(ann)
+        if node.fetched > new_count:
+            self.beginRemoveRows(parent, new_count, node.fetched - 1)
+            node.fetched = new_count
+            self.endRemoveRows()
+        elif 0 < node.fetched < new_count:
+            self.beginInsertRows(parent, node.fetched, new_count - 1)
+            node.fetched = new_count
+            self.endInsertRows()
+        self.dataChanged.emit(parent, parent)
+        if node.fetched:
+            self.dataChanged.emit(self.index(0, 0, parent), self.index(node.fetched - 1, 0, parent))
+
+    def clear(self):
+        self.beginResetModel()
+        self._rows = []
+        self.endResetModel()
+
+
+class AnnotationItemDelegate(QStyledItemDelegate):
+    """Paints annotation rows with a pin toggle; no per-row widgets are created."""
+    ROW_HEIGHT = 30
+    PIN_SIZE = 18
+
+    def _pin_rect(self, option):
+        rect = option.rect
+        return QRect(rect.right() - self.PIN_SIZE - 8,
+                     rect.top() + (rect.height() - self.PIN_SIZE) // 2,
+                     self.PIN_SIZE, self.PIN_SIZE)
+
+    def paint(self, painter, option, index):
+        is_top_level = index.internalPointer() is None
+        opt = QStyleOptionViewItem(option)
+        self.initStyleOption(opt, index)
+        if is_top_level and index.data(PinnedRole) is not None:
+            opt.rect = opt.rect.adjusted(0, 0, -(self.PIN_SIZE + 12), 0)
+        style = opt.widget.style() if opt.widget else QApplication.style()
+        style.drawControl(QStyle.CE_ItemViewItem, opt, painter, opt.widget)
+
+        pinned = index.data(PinnedRole)
+        if is_top_level and pinned is not None:
+            icon = style.standardIcon(QStyle.SP_DialogApplyButton if pinned else QStyle.SP_DialogCloseButton)
+            icon.paint(painter, self._pin_rect(option))
+
+    def sizeHint(self, option, index):
+        size = super().sizeHint(option, index)
+        return QSize(size.width(), max(size.height(), self.ROW_HEIGHT))
+
+    def editorEvent(self, event, model, option, index):
+        if (event.type() == QEvent.MouseButtonRelease and index.internalPointer() is None
+                and index.data(PinnedRole) is not None
+                and self._pin_rect(option).contains(event.pos())):
+            model.set_pinned(index.row(), not index.data(PinnedRole))
+            return True
+        return super().editorEvent(event, model, option, index)
+
+    def helpEvent(self, event, view, option, index):
+        if (index.internalPointer() is None and index.data(PinnedRole) is not None
+                and self._pin_rect(option).contains(event.pos())):
+            pinned = index.data(PinnedRole)
+            QToolTip.showText(event.globalPos(),
+                              "Pinned (cannot be moved)" if pinned else "Unpinned (can be moved)", view)
+            return True
+        return super().helpEvent(event, view, option, index)
 
 
 class AnnotationPanel(QWidget):
     activeLabelChanged = pyqtSignal(str)
     classLabelsChanged = pyqtSignal()
     annotationsUpdated = pyqtSignal(list)
+    deleteAnnotationsRequested = pyqtSignal(list)  # annotation indices
+    relabelAnnotationsRequested = pyqtSignal(list, str)  # annotation indices, new label
+    annotationSelectionChanged = pyqtSignal(list)  # annotation indices selected in the list
     keypointDisplayOptionsChanged = pyqtSignal(dict)
 
     def __init__(self):
@@ -56,6 +284,7 @@ class AnnotationPanel(QWidget):
         self.setObjectName("AnnotationPanel")
         
         self.current_annotations = []
+        self._syncing_selection = False
         
         main_layout = QVBoxLayout(self)
         main_layout.setContentsMargins(5, 5, 5, 5)
@@ -113,10 +342,23 @@ class AnnotationPanel(QWidget):
         annotation_group_box = QGroupBox("Image Annotations")
         annotation_layout = QVBoxLayout(annotation_group_box)
 
-        self.annotation_list = QListWidget()
-        self.annotation_list.setSelectionMode(QListWidget.ExtendedSelection)
+        self.annotation_model = AnnotationListModel(self)
+        self.annotation_model.pinStateChanged.connect(self.on_pin_state_changed)
+        self.annotation_list = QTreeView()
+        self.annotation_list.setObjectName("annotationTree")
+        self.annotation_list.setModel(self.annotation_model)
+        self.annotation_list.setItemDelegate(AnnotationItemDelegate(self.annotation_list))
+        self.annotation_list.setHeaderHidden(True)
+        self.annotation_list.setUniformRowHeights(True)
+        self.annotation_list.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.annotation_list.setMouseTracking(True)
+        self.annotation_list.selectionModel().selectionChanged.connect(self.on_annotation_selection_changed)
         annotation_layout.addWidget(self.annotation_list)
 
+        relabel_annotation_button = QPushButton("Apply Active Label to Selected")
+        relabel_annotation_button.clicked.connect(self.relabel_selected_annotations)
+        annotation_layout.addWidget(relabel_annotation_button)
+
         delete_annotation_button = QPushButton("Delete Selected Annotation(s)")
         delete_annotation_button.clicked.connect(self.delete_selected_annotations)
         annotation_layout.addWidget(delete_annotation_button)
@@ -158,77 +400,56 @@ class AnnotationPanel(QWidget):
         self.classLabelsChanged.emit()
 
         if reply == QMessageBox.Yes:
-            self.current_annotations = [ann for ann in self.current_annotations if ann.get("label") != label_to_delete]
-            self.annotationsUpdated.emit(self.current_annotations)
-            self.update_annotations(self.current_annotations)
+            ann_indices = [i for i, ann in enumerate(self.current_annotations)
+                           if isinstance(ann, dict) and ann.get("label") == label_to_delete]
+            if ann_indices:
+                self.deleteAnnotationsRequested.emit(ann_indices)
+
+    def get_selected_annotation_indices(self):
+        selected_rows = self.annotation_list.selectionModel().selectedRows()
+        return sorted({index.data(AnnotationIndexRole) for index in selected_rows
+                       if index.internalPointer() is None})
+
+    def on_annotation_selection_changed(self, selected, deselected):
+        if not self._syncing_selection:
+            self.annotationSelectionChanged.emit(self.get_selected_annotation_indices())
+
+    def select_annotations(self, ann_indices):
+        """Mirror a selection made in the viewer without echoing it back."""
+        selection = QItemSelection()
+        for i in ann_indices:
+            if 0 <= i < self.annotation_model.rowCount():
+                index = self.annotation_model.index(i, 0)
+                selection.select(index, index)
+        self._syncing_selection = True
+        try:
+            self.annotation_list.selectionModel().select(
+                selection, QItemSelectionModel.ClearAndSelect | QItemSelectionModel.Rows)
+        finally:
+            self._syncing_selection = False
+        if ann_indices:
+            self.annotation_list.scrollTo(self.annotation_model.index(ann_indices[0], 0))
 
     def delete_selected_annotations(self):
-        selected_list_rows = sorted([self.annotation_list.row(item) for item in self.annotation_list.selectedItems()], reverse=True)
-        if not selected_list_rows: return
-
-        ann_idx_map = self.annotation_list.property("ann_idx_map") or {}
-        
-        ann_indices_to_delete = sorted(list(set(ann_idx_map[row] for row in selected_list_rows if row in ann_idx_map)), reverse=True)
-
+        ann_indices_to_delete = self.get_selected_annotation_indices()
         if not ann_indices_to_delete: return
+        # The viewer applies the deletion so it can be undone
+        self.deleteAnnotationsRequested.emit(ann_indices_to_delete)
 
-        for ann_index in ann_indices_to_delete:
-            if 0 <= ann_index < len(self.current_annotations):
-                del self.current_annotations[ann_index]
-            
-        self.annotationsUpdated.emit(self.current_annotations)
-        self.update_annotations(self.current_annotations)
+    def relabel_selected_annotations(self):
+        current = self.label_list.currentItem()
+        ann_indices = self.get_selected_annotation_indices()
+        if not current or not ann_indices: return
+        self.relabelAnnotationsRequested.emit(ann_indices, current.text())
 
     def on_pin_state_changed(self, ann_index, is_pinned):
         if 0 <= ann_index < len(self.current_annotations):
-            self.current_annotations[ann_index]['pinned'] = is_pinned
             self.annotationsUpdated.emit(self.current_annotations)
 
     def update_annotations(self, annotations):
+        """Sync the list with `annotations`, touching only the rows that changed."""
         self.current_annotations = annotations
-        self.annotation_list.clear()
-        
-        ann_idx_map = {}
-        list_idx = 0
-
-        for i, ann in enumerate(self.current_annotations):
-            if isinstance(ann, dict):
-                label = ann.get("label", "N/A")
-                ann_type = ann.get("type", "N/A").upper()
-                if "pinned" not in ann:
-                    ann["pinned"] = False
-                is_pinned = ann.get("pinned", False)
-
-                item = QListWidgetItem(self.annotation_list)
-                list_item_widget = AnnotationListItem(f"{i+1}: [{ann_type}] {label}", i, is_pinned)
-                list_item_widget.pinStateChanged.connect(self.on_pin_state_changed)
-                
-                item.setSizeHint(list_item_widget.sizeHint())
-                self.annotation_list.addItem(item)
-                self.annotation_list.setItemWidget(item, list_item_widget)
-                ann_idx_map[list_idx] = i
-                list_idx += 1
-
-                if ann.get("type") == "keypoint":
-                    points = ann.get("points", [])
-                    for j, point in enumerate(points):
-                        if len(point) == 3:
-                            x, y, conf = point
-                            kp_item_text = f"  - KP {j}: ({x:.2f}, {y:.2f}), C: {conf:.2f}"
-                        else:
-                            x, y = point
-                            kp_item_text = f"  - KP {j}: ({x:.2f}, {y:.2f})"
-
-                        kp_item = QListWidgetItem(kp_item_text)
-                        kp_item.setFlags(kp_item.flags() & ~Qt.ItemIsSelectable)
-                        self.annotation_list.addItem(kp_item)
-                        list_idx += 1
-            else:
-                item = QListWidgetItem(f"{i+1}: [Error] Invalid Annotation")
-                self.annotation_list.addItem(item)
-                list_idx += 1
-        
-        self.annotation_list.setProperty("ann_idx_map", ann_idx_map)
+        self.annotation_model.set_annotations(annotations)
 
     def get_class_labels(self):
         return [self.label_list.item(i).text() for i in range(self.label_list.count())]
@@ -254,7 +475,7 @@ class AnnotationPanel(QWidget):
 
     def clear_all(self):
         self.label_list.clear()
-        self.annotation_list.clear()
+        self.annotation_model.clear()
         self.current_annotations = []
         self.new_label_input.clear()
         self.set_keypoint_options_visibility(False)
\ No newline at end of file
@@ -92,8 +92,14 @@ class HotkeyGuideDialog(QDialog):
             <h3>Annotation Tools</h3>
             <table>
                 <tr><th>Key</th><th>Action</th></tr>
+                <tr><td><code>V</code></td><td>Select tool (click, <code>Ctrl</code>/<code>Shift</code>+click or drag a rubber band)</td></tr>
                 <tr><td><code>B</code></td><td>Select Bounding Box tool</td></tr>
                 <tr><td><code>P</code></td><td>Select Polygon tool</td></tr>
+                <tr><td><code>M</code></td><td>Select Mask brush (segmentation models)</td></tr>
+                <tr><td><code>[ / ]</code></td><td>Shrink / grow the mask brush</td></tr>
+                <tr><td><code>Left / Right drag</code></td><td>Paint / erase with the mask brush</td></tr>
+                <tr><td><code>W</code></td><td>Select Magic Wand (click a region, <code>[ / ]</code> to change tolerance, <code>Enter</code> to accept, <code>Esc</code> to clear)</td></tr>
+                <tr><td><code>L</code></td><td>Toggle livewire (edge-snapping) for the Polygon tool</td></tr>
                 <tr><td><code>Enter</code> or <code>N</code></td><td>Finish drawing polygon</td></tr>
                 <tr><td><code>Backspace</code></td><td>Remove last point of a polygon</td></tr>
             </table>
@@ -102,6 +108,12 @@ class HotkeyGuideDialog(QDialog):
             <table>
                 <tr><th>Key</th><th>Action</th></tr>
                 <tr><td><code>Delete</code></td><td>Delete the currently selected annotation</td></tr>
+                <tr><td><code>Ctrl + A</code></td><td>Select all annotations (Select tool)</td></tr>
+                <tr><td><code>Arrows</code> / <code>Shift + Arrows</code></td><td>Nudge the selection by 1 / 10 pixels (Select tool)</td></tr>
+                <tr><td><code>[ / ]</code></td><td>Shrink / grow the selection (Select tool)</td></tr>
+                <tr><td><code>R</code></td><td>Apply the active label to the selection (Select tool)</td></tr>
+                <tr><td><code>Ctrl + Z</code></td><td>Undo last edit</td></tr>
+                <tr><td><code>Ctrl + Y</code> or <code>Ctrl + Shift + Z</code></td><td>Redo</td></tr>
             </table>
 
             <h3>Labels & Classes</h3>
@@ -0,0 +1,57 @@
+# C:\LabelAI\ui\image_loader.py
+
+from PyQt5.QtCore import Qt, QObject, QRunnable, QThreadPool, pyqtSignal
+from PyQt5.QtGui import QImage, QImageReader
+
+
+class DecodeSignals(QObject):
+    """
+    Carries decoded images from worker threads back to the GUI thread.
+
+    Signals:
+        decoded (int, QImage, bool): request generation, the image, and whether
+            it is the full-resolution decode (False for a reduced preview).
+    """
+    decoded = pyqtSignal(int, QImage, bool)
+
+
+class ImageDecodeTask(QRunnable):
+    """
+    Decodes an image on a QThreadPool worker.
+
+    With a scaled size the reader decodes straight to that size; for JPEGs
+    Qt then uses DCT scaling, which avoids most of the work of a full decode.
+    QImage is safe to build off the GUI thread; the receiver converts it to a
+    QPixmap.
+    """
+
+    def __init__(self, signals, path, generation, scaled_size=None):
+        super().__init__()
+        self.signals = signals
+        self.path = path
+        self.generation = generation
+        self.scaled_size = scaled_size
+
+    def run(self):
+        reader = QImageReader(self.path)
+        if self.scaled_size is not None:
+            reader.setScaledSize(self.scaled_size)
+        image = reader.read()
+        try:
+            self.signals.decoded.emit(self.generation, image, self.scaled_size is None)
+        except RuntimeError:
+            pass  # The receiving viewer was deleted while we were decoding
+
+
+def preview_size(image_size, bounds):
+    """
+    Returns the size to decode a preview at, or None if the full image is
+    already no larger than `bounds` (so a preview would gain nothing).
+    """
+    if image_size.width() <= bounds.width() and image_size.height() <= bounds.height():
+        return None
+    return image_size.scaled(bounds, Qt.KeepAspectRatio)
+
+
+def start_decode(signals, path, generation, scaled_size=None):
+    QThreadPool.globalInstance().start(ImageDecodeTask(signals, path, generation, scaled_size))
@@ -1,21 +1,241 @@
 # C:\LabelAI\ui\image_sidebar.py
 
 import os
+from bisect import bisect_left
+from collections import OrderedDict
 from typing import List
 
 from PyQt5.QtWidgets import (
-    QWidget, QVBoxLayout, QListWidget, QPushButton, QListWidgetItem, 
-    QHBoxLayout, QMessageBox, QStyle, QListView, QLabel
+    QWidget, QVBoxLayout, QPushButton, QHBoxLayout, QMessageBox, QStyle,
+    QListView, QLabel, QLineEdit, QComboBox, QAbstractItemView
 )
-from PyQt5.QtCore import pyqtSignal, QSize, Qt
-from PyQt5.QtGui import QIcon, QFont
+from PyQt5.QtCore import (
+    pyqtSignal, QSize, Qt, QObject, QRunnable, QThreadPool, QTimer, QFileSystemWatcher,
+    QAbstractListModel, QModelIndex, QSortFilterProxyModel, QItemSelectionModel
+)
+from PyQt5.QtGui import QIcon, QFont, QImage, QImageReader, QPixmap, QColor
+
+from backend.annotation_index import is_structured_query
+
+
+class ThumbnailSignals(QObject):
+    """
+    Signals:
+        loaded (int, str, QImage): model generation, image path and its thumbnail.
+    """
+    loaded = pyqtSignal(int, str, QImage)
+
+
+class ThumbnailTask(QRunnable):
+    """
+    Produces one sidebar thumbnail. With a ThumbnailCache the image is only
+    decoded if the cache has no up-to-date entry; without one it falls back
+    to a reduced-size decode.
+    """
+    def __init__(self, signals, cache, path, size, generation):
+        super().__init__()
+        self.signals = signals
+        self.cache = cache
+        self.path = path
+        self.size = size
+        self.generation = generation
+
+    def run(self):
+        source = self.cache.get(self.path) if self.cache is not None else self.path
+        if source is None:
+            return
+        reader = QImageReader(source)
+        full_size = reader.size()
+        if full_size.isValid():
+            reader.setScaledSize(full_size.scaled(self.size, Qt.KeepAspectRatio))
+        image = reader.read()
+        if image.isNull():
+            return
+        try:
+            self.signals.loaded.emit(self.generation, self.path, image)
+        except RuntimeError:
+            pass  # The sidebar was deleted in the meantime
+
+
+class ImageListModel(QAbstractListModel):
+    """
+    The project's image paths as a flat list model.
+
+    Rows are plain paths; nothing per image is created up front. Thumbnails
+    are requested only when the view asks for a row's decoration, which it
+    does for visible rows, and kept in a bounded LRU cache of icons.
+    """
+    PathRole = Qt.UserRole
+    CACHE_SIZE = 600
+    THUMBNAIL_THREADS = 4
+
+    def __init__(self, icon_size: QSize, placeholder_icon: QIcon, parent: QObject = None):
+        super().__init__(parent)
+        self.icon_size = icon_size
+        self.placeholder_icon = placeholder_icon
+        self.thumbnail_cache = None
+        self._paths = []
+        self._rows = {}  # path -> row, for O(1) lookup
+        self._icons = OrderedDict()
+        self._pending = set()
+        self._generation = 0
+        # A pool of its own so thumbnail backlogs don't delay viewer/tool workers
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(self.THUMBNAIL_THREADS)
+        self._signals = ThumbnailSignals(self)
+        self._signals.loaded.connect(self._on_thumbnail_loaded)
+
+    def set_paths(self, paths: List[str]) -> None:
+        self.beginResetModel()
+        # Drop queued thumbnail work and ignore results still in flight
+        self._pool.clear()
+        self._generation += 1
+        self._pending.clear()
+        self._icons.clear()
+        self._paths = list(paths)
+        self._rebuild_rows()
+        self.endResetModel()
+
+    def add_paths(self, paths: List[str]) -> int:
+        """
+        Inserts new paths at their sorted positions; paths already present
+        get their thumbnail reloaded instead. Returns the count inserted.
+        """
+        added = 0
+        for path in sorted(set(paths)):
+            if path in self._rows:
+                # Same name, new file: forget the old icon so it is requested again
+                self._icons.pop(path, None)
+                self._pending.discard(path)
+                index = self.index(self._rows[path])
+                self.dataChanged.emit(index, index, [Qt.DecorationRole])
+                continue
+            row = bisect_left(self._paths, path)
+            self.beginInsertRows(QModelIndex(), row, row)
+            self._paths.insert(row, path)
+            self._rows[path] = row  # Keeps later membership checks correct until the rebuild
+            self.endInsertRows()
+            added += 1
+        if added:
+            self._rebuild_rows()
+        return added
+
+    def remove_paths(self, paths: List[str]) -> int:
+        """Removes the given paths, one contiguous block of rows at a time. Returns the count removed."""
+        rows = sorted((self._rows[p] for p in set(paths) if p in self._rows), reverse=True)
+        if not rows:
+            return 0
+        # Group descending rows into [first, last] runs
+        runs, first, last = [], rows[0], rows[0]
+        for row in rows[1:]:
+            if row == first - 1:
+                first = row
+            else:
+                runs.append((first, last))
+                first = last = row
+        runs.append((first, last))
+        for first, last in runs:
+            self.beginRemoveRows(QModelIndex(), first, last)
+            for path in self._paths[first:last + 1]:
+                self._icons.pop(path, None)
+                self._pending.discard(path)
+            del self._paths[first:last + 1]
+            self.endRemoveRows()
+        self._rebuild_rows()
+        return len(rows)
+
+    def _rebuild_rows(self) -> None:
+        self._rows = {path: row for row, path in enumerate(self._paths)}
+
+    def row_of(self, path: str) -> int:
+        return self._rows.get(path, -1)
+
+    def path_at(self, row: int) -> str:
+        return self._paths[row]
+
+    def paths(self) -> List[str]:
+        return list(self._paths)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._paths)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        path = self._paths[index.row()]
+        if role == Qt.DisplayRole:
+            return os.path.basename(path)
+        if role == Qt.DecorationRole:
+            icon = self._icons.get(path)
+            if icon is None:
+                self._request(path)
+                return self.placeholder_icon
+            self._icons.move_to_end(path)
+            return icon
+        if role == Qt.ToolTipRole:
+            return f"Double-click to open: {os.path.basename(path)}"
+        if role == self.PathRole:
+            return path
+        return None
+
+    def _request(self, path: str) -> None:
+        if path in self._pending:
+            return
+        self._pending.add(path)
+        self._pool.start(ThumbnailTask(self._signals, self.thumbnail_cache, path, self.icon_size, self._generation))
+
+    def _on_thumbnail_loaded(self, generation: int, path: str, image: QImage) -> None:
+        if generation != self._generation:
+            return
+        self._pending.discard(path)
+        row = self._rows.get(path)
+        if row is None:
+            return
+        self._icons[path] = QIcon(QPixmap.fromImage(image))
+        while len(self._icons) > self.CACHE_SIZE:
+            self._icons.popitem(last=False)
+        index = self.index(row)
+        self.dataChanged.emit(index, index, [Qt.DecorationRole])
+
+
+class ImageFilterProxyModel(QSortFilterProxyModel):
+    """Filters images by a case-insensitive filename substring and sorts them by name."""
+
+    def __init__(self, parent: QObject = None):
+        super().__init__(parent)
+        self.setFilterCaseSensitivity(Qt.CaseInsensitive)
+        self.setSortCaseSensitivity(Qt.CaseInsensitive)
+        # Sorting and filtering are applied explicitly, not on every model change
+        self.setDynamicSortFilter(False)
+
+
+class ImageQueryProxyModel(QSortFilterProxyModel):
+    """
+    Keeps only the rows whose path is in a precomputed set (an annotation
+    query result). Only placed in the proxy chain while a query is active.
+    """
+
+    def __init__(self, parent: QObject = None):
+        super().__init__(parent)
+        self._allowed = set()
+        self.setDynamicSortFilter(False)
+
+    def set_allowed_paths(self, paths: List[str]) -> None:
+        self._allowed = set(paths)
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        return self.sourceModel().path_at(source_row) in self._allowed
 
 
 class ImageSidebar(QWidget):
     """
     A sidebar widget to display a grid of image thumbnails from a directory.
 
-    Provides functionality to add, delete, and select images.
+    Provides functionality to add, delete, filter, sort and select images.
+    The list is backed by ImageListModel, so only visible rows cost anything.
+    Filter text is matched against file names, or, if it is an annotation
+    query such as "label=person count>5", passed to the query handler.
 
     Signals:
         imageSelected (str): Emitted when an image is double-clicked, providing its path.
@@ -27,7 +247,11 @@ class ImageSidebar(QWidget):
     MIN_WIDTH = 180
     MAX_WIDTH = 280
     ICON_SIZE = QSize(120, 120)
+    ITEM_SIZE = QSize(140, 140)
     IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.gif')
+    SORT_ORDERS = (("Name (A-Z)", Qt.AscendingOrder), ("Name (Z-A)", Qt.DescendingOrder))
+    FILTER_DELAY_MS = 250
+    RESCAN_DELAY_MS = 500
 
     # --- Signals ---
     imageSelected = pyqtSignal(str)
@@ -38,9 +262,32 @@ class ImageSidebar(QWidget):
         super().__init__(parent)
         self.setMinimumWidth(self.MIN_WIDTH)
         self.setMaximumWidth(self.MAX_WIDTH)
+        self.image_model = ImageListModel(self.ICON_SIZE, self._create_placeholder_icon(), self)
+        self.proxy_model = ImageFilterProxyModel(self)
+        self.proxy_model.setSourceModel(self.image_model)
+        self.query_model = ImageQueryProxyModel(self)
+        self.query_model.setSourceModel(self.image_model)
+        self._query_handler = None
+        # Filtering visits every row, so wait until typing pauses
+        self._filter_timer = QTimer(self)
+        self._filter_timer.setSingleShot(True)
+        self._filter_timer.setInterval(self.FILTER_DELAY_MS)
+        self._filter_timer.timeout.connect(self._apply_filter)
+        # External changes to the image folder are picked up by a debounced rescan
+        self._image_dir = None
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.directoryChanged.connect(self._schedule_rescan)
+        self._rescan_timer = QTimer(self)
+        self._rescan_timer.setSingleShot(True)
+        self._rescan_timer.setInterval(self.RESCAN_DELAY_MS)
+        self._rescan_timer.timeout.connect(self._rescan_directory)
         self._init_ui()
         self._apply_styles()
 
+    @property
+    def thumbnail_cache(self):
+        return self.image_model.thumbnail_cache
+
     def _init_ui(self) -> None:
         """Initialize the user interface and layout."""
         main_layout = QVBoxLayout(self)
@@ -59,24 +306,46 @@ class ImageSidebar(QWidget):
         # --- Button Layout ---
         button_layout = self._create_button_layout()
         main_layout.addLayout(button_layout)
+
+        # --- Filter and Sort ---
+        self.filter_edit = QLineEdit()
+        self.filter_edit.setPlaceholderText("Filter by name or query...")
+        self.filter_edit.setToolTip(
+            "Type part of a file name, or an annotation query, e.g.\n"
+            "label=person count>5\nunannotated\ntype=polygon polygon_size<32\nedited>yesterday"
+        )
+        self.filter_edit.setClearButtonEnabled(True)
+        self.filter_edit.textChanged.connect(self._filter_timer.start)
+        self.filter_edit.returnPressed.connect(self._apply_filter)
+        main_layout.addWidget(self.filter_edit)
+
+        self.sort_combo = QComboBox()
+        for text, _ in self.SORT_ORDERS:
+            self.sort_combo.addItem(text)
+        self.sort_combo.currentIndexChanged.connect(self._apply_sort)
+        main_layout.addWidget(self.sort_combo)
         
-        # --- Image List Widget ---
-        self.image_list_widget = QListWidget()
-        self.image_list_widget.setIconSize(self.ICON_SIZE)
-        self.image_list_widget.setSelectionMode(QListWidget.ExtendedSelection)
-        self.image_list_widget.setViewMode(QListView.IconMode)
-        self.image_list_widget.setResizeMode(QListView.Adjust)
-        self.image_list_widget.setMovement(QListWidget.Static)
-        self.image_list_widget.setFlow(QListView.LeftToRight)  # Arrange items left-to-right
-        self.image_list_widget.setWrapping(True)  # Wrap items to the next line
-        self.image_list_widget.setSpacing(8)  # Add spacing between items
-        self.image_list_widget.setContentsMargins(8, 8, 8, 8)  # Internal margins
+        # --- Image List View ---
+        self.image_list_view = QListView()
+        self.image_list_view.setModel(self.proxy_model)
+        self.image_list_view.setIconSize(self.ICON_SIZE)
+        self.image_list_view.setGridSize(self.ITEM_SIZE)
+        # Uniform sizes let the view lay out rows without querying each one
+        self.image_list_view.setUniformItemSizes(True)
+        self.image_list_view.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.image_list_view.setViewMode(QListView.IconMode)
+        self.image_list_view.setResizeMode(QListView.Adjust)
+        self.image_list_view.setMovement(QListView.Static)
+        self.image_list_view.setFlow(QListView.LeftToRight)  # Arrange items left-to-right
+        self.image_list_view.setWrapping(True)  # Wrap items to the next line
+        self.image_list_view.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.image_list_view.setContentsMargins(8, 8, 8, 8)  # Internal margins
 
         # --- Connections ---
-        self.image_list_widget.itemDoubleClicked.connect(self._activate_item)
+        self.image_list_view.doubleClicked.connect(self._activate_index)
 
         # --- Assemble Layout ---
-        main_layout.addWidget(self.image_list_widget)
+        main_layout.addWidget(self.image_list_view)
 
     def _create_button_layout(self) -> QHBoxLayout:
         """Create the layout with Add and Delete buttons."""
@@ -112,6 +381,14 @@ class ImageSidebar(QWidget):
                 border-right: 1px solid #dee2e6;
             }
             
+            QLineEdit, QComboBox {
+                background-color: #ffffff;
+                border: 1px solid #ced4da;
+                border-radius: 6px;
+                padding: 4px 6px;
+                color: #495057;
+            }
+            
             QLabel {
                 color: #495057;
                 padding: 8px 0px;
@@ -138,14 +415,14 @@ class ImageSidebar(QWidget):
                 border-color: #6c757d;
             }
             
-            QListWidget {
+            QListView {
                 background-color: #ffffff;
                 border: 1px solid #dee2e6;
                 border-radius: 8px;
                 padding: 8px;
             }
             
-            QListWidget::item {
+            QListView::item {
                 background-color: transparent;
                 border: 2px solid transparent;
                 border-radius: 8px;
@@ -153,114 +430,214 @@ class ImageSidebar(QWidget):
                 margin: 2px;
             }
             
-            QListWidget::item:selected {
+            QListView::item:selected {
                 background-color: #e3f2fd;
                 border: 2px solid #2196f3;
             }
             
-            QListWidget::item:hover {
+            QListView::item:hover {
                 background-color: #f5f5f5;
                 border: 2px solid #bdbdbd;
             }
         """)
 
+    def _create_placeholder_icon(self) -> QIcon:
+        """A plain tile shown until an image's thumbnail has loaded."""
+        pixmap = QPixmap(self.ICON_SIZE)
+        pixmap.fill(QColor("#e9ecef"))
+        return QIcon(pixmap)
+
+    def set_thumbnail_cache(self, cache) -> None:
+        """Use a backend ThumbnailCache (or None) for the thumbnails of later populates."""
+        self.image_model.thumbnail_cache = cache
+
+    def set_query_handler(self, handler) -> None:
+        """
+        Set the callable used for annotation queries: handler(query_text, paths)
+        returns the matching paths and raises ValueError for a bad query.
+        """
+        self._query_handler = handler
+
+    def _apply_filter(self) -> None:
+        text = self.filter_edit.text().strip()
+        matches = None
+        if self._query_handler is not None and is_structured_query(text):
+            try:
+                matches = self._query_handler(text, self.image_model.paths())
+                self.filter_edit.setStyleSheet("")
+            except ValueError as e:
+                self.filter_edit.setStyleSheet("border-color: #dc3545;")
+                self.header_label.setToolTip(str(e))
+                return
+        else:
+            self.filter_edit.setStyleSheet("")
+
+        if matches is None:
+            if self.proxy_model.sourceModel() is not self.image_model:
+                self.proxy_model.setSourceModel(self.image_model)
+            self.proxy_model.setFilterFixedString(text)
+        else:
+            self.query_model.set_allowed_paths(matches)
+            if self.proxy_model.sourceModel() is not self.query_model:
+                self.proxy_model.setSourceModel(self.query_model)
+            self.proxy_model.setFilterFixedString("")
+        self.header_label.setToolTip("")
+        self._apply_sort(self.sort_combo.currentIndex())
+        self._update_header()
+
+    def has_active_filter(self) -> bool:
+        return self.proxy_model.rowCount() != self.image_model.rowCount()
+
+    def visible_image_paths(self) -> List[str]:
+        """Paths of the images currently shown, in display order."""
+        if not self.has_active_filter() and self.proxy_model.sortColumn() < 0:
+            return self.image_model.paths()
+        return [self.proxy_model.index(row, 0).data(ImageListModel.PathRole)
+                for row in range(self.proxy_model.rowCount())]
+
+    def _apply_sort(self, combo_index: int) -> None:
+        order = self.SORT_ORDERS[combo_index][1]
+        if order == Qt.AscendingOrder:
+            # The source model is already in name order; column -1 keeps it without comparing rows
+            self.proxy_model.sort(-1)
+        else:
+            self.proxy_model.sort(0, order)
+
+    def _update_header(self) -> None:
+        total = self.image_model.rowCount()
+        shown = self.proxy_model.rowCount()
+        if shown == total:
+            self.header_label.setText(f"Project Images ({total})")
+        else:
+            self.header_label.setText(f"Project Images ({shown} of {total})")
+
     def _handle_delete_request(self) -> None:
         """Confirm and initiate the deletion of selected images."""
-        selected_items = self.image_list_widget.selectedItems()
-        if not selected_items:
+        paths_to_delete = self.get_selected_image_paths()
+        if not paths_to_delete:
             QMessageBox.information(self, "Delete Images", "No images selected.")
             return
 
         reply = QMessageBox.question(
             self,
             "Confirm Deletion",
-            f"Are you sure you want to delete {len(selected_items)} image(s)?\n\n"
+            f"Are you sure you want to delete {len(paths_to_delete)} image(s)?\n\n"
             "This will also delete their annotation files and cannot be undone.",
             QMessageBox.Yes | QMessageBox.No,
             QMessageBox.No
         )
 
         if reply == QMessageBox.Yes:
-            paths_to_delete = [item.data(Qt.UserRole) for item in selected_items]
             self.imagesDeleted.emit(paths_to_delete)
 
-    def _activate_item(self, item: QListWidgetItem) -> None:
-        """Emit a signal with the path of the activated (double-clicked) item."""
-        path = item.data(Qt.UserRole)
+    def _activate_index(self, index: QModelIndex) -> None:
+        """Emit a signal with the path of the activated (double-clicked) row."""
+        path = index.data(ImageListModel.PathRole)
         if path:
             self.imageSelected.emit(path)
 
+    def _scan_directory(self, image_dir: str) -> List[str]:
+        with os.scandir(image_dir) as entries:
+            return sorted(entry.path for entry in entries
+                          if entry.name.lower().endswith(self.IMAGE_EXTENSIONS) and entry.is_file())
+
+    def _watch_directory(self, image_dir: str) -> None:
+        if self._watcher.directories():
+            self._watcher.removePaths(self._watcher.directories())
+        self._image_dir = image_dir
+        if image_dir:
+            self._watcher.addPath(image_dir)
+
     def populate_from_directory(self, image_dir: str) -> None:
-        """Scan a directory and populate the list with image thumbnails."""
-        self.image_list_widget.clear()
-        if not os.path.isdir(image_dir):
-            return
+        """
+        Scan a directory, populate the list and watch it for external changes.
+        Only file names are read here; thumbnails are loaded in the background
+        as rows become visible.
+        """
+        paths = []
+        if image_dir and os.path.isdir(image_dir):
+            paths = self._scan_directory(image_dir)
+            self._watch_directory(image_dir)
+        else:
+            self._watch_directory(None)
+        self.image_model.set_paths(paths)
+        self._apply_filter()
 
-        image_count = 0
-        for filename in sorted(os.listdir(image_dir)):
-            if filename.lower().endswith(self.IMAGE_EXTENSIONS):
-                full_path = os.path.join(image_dir, filename)
-                
-                # NOTE: Loading many large images into QIcon on the main thread
-                # can cause the UI to freeze. For better performance with large
-                # datasets, consider creating thumbnails in a background thread.
-                item = QListWidgetItem(QIcon(full_path), os.path.basename(filename))
-                item.setData(Qt.UserRole, full_path)
-                item.setToolTip(f"Double-click to open: {filename}")
-                item.setSizeHint(QSize(140, 140))  # Set consistent item size
-                
-                self.image_list_widget.addItem(item)
-                image_count += 1
-        
-        # Update header to show count
-        self.header_label.setText(f"Project Images ({image_count})")
+    def add_image_paths(self, paths: List[str]) -> None:
+        """Insert rows for newly added images without rescanning the folder."""
+        self.image_model.add_paths(paths)
+        self._refresh_after_delta()
 
     def remove_items_by_path(self, paths: List[str]) -> None:
-        """Remove items from the list widget that match the given paths."""
-        paths_set = set(paths)
-        removed_count = 0
-        
-        for i in range(self.image_list_widget.count() - 1, -1, -1):
-            item = self.image_list_widget.item(i)
-            if item and item.data(Qt.UserRole) in paths_set:
-                self.image_list_widget.takeItem(i)
-                removed_count += 1
-        
-        # Update header count
-        remaining_count = self.image_list_widget.count()
-        self.header_label.setText(f"Project Images ({remaining_count})")
+        """Remove the rows that match the given paths."""
+        self.image_model.remove_paths(paths)
+        self._update_header()
+
+    def _schedule_rescan(self, path: str) -> None:
+        self._rescan_timer.start()
+
+    def _rescan_directory(self) -> None:
+        """Applies the difference between the folder and the list as add/remove deltas."""
+        if not self._image_dir or not os.path.isdir(self._image_dir):
+            return
+        on_disk = set(self._scan_directory(self._image_dir))
+        listed = set(self.image_model.paths())
+        removed = listed - on_disk
+        added = on_disk - listed
+        if removed:
+            self.image_model.remove_paths(list(removed))
+        if added:
+            self.image_model.add_paths(list(added))
+        if removed or added:
+            self._refresh_after_delta()
+
+    def _refresh_after_delta(self) -> None:
+        # A query result was computed for the old rows; new ones need evaluating
+        if self.proxy_model.sourceModel() is self.query_model:
+            self._apply_filter()
+        else:
+            self._update_header()
 
     def clear_all(self) -> None:
         """Clear all images from the sidebar."""
-        self.image_list_widget.clear()
-        self.header_label.setText("Project Images (0)")
+        self._rescan_timer.stop()
+        self._watch_directory(None)
+        self.image_model.set_paths([])
+        self._update_header()
+
+    def _select_proxy_row(self, row: int) -> QModelIndex:
+        index = self.proxy_model.index(row, 0)
+        self.image_list_view.selectionModel().setCurrentIndex(index, QItemSelectionModel.ClearAndSelect)
+        self.image_list_view.scrollTo(index)
+        return index
 
     def select_next_image(self) -> None:
         """Select and activate the next image in the list."""
-        current_row = self.image_list_widget.currentRow()
-        if current_row + 1 < self.image_list_widget.count():
-            next_item = self.image_list_widget.item(current_row + 1)
-            self.image_list_widget.setCurrentItem(next_item)
-            self._activate_item(next_item)
+        current_row = self.image_list_view.currentIndex().row()
+        if current_row + 1 < self.proxy_model.rowCount():
+            self._activate_index(self._select_proxy_row(current_row + 1))
 
     def select_prev_image(self) -> None:
         """Select and activate the previous image in the list."""
-        current_row = self.image_list_widget.currentRow()
+        current_row = self.image_list_view.currentIndex().row()
         if current_row > 0:
-            prev_item = self.image_list_widget.item(current_row - 1)
-            self.image_list_widget.setCurrentItem(prev_item)
-            self._activate_item(prev_item)
+            self._activate_index(self._select_proxy_row(current_row - 1))
 
     def get_selected_image_paths(self) -> List[str]:
         """Get paths of currently selected images."""
-        selected_items = self.image_list_widget.selectedItems()
-        return [item.data(Qt.UserRole) for item in selected_items if item.data(Qt.UserRole)]
+        indexes = self.image_list_view.selectionModel().selectedIndexes()
+        return [index.data(ImageListModel.PathRole) for index in indexes if index.data(ImageListModel.PathRole)]
 
     def select_image_by_path(self, image_path: str) -> bool:
         """Select an image by its file path. Returns True if found and selected."""
-        for i in range(self.image_list_widget.count()):
-            item = self.image_list_widget.item(i)
-            if item and item.data(Qt.UserRole) == image_path:
-                self.image_list_widget.setCurrentItem(item)
-                return True
-        return False
\ No newline at end of file
+        row = self.image_model.row_of(image_path)
+        if row < 0:
+            return False
+        source_index = self.image_model.index(row)
+        if self.proxy_model.sourceModel() is self.query_model:
+            source_index = self.query_model.mapFromSource(source_index)
+        proxy_index = self.proxy_model.mapFromSource(source_index)
+        if not proxy_index.isValid():
+            return False  # Hidden by the current filter
+        self._select_proxy_row(proxy_index.row())
+        return True
@@ -1,15 +1,61 @@
+import numpy as np
 from PyQt5.QtWidgets import QApplication, QLabel, QMessageBox
-from PyQt5.QtGui import QPixmap, QPainter, QPen, QColor, QPolygonF, QBrush
-from PyQt5.QtCore import Qt, QPoint, QRect, QPointF, QRectF, pyqtSignal, QSizeF
+from PyQt5.QtGui import QPixmap, QPainter, QPen, QColor, QPolygonF, QBrush, QImageReader, QCursor
+from PyQt5.QtCore import Qt, QPoint, QRect, QPointF, QRectF, pyqtSignal, QSize, QSizeF, QTimer, QElapsedTimer
+
+from .image_loader import DecodeSignals, preview_size, start_decode
+from .mask_layer import MaskLayer
+from .magic_wand import MagicWandSignals, start_magic_wand
+from .livewire import Livewire, LivewireSignals, start_cost_map, start_anchor_map
+
+from .undo_history import (
+    UndoHistory, AddAnnotationsCommand, DeleteAnnotationsCommand, MoveVertexCommand,
+    InsertVertexCommand, DeleteVertexCommand, MoveAnnotationsCommand, RelabelCommand,
+    MaskStrokeCommand, TransformAnnotationsCommand
+)
 
 class ImageViewer(QLabel):
     annotationsChanged = pyqtSignal()
+    # Emitted once an edit is complete (e.g. at the end of a drag, or after undo/redo)
+    annotationsCommitted = pyqtSignal()
+    # Emitted when the displayed pixmap is replaced (preview, full resolution or unload)
+    pixmapChanged = pyqtSignal()
     promptMade = pyqtSignal(QPoint)
     toolChanged = pyqtSignal(str)
+    # Emitted with the sorted indices of the multi-selection (Select tool)
+    selectionChanged = pyqtSignal(list)
+
+    # Upper bound on repaints per second while dragging, panning or drawing
+    MAX_DRAG_FPS = 60
+
+    # Brush radius limits for the mask tool, in image pixels
+    MIN_BRUSH_RADIUS = 1
+    MAX_BRUSH_RADIUS = 256
+    # Pre-stroke mask contents are saved in tiles of this size as a stroke first reaches them
+    STROKE_TILE = 64
+
+    # Select tool: arrow-key nudge in image pixels (with Shift) and [ / ] scale step
+    NUDGE_STEP = 1
+    NUDGE_STEP_LARGE = 10
+    SCALE_STEP = 1.05
+    # Consecutive nudges merge into one undo step, committed after this pause
+    NUDGE_COMMIT_DELAY_MS = 600
+
+    # Magic wand colour tolerance (per channel, 0-255) and its [ / ] step
+    DEFAULT_WAND_TOLERANCE = 20
+    WAND_TOLERANCE_STEP = 4
 
     def __init__(self):
         super().__init__()
         self.pixmap = None
+        self.image_path = None
+        self.image_size = None  # (width, height), kept while the pixmap is evicted
+        self.view_initialized = False
+        self.has_full_resolution = False
+        self._decode_generation = 0
+        self._decoding = False
+        self._decode_signals = DecodeSignals(self)
+        self._decode_signals.decoded.connect(self._on_image_decoded)
         self.annotations = []
         self.setMinimumSize(1, 1)
 
@@ -50,12 +96,303 @@ class ImageViewer(QLabel):
         self.show_skeleton = True
         self.confidence_threshold = 0.5
 
+        # Brush mask tool; the layer is allocated on the first stroke
+        self.mask_layer = None
+        self.brush_radius = 12
+        self.brush_cursor_pos = None
+        self._stroke_value = None
+        self._stroke_last = None
+        self._stroke_rect = None
+        self._stroke_backup = None
+
+        # Magic wand; fills run on worker threads and stale results are dropped by generation
+        self.wand_tolerance = self.DEFAULT_WAND_TOLERANCE
+        self.wand_seed = None
+        self.wand_preview = []
+        self._wand_generation = 0
+        self._wand_signals = MagicWandSignals(self)
+        self._wand_signals.finished.connect(self._on_wand_finished)
+
+        # Livewire polygon drawing; the cost map is built on first use per image
+        self.livewire_enabled = False
+        self.livewire_preview = []
+        self._livewire = None
+        self._livewire_ready = False
+        self._livewire_anchor = None
+        self._livewire_generation = 0
+        self._livewire_anchor_generation = 0
+        self._livewire_signals = LivewireSignals(self)
+        self._livewire_signals.imageReady.connect(self._on_livewire_image_ready)
+        self._livewire_signals.anchorReady.connect(self._on_livewire_anchor_ready)
+
+        # Multi-selection (Select tool)
+        self.selected_indices = []
+        self.rubber_band_origin = None
+        self.rubber_band_end = None
+        self._group_move_last = None
+        self._nudge_timer = QTimer(self)
+        self._nudge_timer.setSingleShot(True)
+        self._nudge_timer.timeout.connect(self._finish_drag)
+
+        # Undo/redo; drag steps sharing a drag id merge into one command
+        self.history = UndoHistory()
+        self._drag_id = 0
+
+        # Repaint coalescing; the counters are exposed for diagnostics
+        self.repaints_requested = 0
+        self.repaints_painted = 0
+        self._drag_repaint_clock = QElapsedTimer()
+        self._drag_repaint_clock.start()
+        self._drag_repaint_timer = QTimer(self)
+        self._drag_repaint_timer.setSingleShot(True)
+        self._drag_repaint_timer.timeout.connect(self._flush_drag_repaint)
+
+    # --- Undoable edits ---
+    def _execute(self, command, merge=False):
+        """Apply a command to the annotations and record it in the undo history."""
+        command.redo(self.annotations)
+        self.history.push(command, merge=merge)
+        self.annotationsChanged.emit()
+        if not merge:
+            self.annotationsCommitted.emit()
+
+    def _finish_drag(self):
+        if self.history.close_merge():
+            self.annotationsCommitted.emit()
+
+    def _clear_edit_state(self):
+        # Indices may have shifted, so the multi-selection can't be kept
+        self.set_selection([])
+        self.selected_ann_index, self.selected_point_index = -1, -1
+        self.hovered_ann_index, self.hovered_point_index = -1, -1
+        self.hovered_segment_ann_index, self.hovered_segment_index = -1, -1
+        self.moving_ann_index = -1
+        self.moving_ann_initial_coords = None
+
+    def undo(self):
+        if self.history.undo(self.annotations) is None:
+            return False
+        self._clear_edit_state()
+        self.annotationsChanged.emit()
+        self.annotationsCommitted.emit()
+        self.request_repaint()
+        return True
+
+    def redo(self):
+        if self.history.redo(self.annotations) is None:
+            return False
+        self._clear_edit_state()
+        self.annotationsChanged.emit()
+        self.annotationsCommitted.emit()
+        self.request_repaint()
+        return True
+
+    def delete_annotations(self, ann_indices):
+        ann_indices = [i for i in ann_indices if 0 <= i < len(self.annotations)]
+        if not ann_indices:
+            return
+        self._clear_edit_state()
+        self._execute(DeleteAnnotationsCommand(self.annotations, ann_indices))
+        self.request_repaint()
+
+    def add_annotations(self, new_annotations):
+        """Appends annotations as a single undo step."""
+        if not new_annotations:
+            return
+        start = len(self.annotations)
+        self._execute(AddAnnotationsCommand([(start + i, ann) for i, ann in enumerate(new_annotations)]))
+        self.request_repaint()
+
+    # --- Multi-selection ---
+    def set_selection(self, ann_indices):
+        ann_indices = sorted({i for i in ann_indices if 0 <= i < len(self.annotations)})
+        if ann_indices == self.selected_indices:
+            return
+        self.selected_indices = ann_indices
+        self.selectionChanged.emit(list(ann_indices))
+        self.request_repaint()
+
+    def _annotation_bounds(self):
+        """(N, 4) array of relative [x_min, y_min, x_max, y_max] per annotation; NaN if it has no points."""
+        bounds = np.full((len(self.annotations), 4), np.nan)
+        for i, ann in enumerate(self.annotations):
+            ann_type = ann.get("type")
+            if ann_type == "bbox" and len(ann.get("coords", [])) == 4:
+                x, y, w, h = ann["coords"]
+                bounds[i] = (x, y, x + w, y + h)
+            elif ann_type in ("polygon", "keypoint"):
+                points = ann.get("coords") if ann_type == "polygon" else ann.get("points")
+                if points:
+                    array = np.asarray([p[:2] for p in points], dtype=np.float64)
+                    bounds[i, :2] = array.min(axis=0)
+                    bounds[i, 2:] = array.max(axis=0)
+        return bounds
+
+    def _select_in_rubber_band(self, additive):
+        p1 = self.to_relative_coords(self.rubber_band_origin)
+        p2 = self.to_relative_coords(self.rubber_band_end)
+        if p1 is None or p2 is None:
+            return
+        band = QRectF(p1, p2).normalized()
+        bounds = self._annotation_bounds()
+        # Annotations entirely inside the band are selected (NaN rows compare False)
+        inside = ((bounds[:, 0] >= band.left()) & (bounds[:, 1] >= band.top())
+                  & (bounds[:, 2] <= band.right()) & (bounds[:, 3] <= band.bottom()))
+        hits = np.flatnonzero(inside).tolist()
+        self.set_selection(self.selected_indices + hits if additive else hits)
+
+    def transform_selection(self, sx=1.0, sy=1.0, tx=0.0, ty=0.0, drag_id=None):
+        """Scales/translates the selection in relative coordinates as one command."""
+        if not self.selected_indices:
+            return
+        self._execute(TransformAnnotationsCommand(self.selected_indices, sx, sy, tx, ty, drag_id),
+                      merge=drag_id is not None)
+
+    def scale_selection(self, factor):
+        """Scales the selection about the centre of its bounding box."""
+        bounds = self._annotation_bounds()[self.selected_indices]
+        if not len(bounds) or np.isnan(bounds).all():
+            return
+        cx = (np.nanmin(bounds[:, 0]) + np.nanmax(bounds[:, 2])) / 2
+        cy = (np.nanmin(bounds[:, 1]) + np.nanmax(bounds[:, 3])) / 2
+        self.transform_selection(factor, factor, cx * (1 - factor), cy * (1 - factor))
+        self.request_repaint()
+
+    def nudge_selection(self, dx_pixels, dy_pixels):
+        """Moves the selection by whole image pixels; quick repeats merge into one undo step."""
+        if not self.image_size:
+            return
+        if not self._nudge_timer.isActive():
+            self._drag_id += 1
+        self.transform_selection(tx=dx_pixels / self.image_size[0], ty=dy_pixels / self.image_size[1],
+                                 drag_id=self._drag_id)
+        self._nudge_timer.start(self.NUDGE_COMMIT_DELAY_MS)
+        self.request_repaint()
+
+    def _handle_selection_key(self, event):
+        """Select-tool keys that act on the multi-selection. Returns True if handled."""
+        key = event.key()
+        if key == Qt.Key_A and event.modifiers() & Qt.ControlModifier:
+            self.set_selection(range(len(self.annotations)))
+            return True
+        if not self.selected_indices:
+            return False
+
+        step = self.NUDGE_STEP_LARGE if event.modifiers() & Qt.ShiftModifier else self.NUDGE_STEP
+        if key == Qt.Key_Left:
+            self.nudge_selection(-step, 0)
+        elif key == Qt.Key_Right:
+            self.nudge_selection(step, 0)
+        elif key == Qt.Key_Up:
+            self.nudge_selection(0, -step)
+        elif key == Qt.Key_Down:
+            self.nudge_selection(0, step)
+        elif key == Qt.Key_BracketRight:
+            self.scale_selection(self.SCALE_STEP)
+        elif key == Qt.Key_BracketLeft:
+            self.scale_selection(1 / self.SCALE_STEP)
+        elif key == Qt.Key_Delete or key == Qt.Key_Backspace:
+            self.delete_annotations(self.selected_indices)
+        elif key == Qt.Key_R:
+            self.relabel_annotations(self.selected_indices, self.active_label)
+        elif key == Qt.Key_Escape:
+            self.set_selection([])
+        else:
+            return False
+        return True
+
+    def _select_press(self, event):
+        mods = event.modifiers()
+        hit = self.find_clicked_annotation(event.pos())
+        if hit == -1:
+            if not mods & (Qt.ShiftModifier | Qt.ControlModifier):
+                self.set_selection([])
+            self.rubber_band_origin = event.pos()
+            self.rubber_band_end = event.pos()
+        elif mods & Qt.ControlModifier:
+            if hit in self.selected_indices:
+                self.set_selection([i for i in self.selected_indices if i != hit])
+            else:
+                self.set_selection(self.selected_indices + [hit])
+        elif mods & Qt.ShiftModifier:
+            self.set_selection(self.selected_indices + [hit])
+        else:
+            if hit not in self.selected_indices:
+                self.set_selection([hit])
+            self._group_move_last = event.pos()
+
+    def _select_move(self, event):
+        if self.rubber_band_origin is not None:
+            self.rubber_band_end = event.pos()
+            self.request_drag_repaint()
+        elif self._group_move_last is not None and self.image_size:
+            delta = event.pos() - self._group_move_last
+            self._group_move_last = event.pos()
+            display_rect = self.get_display_rect()
+            self.transform_selection(tx=delta.x() / display_rect.width(), ty=delta.y() / display_rect.height(),
+                                     drag_id=self._drag_id)
+            self.request_drag_repaint()
+
+    def _select_release(self, event):
+        if self.rubber_band_origin is not None:
+            self._select_in_rubber_band(bool(event.modifiers() & (Qt.ShiftModifier | Qt.ControlModifier)))
+            self.rubber_band_origin, self.rubber_band_end = None, None
+            self.request_repaint()
+        self._group_move_last = None
+        # The whole drag is one undo step and one save
+        self._finish_drag()
+
+    def relabel_annotations(self, ann_indices, label):
+        ann_indices = [i for i in ann_indices
+                       if 0 <= i < len(self.annotations) and self.annotations[i].get("label") != label]
+        if not ann_indices or not label:
+            return
+        self._execute(RelabelCommand(self.annotations, ann_indices, label))
+        self.request_repaint()
+
+    def request_repaint(self):
+        """Schedules a repaint. Qt merges pending requests into a single paint."""
+        self.repaints_requested += 1
+        self.update()
+
+    def request_drag_repaint(self):
+        """Schedules a repaint for continuous interaction, capped at MAX_DRAG_FPS."""
+        self.repaints_requested += 1
+        if self._drag_repaint_timer.isActive():
+            return
+        interval = 1000 // self.MAX_DRAG_FPS
+        elapsed = self._drag_repaint_clock.elapsed()
+        if elapsed >= interval:
+            self._flush_drag_repaint()
+        else:
+            self._drag_repaint_timer.start(interval - elapsed)
+
+    def _flush_drag_repaint(self):
+        self._drag_repaint_timer.stop()
+        self._drag_repaint_clock.restart()
+        self.update()
+
+    def get_repaint_counters(self):
+        return {"requested": self.repaints_requested, "painted": self.repaints_painted}
+
+    def reset_repaint_counters(self):
+        self.repaints_requested = 0
+        self.repaints_painted = 0
+
+    def _set_cursor_shape(self, shape):
+        if self.cursor().shape() != shape:
+            self.setCursor(shape)
+
+    def _hover_state(self):
+        return (self.hovered_ann_index, self.hovered_point_index,
+                self.hovered_segment_ann_index, self.hovered_segment_index)
+
     def set_keypoint_display_options(self, options):
         """Sets the display options for keypoints and triggers a repaint."""
         self.show_keypoints = options.get("show_keypoints", True)
         self.show_skeleton = options.get("show_skeleton", True)
         self.confidence_threshold = options.get("confidence_threshold", 0.5)
-        self.update()
+        self.request_repaint()
 
     def wheelEvent(self, event):
         if not self.pixmap:
@@ -76,10 +413,15 @@ class ImageViewer(QLabel):
         
         self.pan_offset.setX(mouse_pos.x() - mouse_x_rel_to_image * self.scale)
         self.pan_offset.setY(mouse_pos.y() - mouse_y_rel_to_image * self.scale)
-        self.update()
+        self._maybe_request_full_resolution()
+        self.request_repaint()
 
     def keyPressEvent(self, event):
+        if self.active_tool == "select" and self._handle_selection_key(event):
+            return
+
         key = event.key()
+        changed = True
         
         # Panning with arrow keys
         pan_speed = 15
@@ -95,6 +437,7 @@ class ImageViewer(QLabel):
         # Zooming with + and -
         elif key == Qt.Key_Plus or key == Qt.Key_Equal:
             self.scale *= 1.25
+            self._maybe_request_full_resolution()
         elif key == Qt.Key_Minus:
             self.scale /= 1.25
             
@@ -102,35 +445,75 @@ class ImageViewer(QLabel):
         elif key == Qt.Key_Return or key == Qt.Key_Enter or key == Qt.Key_N:
             if self.active_tool == 'polygon' and len(self.current_polygon_points) > 2:
                 self.finalize_polygon()
+            elif self.active_tool == 'wand' and self.wand_preview:
+                self.finalize_wand_selection()
+            else:
+                changed = False
 
         # Delete selected annotation or last polygon point
         elif key == Qt.Key_Delete or key == Qt.Key_Backspace:
             if self.selected_ann_index != -1:
-                del self.annotations[self.selected_ann_index]
-                self.selected_ann_index = -1
-                self.hovered_ann_index = -1
-                self.annotationsChanged.emit()
+                self.delete_annotations([self.selected_ann_index])
             elif self.active_tool == 'polygon' and self.current_polygon_points:
                 self.current_polygon_points.pop()
+            else:
+                changed = False
         
-        # Switch tools
+        # Switch tools (set_tool repaints on its own)
         elif key == Qt.Key_B:
             self.toolChanged.emit("bbox")
+            changed = False
         elif key == Qt.Key_P:
             self.toolChanged.emit("polygon")
+            changed = False
+        elif key == Qt.Key_M:
+            self.toolChanged.emit("mask")
+            changed = False
+        elif key == Qt.Key_V:
+            self.toolChanged.emit("select")
+            changed = False
+        elif key == Qt.Key_L and self.active_tool == "polygon":
+            self.set_livewire_enabled(not self.livewire_enabled)
+            changed = False
+        elif key == Qt.Key_W:
+            self.toolChanged.emit("wand")
+            changed = False
+        elif key == Qt.Key_Escape and self.active_tool == "wand":
+            self.clear_wand_selection()
+            changed = False
+
+        # Brush size with [ and ]
+        elif key == Qt.Key_BracketLeft and self.active_tool == "mask":
+            self.set_brush_radius(self.brush_radius / 1.25)
+            changed = False
+        elif key == Qt.Key_BracketRight and self.active_tool == "mask":
+            self.set_brush_radius(self.brush_radius * 1.25)
+            changed = False
+
+        # Magic wand tolerance with [ and ]; the selection is re-run from the same seed
+        elif key == Qt.Key_BracketLeft and self.active_tool == "wand":
+            self.set_wand_tolerance(self.wand_tolerance - self.WAND_TOLERANCE_STEP)
+            changed = False
+        elif key == Qt.Key_BracketRight and self.active_tool == "wand":
+            self.set_wand_tolerance(self.wand_tolerance + self.WAND_TOLERANCE_STEP)
+            changed = False
 
         elif key == Qt.Key_Control:
+            # Auto-repeat would otherwise repaint for every repeated press
+            changed = not self.ctrl_pressed
             self.ctrl_pressed = True
         else:
+            changed = False
             super().keyPressEvent(event)
             
-        self.update()
+        if changed:
+            self.request_repaint()
 
     def keyReleaseEvent(self, event):
         if event.key() == Qt.Key_Control:
             self.ctrl_pressed = False
             self.bordering_path_preview = [] # Clear preview
-            self.update()
+            self.request_repaint()
         super().keyReleaseEvent(event)
 
     def find_closest_vertex(self, pos, max_dist=10):
@@ -184,9 +567,10 @@ class ImageViewer(QLabel):
         return closest_ann_index, closest_segment_index
 
     def get_display_rect(self):
+        # Uses the full image size, so geometry is the same for a preview and the full pixmap
         if not self.pixmap:
             return QRectF()
-        return QRectF(self.pan_offset, QSizeF(self.pixmap.width() * self.scale, self.pixmap.height() * self.scale))
+        return QRectF(self.pan_offset, QSizeF(self.image_size[0] * self.scale, self.image_size[1] * self.scale))
 
     def to_relative_coords(self, point):
         if not self.pixmap:
@@ -213,31 +597,320 @@ class ImageViewer(QLabel):
         rel_coords = self.to_relative_coords(point)
         if rel_coords is None:
             return None
-        abs_x = rel_coords.x() * self.pixmap.width()
-        abs_y = rel_coords.y() * self.pixmap.height()
+        abs_x = rel_coords.x() * self.image_size[0]
+        abs_y = rel_coords.y() * self.image_size[1]
         return (int(abs_x), int(abs_y))
 
     def set_tool(self, tool_name):
         self.active_tool = tool_name
         self.current_polygon_points = []
         self.start_point, self.end_point = QPoint(), QPoint()
-        self.setCursor(Qt.CrossCursor if self.active_tool == "prompt" else Qt.ArrowCursor)
-        self.update()
+        self.brush_cursor_pos = None
+        self.rubber_band_origin, self.rubber_band_end = None, None
+        self._group_move_last = None
+        self.set_selection([])
+        self.livewire_preview = []
+        self._livewire_anchor = None
+        self.clear_wand_selection()
+        self.setCursor(Qt.CrossCursor if self.active_tool in ("prompt", "mask", "wand") else Qt.ArrowCursor)
+        self.request_repaint()
+
+    def set_brush_radius(self, radius):
+        old_rect = self._brush_cursor_rect()
+        self.brush_radius = max(self.MIN_BRUSH_RADIUS, min(self.MAX_BRUSH_RADIUS, radius))
+        self._update_brush_cursor(old_rect)
+
+    # --- Livewire ---
+    def set_livewire_enabled(self, enabled):
+        self.livewire_enabled = enabled
+        self.livewire_preview = []
+        self._livewire_anchor = None
+        if enabled and self._livewire is None and self.image_path:
+            self._livewire = Livewire()
+            self._livewire_ready = False
+            start_cost_map(self._livewire, self._livewire_signals, self.image_path, self._livewire_generation)
+        self._sync_livewire_anchor()
+        self.request_repaint()
+
+    def _reset_livewire(self):
+        # Maps still being built for the previous image are ignored
+        self._livewire_generation += 1
+        self._livewire = None
+        self._livewire_ready = False
+        self._livewire_anchor = None
+        self.livewire_preview = []
+
+    def _on_livewire_image_ready(self, generation):
+        if generation != self._livewire_generation:
+            return
+        self._livewire_ready = True
+        self._livewire_anchor = None
+        self._sync_livewire_anchor()
+        self.request_repaint()
+
+    def _on_livewire_anchor_ready(self, generation, anchor_generation):
+        if generation != self._livewire_generation or anchor_generation != self._livewire_anchor_generation:
+            return
+        self._update_livewire_preview(self.mapFromGlobal(QCursor.pos()))
+        self.request_repaint()
+
+    def _sync_livewire_anchor(self):
+        """Starts building shortest paths from the last polygon point if it changed."""
+        if not (self.livewire_enabled and self._livewire_ready and self.current_polygon_points):
+            return
+        anchor = self._to_image_point(self.current_polygon_points[-1])
+        if anchor == self._livewire_anchor:
+            return
+        self._livewire_anchor = anchor
+        self._livewire_anchor_generation += 1
+        self.livewire_preview = []
+        start_anchor_map(self._livewire, self._livewire_signals, anchor,
+                         self._livewire_generation, self._livewire_anchor_generation)
+
+    def _livewire_path(self, pos):
+        """Widget points of the edge-snapped path from the last anchor to pos, or [] if not ready."""
+        if not (self.livewire_enabled and self._livewire_ready and self._livewire_anchor
+                and self.current_polygon_points):
+            return []
+        path = self._livewire.path_to(self._livewire_anchor, self._to_image_point(pos))
+        if not path:
+            return []
+        return [QPointF(self.pan_offset.x() + x * self.scale, self.pan_offset.y() + y * self.scale).toPoint()
+                for x, y in path]
+
+    def _update_livewire_preview(self, pos):
+        self.livewire_preview = self._livewire_path(pos) if self.current_polygon_points else []
+
+    # --- Magic wand tool ---
+    def set_wand_tolerance(self, tolerance):
+        tolerance = max(0, min(255, tolerance))
+        if tolerance == self.wand_tolerance:
+            return
+        self.wand_tolerance = tolerance
+        if self.wand_seed is not None:
+            self._run_wand()
+        self.request_repaint()
+
+    def _run_wand(self):
+        self._wand_generation += 1
+        start_magic_wand(self._wand_signals, self.image_path, self.wand_seed,
+                         self.wand_tolerance, self._wand_generation)
+
+    def _on_wand_finished(self, generation, polygon):
+        if generation != self._wand_generation:
+            return
+        self.wand_preview = polygon or []
+        self.request_repaint()
+
+    def clear_wand_selection(self):
+        # Fills still in flight are ignored
+        self._wand_generation += 1
+        self.wand_seed = None
+        if self.wand_preview:
+            self.wand_preview = []
+            self.request_repaint()
+
+    def finalize_wand_selection(self):
+        if not self.active_label:
+            QMessageBox.warning(self, "No Label Selected", "Please select a class label before annotating.")
+            return
+        new_ann = {"label": self.active_label, "type": "polygon", "coords": self.wand_preview, "pinned": True}
+        self.clear_wand_selection()
+        self._execute(AddAnnotationsCommand([(len(self.annotations), new_ann)]))
+        self.request_repaint()
+
+    # --- Brush mask tool ---
+    def set_masks(self, labels, class_names):
+        """Replaces the mask layer, e.g. with masks loaded from disk."""
+        if self.mask_layer is None:
+            self.mask_layer = MaskLayer(labels.shape[1], labels.shape[0])
+        self.mask_layer.set_labels(labels, class_names)
+        # Recorded strokes refer to the old mask contents
+        self.history.clear()
+        self.request_repaint()
+
+    def _to_image_point(self, pos):
+        """Widget position to unclamped, fractional image pixel coordinates."""
+        return ((pos.x() - self.pan_offset.x()) / self.scale, (pos.y() - self.pan_offset.y()) / self.scale)
+
+    def _image_rect_to_widget(self, rect):
+        return QRectF(self.pan_offset.x() + rect.x() * self.scale, self.pan_offset.y() + rect.y() * self.scale,
+                      rect.width() * self.scale, rect.height() * self.scale).toAlignedRect().adjusted(-1, -1, 1, 1)
+
+    def _brush_cursor_rect(self):
+        if self.brush_cursor_pos is None:
+            return QRect()
+        r = int(self.brush_radius * self.scale) + 2
+        return QRect(self.brush_cursor_pos.x() - r, self.brush_cursor_pos.y() - r, 2 * r + 1, 2 * r + 1)
+
+    def _update_brush_cursor(self, old_rect):
+        """Repaints only the areas under the old and new brush outline."""
+        new_rect = self._brush_cursor_rect()
+        if old_rect != new_rect:
+            self.repaints_requested += 1
+            self.update(old_rect)
+            self.update(new_rect)
+
+    def _begin_stroke(self, pos, erase):
+        if not self.pixmap or not self.image_size:
+            return
+        if self.mask_layer is None:
+            self.mask_layer = MaskLayer(*self.image_size)
+        if erase:
+            value = 0
+        else:
+            if not self.active_label:
+                QMessageBox.warning(self, "No Label Selected", "Please select a class label before annotating.")
+                return
+            value = self.mask_layer.class_value(self.active_label)
+            if value is None:
+                QMessageBox.warning(self, "Too Many Classes", "A mask can hold at most 255 classes.")
+                return
+        self._stroke_value = value
+        # The stroke's bounding box isn't known until it ends; tiles it touches are saved as it goes
+        self._stroke_backup = {}
+        self._stroke_rect = QRect()
+        self._stroke_last = self._to_image_point(pos)
+        self._paint_stroke_to(pos)
+
+    def _paint_stroke_to(self, pos):
+        point = self._to_image_point(pos)
+        self._backup_stroke_tiles(self.mask_layer.stroke_rect(self._stroke_last, point, self.brush_radius))
+        rect = self.mask_layer.paint_segment(self._stroke_last, point, self.brush_radius, self._stroke_value)
+        self._stroke_last = point
+        if not rect.isEmpty():
+            self._stroke_rect = self._stroke_rect.united(rect)
+            self.repaints_requested += 1
+            self.update(self._image_rect_to_widget(rect))
+
+    def _backup_stroke_tiles(self, rect):
+        """Saves the pre-stroke contents of the tiles under `rect` the stroke hasn't reached yet."""
+        if rect.isEmpty():
+            return
+        tile = self.STROKE_TILE
+        labels = self.mask_layer.labels
+        for ty in range(rect.y() // tile, (rect.y() + rect.height() - 1) // tile + 1):
+            for tx in range(rect.x() // tile, (rect.x() + rect.width() - 1) // tile + 1):
+                if (tx, ty) not in self._stroke_backup:
+                    self._stroke_backup[(tx, ty)] = labels[ty * tile:(ty + 1) * tile,
+                                                           tx * tile:(tx + 1) * tile].copy()
+
+    def _end_stroke(self):
+        if self._stroke_value is None:
+            return
+        rect, backup = self._stroke_rect, self._stroke_backup
+        self._stroke_value, self._stroke_last, self._stroke_rect, self._stroke_backup = None, None, None, None
+        if rect.isEmpty():
+            return
+        # Pixels outside the saved tiles were not painted, so they already hold their pre-stroke values
+        after = self.mask_layer.read_patch(rect)
+        before = after.copy()
+        tile = self.STROKE_TILE
+        for (tx, ty), saved in backup.items():
+            x0, y0 = max(tx * tile, rect.x()), max(ty * tile, rect.y())
+            x1 = min(tx * tile + saved.shape[1], rect.x() + rect.width())
+            y1 = min(ty * tile + saved.shape[0], rect.y() + rect.height())
+            if x0 < x1 and y0 < y1:
+                before[y0 - rect.y():y1 - rect.y(), x0 - rect.x():x1 - rect.x()] = \
+                    saved[y0 - ty * tile:y1 - ty * tile, x0 - tx * tile:x1 - tx * tile]
+        if (before == after).all():
+            return
+        self.history.push(MaskStrokeCommand(self.mask_layer, rect, before, after))
+        self.annotationsCommitted.emit()
 
     def set_active_label(self, label):
         self.active_label = label
 
     def load_image(self, path):
-        self.pixmap = QPixmap(path)
-        if not self.pixmap:
+        self.set_image_source(path)
+        self.ensure_image_loaded()
+
+    def set_image_source(self, path):
+        """Remembers the image path and reads its size from the header without decoding it."""
+        self.image_path = path
+        self.clear_wand_selection()
+        self._reset_livewire()
+        if self.livewire_enabled:
+            self.set_livewire_enabled(True)
+        self.unload_image()
+        self.image_size = None
+        self.view_initialized = False
+        size = QImageReader(path).size()
+        if size.isValid():
+            self.image_size = (size.width(), size.height())
+
+    def is_image_loaded(self):
+        return self.pixmap is not None
+
+    def ensure_image_loaded(self):
+        """
+        Starts decoding the image on a worker thread if it isn't loaded yet.
+
+        A screen-sized preview is decoded first so something is shown almost
+        immediately; the full resolution is only decoded once the user zooms
+        past what the preview can show (see _maybe_request_full_resolution).
+        """
+        if self.pixmap is not None or not self.image_path or self._decoding:
+            return
+        scaled_size = None
+        if self.image_size:
+            scaled_size = preview_size(QSize(*self.image_size), self._preview_bounds())
+        self._decoding = True
+        start_decode(self._decode_signals, self.image_path, self._decode_generation, scaled_size)
+
+    def _preview_bounds(self):
+        screen = QApplication.primaryScreen()
+        bounds = screen.size() * screen.devicePixelRatio() if screen else QSize(1920, 1080)
+        return bounds.expandedTo(self.size())
+
+    def _on_image_decoded(self, generation, image, is_full_resolution):
+        if generation != self._decode_generation:
             return
+        self._decoding = False
+        if image.isNull():
+            return
+        self.pixmap = QPixmap.fromImage(image)
+        self.has_full_resolution = is_full_resolution
+        if is_full_resolution or not self.image_size:
+            self.image_size = (self.pixmap.width(), self.pixmap.height())
 
         self.setMinimumSize(1, 1) # Allow the widget to shrink
-        
+        if not self.view_initialized:
+            self.fit_to_view()
+            self.view_initialized = True
+        self.pixmapChanged.emit()
+        # A restored zoom level may already need more than the preview
+        self._maybe_request_full_resolution()
+        self.request_repaint()
+
+    def _maybe_request_full_resolution(self):
+        """Decode the full image in the background once the preview is being upscaled."""
+        if (self.pixmap is None or self.has_full_resolution or self._decoding
+                or self.image_size[0] * self.scale <= self.pixmap.width()):
+            return
+        self._decoding = True
+        start_decode(self._decode_signals, self.image_path, self._decode_generation)
+
+    def unload_image(self):
+        """Drops the decoded pixmap. Annotations, zoom and pan are kept."""
+        self.pixmap = None
+        self.has_full_resolution = False
+        self._decoding = False
+        # Results of decodes still in flight are ignored
+        self._decode_generation += 1
+        self.pixmapChanged.emit()
+
+    def pixmap_bytes(self):
+        """Approximate memory held by the decoded pixmap."""
+        if self.pixmap is None:
+            return 0
+        return self.pixmap.width() * self.pixmap.height() * max(self.pixmap.depth(), 8) // 8
+
+    def fit_to_view(self):
         # Calculate the scale factor to fit the image in the view
         if self.width() > 0 and self.height() > 0:
-            w_ratio = self.width() / self.pixmap.width()
-            h_ratio = self.height() / self.pixmap.height()
+            w_ratio = self.width() / self.image_size[0]
+            h_ratio = self.height() / self.image_size[1]
             self.fit_in_view_scale = min(w_ratio, h_ratio)
             self.scale = self.fit_in_view_scale
         else:
@@ -246,7 +919,6 @@ class ImageViewer(QLabel):
             self.scale = 1.0
             
         self.pan_offset = QPointF(0.0, 0.0)
-        self.update()
 
     def center_on_point(self, point_rel):
         """Centers the view on a point given in relative image coordinates."""
@@ -254,8 +926,8 @@ class ImageViewer(QLabel):
             return
         
         # Point in absolute image coordinates
-        abs_x = point_rel.x() * self.pixmap.width()
-        abs_y = point_rel.y() * self.pixmap.height()
+        abs_x = point_rel.x() * self.image_size[0]
+        abs_y = point_rel.y() * self.image_size[1]
         
         # Desired center of the widget
         widget_center_x = self.width() / 2
@@ -264,15 +936,19 @@ class ImageViewer(QLabel):
         # New pan offset
         self.pan_offset.setX(widget_center_x - abs_x * self.scale)
         self.pan_offset.setY(widget_center_y - abs_y * self.scale)
-        self.update()
+        self.request_repaint()
 
     def get_image_details(self):
-        if not self.pixmap: return None, 0, 0
-        return self.property("image_path"), self.pixmap.width(), self.pixmap.height()
+        if not self.image_size: return None, 0, 0
+        return self.property("image_path"), self.image_size[0], self.image_size[1]
 
     def load_annotations(self, annotations):
+        # Recorded deltas refer to indices in the old list, so a new list resets history
+        if annotations is not self.annotations:
+            self.history.clear()
+        self.history.mark_dirty()
         self.annotations = annotations
-        self.update()
+        self.request_repaint()
 
     def mousePressEvent(self, event):
         # --- PANNING ---
@@ -280,7 +956,33 @@ class ImageViewer(QLabel):
             self.pan_start_pos = event.pos()
             return
 
+        # --- MAGIC WAND: left click selects a region, right click clears it ---
+        if self.active_tool == "wand":
+            if event.button() == Qt.LeftButton:
+                seed = self.to_absolute_image_coords(event.pos())
+                if seed is not None:
+                    self.wand_seed = seed
+                    self._run_wand()
+            elif event.button() == Qt.RightButton:
+                self.clear_wand_selection()
+            return
+
+        # --- SELECT: click, Ctrl/Shift+click and rubber band; drag moves the selection ---
+        if self.active_tool == "select":
+            if event.button() == Qt.LeftButton:
+                self._drag_id += 1
+                self._select_press(event)
+            return
+
+        # --- BRUSH MASK: left paints with the active label, right erases ---
+        if self.active_tool == "mask":
+            if event.button() in (Qt.LeftButton, Qt.RightButton) and self._stroke_value is None:
+                self._begin_stroke(event.pos(), erase=event.button() == Qt.RightButton)
+            return
+
         if event.button() == Qt.LeftButton:
+            self._drag_id += 1
+
             # --- KEYPOINT CREATION ---
             if self.active_tool == "keypoint":
                 if not self.active_label:
@@ -294,7 +996,8 @@ class ImageViewer(QLabel):
                 # If a keypoint annotation is already selected, add a point to it
                 if self.selected_ann_index != -1 and self.annotations[self.selected_ann_index].get("type") == "keypoint":
                     ann = self.annotations[self.selected_ann_index]
-                    ann["points"].append([new_point_rel.x(), new_point_rel.y(), 1.0])
+                    self._execute(InsertVertexCommand(self.selected_ann_index, len(ann["points"]), "points",
+                                                      [new_point_rel.x(), new_point_rel.y(), 1.0]))
                 else:
                     # Otherwise, create a new keypoint annotation
                     new_ann = {
@@ -304,11 +1007,10 @@ class ImageViewer(QLabel):
                         "skeleton": [], # Add a default empty skeleton
                         "pinned": True
                     }
-                    self.annotations.append(new_ann)
+                    self._execute(AddAnnotationsCommand([(len(self.annotations), new_ann)]))
                     self.selected_ann_index = len(self.annotations) - 1
 
-                self.annotationsChanged.emit()
-                self.update()
+                self.request_repaint()
                 return # End here for keypoint tool
 
             # --- MOVING/SELECTING ANNOTATION ---
@@ -340,7 +1042,7 @@ class ImageViewer(QLabel):
                         self.bordering_start_pt_index = pt_idx
                         coords = self.annotations[ann_idx]['coords'][pt_idx]
                         self.current_polygon_points.append(self.to_widget_coords(QPointF(coords[0], coords[1])))
-                        self.update()
+                        self.request_repaint()
                         return
                     # End bordering
                     elif self.bordering_ann_index == ann_idx:
@@ -349,7 +1051,7 @@ class ImageViewer(QLabel):
                         self.bordering_ann_index = -1
                         self.bordering_start_pt_index = -1
                         self.bordering_path_preview = []
-                        self.update()
+                        self.request_repaint()
                         return
 
             # --- EDITING ACTIONS (if not drawing new polygon) ---
@@ -361,20 +1063,19 @@ class ImageViewer(QLabel):
                     if seg_idx != -1:
                         new_point_rel = self.to_relative_coords(event.pos())
                         if new_point_rel:
-                            self.annotations[ann_idx]["coords"].insert(seg_idx + 1, [new_point_rel.x(), new_point_rel.y()])
-                            self.annotationsChanged.emit()
+                            self._execute(InsertVertexCommand(ann_idx, seg_idx + 1, "coords",
+                                                              [new_point_rel.x(), new_point_rel.y()]))
                             self.selected_ann_index = ann_idx
                             self.selected_point_index = seg_idx + 1
-                            self.update()
+                            self.request_repaint()
                         return
                 
                 ann_idx, pt_idx = self.find_closest_vertex(event.pos())
                 # Delete point with Alt+Click
                 if mods & Qt.AltModifier and pt_idx != -1:
                     if len(self.annotations[ann_idx]["coords"]) > 3:
-                        del self.annotations[ann_idx]["coords"][pt_idx]
-                        self.annotationsChanged.emit()
-                        self.update()
+                        self._execute(DeleteVertexCommand(self.annotations, ann_idx, pt_idx, "coords"))
+                        self.request_repaint()
                     return
 
                 # Select point for dragging
@@ -408,61 +1109,82 @@ class ImageViewer(QLabel):
             self.end_point = event.pos()
         elif self.active_tool == "polygon":
             if event.button() == Qt.LeftButton:
+                # With livewire the edge-snapped path to the click is kept, without its end points
+                self.current_polygon_points.extend(self._livewire_path(event.pos())[1:-1])
                 self.current_polygon_points.append(event.pos())
             elif event.button() == Qt.RightButton:
                 if self.current_polygon_points:
                     self.current_polygon_points.pop()
+            self.livewire_preview = []
+            self._sync_livewire_anchor()
 
     def mouseMoveEvent(self, event):
-        self.setCursor(Qt.ArrowCursor) # Reset cursor initially
-
         if event.buttons() & Qt.MiddleButton:
+            self._set_cursor_shape(Qt.ArrowCursor)
             self.pan_offset += event.pos() - self.pan_start_pos
             self.pan_start_pos = event.pos()
-            self.update()
+            self.request_drag_repaint()
+            return
+
+        if self.active_tool == "select":
+            if event.buttons() & Qt.LeftButton:
+                self._select_move(event)
+            return
+
+        if self.active_tool == "mask":
+            old_rect = self._brush_cursor_rect()
+            self.brush_cursor_pos = event.pos()
+            if self._stroke_value is not None:
+                self._paint_stroke_to(event.pos())
+            self._update_brush_cursor(old_rect)
             return
 
         if event.buttons() & Qt.LeftButton and self.selected_point_index != -1:
+            self._set_cursor_shape(Qt.ArrowCursor)
             new_pos = self.to_relative_coords(event.pos())
             if new_pos:
                 ann = self.annotations[self.selected_ann_index]
-                if ann['type'] == 'polygon':
-                    ann["coords"][self.selected_point_index] = [new_pos.x(), new_pos.y()]
-                elif ann['type'] == 'keypoint':
-                    ann["points"][self.selected_point_index][0] = new_pos.x()
-                    ann["points"][self.selected_point_index][1] = new_pos.y()
-                self.annotationsChanged.emit()
-            self.update()
+                key = "points" if ann['type'] == 'keypoint' else "coords"
+                if ann['type'] in ('polygon', 'keypoint'):
+                    old_xy = ann[key][self.selected_point_index][:2]
+                    self._execute(MoveVertexCommand(self.selected_ann_index, self.selected_point_index, key,
+                                                    old_xy, (new_pos.x(), new_pos.y()), self._drag_id),
+                                  merge=True)
+                self.request_drag_repaint()
             return
 
         if event.buttons() & Qt.LeftButton and self.moving_ann_index != -1:
+            self._set_cursor_shape(Qt.ArrowCursor)
             ann = self.annotations[self.moving_ann_index]
             new_origin_widget = event.pos() - self.grab_offset
             new_origin_rel = self.to_relative_coords(new_origin_widget)
 
             if new_origin_rel and self.moving_ann_initial_coords:
+                # Only the step since the last event is recorded; drag steps merge
                 if ann['type'] == 'bbox':
-                    initial_origin_rel = QPointF(self.moving_ann_initial_coords[0], self.moving_ann_initial_coords[1])
-                    delta_rel = new_origin_rel - initial_origin_rel
-                    ann['coords'][0] = self.moving_ann_initial_coords[0] + delta_rel.x()
-                    ann['coords'][1] = self.moving_ann_initial_coords[1] + delta_rel.y()
+                    current_origin_rel = QPointF(ann['coords'][0], ann['coords'][1])
                 else: # polygon
-                    initial_origin_rel = QPointF(self.moving_ann_initial_coords[0][0], self.moving_ann_initial_coords[0][1])
-                    delta_rel = new_origin_rel - initial_origin_rel
-                    for i, p_initial in enumerate(self.moving_ann_initial_coords):
-                        ann['coords'][i][0] = p_initial[0] + delta_rel.x()
-                        ann['coords'][i][1] = p_initial[1] + delta_rel.y()
-
-                self.annotationsChanged.emit()
-                self.update()
+                    current_origin_rel = QPointF(ann['coords'][0][0], ann['coords'][0][1])
+                delta_rel = new_origin_rel - current_origin_rel
+                self._execute(MoveAnnotationsCommand([self.moving_ann_index], delta_rel.x(), delta_rel.y(),
+                                                     self._drag_id), merge=True)
+                self.request_drag_repaint()
             return
 
-        if self.active_tool == "polygon" and self.current_polygon_points and (event.modifiers() & Qt.ShiftModifier):
-            if (event.pos() - self.current_polygon_points[-1]).manhattanLength() > 15:
-                self.current_polygon_points.append(event.pos())
-                self.update()
+        # The in-progress polygon and bbox previews follow the cursor
+        preview_changed = False
+        if self.active_tool == "polygon" and self.current_polygon_points:
+            preview_changed = True
+            if event.modifiers() & Qt.ShiftModifier:
+                if (event.pos() - self.current_polygon_points[-1]).manhattanLength() > 15:
+                    self.current_polygon_points.append(event.pos())
+            if self.livewire_enabled:
+                self._sync_livewire_anchor()
+                self._update_livewire_preview(event.pos())
 
         # Hovering logic
+        previous_hover = self._hover_state()
+        previous_bordering_preview = self.bordering_path_preview
         self.hovered_ann_index, self.hovered_point_index = -1, -1
         self.hovered_segment_ann_index, self.hovered_segment_index = -1, -1
         
@@ -479,12 +1201,19 @@ class ImageViewer(QLabel):
                 self.hovered_ann_index, self.hovered_point_index = self.find_closest_vertex(event.pos())
 
         if self.hovered_point_index != -1 or self.hovered_segment_index != -1:
-            self.setCursor(Qt.PointingHandCursor)
-        elif self.active_tool == 'prompt':
-            self.setCursor(Qt.CrossCursor)
-        elif self.active_tool == "bbox" and event.buttons() & Qt.LeftButton:
-            self.end_point = event.pos()
-        self.update()
+            self._set_cursor_shape(Qt.PointingHandCursor)
+        elif self.active_tool in ('prompt', 'wand'):
+            self._set_cursor_shape(Qt.CrossCursor)
+        else:
+            self._set_cursor_shape(Qt.ArrowCursor)
+            if self.active_tool == "bbox" and event.buttons() & Qt.LeftButton:
+                self.end_point = event.pos()
+                preview_changed = True
+
+        if self._hover_state() != previous_hover or self.bordering_path_preview != previous_bordering_preview:
+            self.request_repaint()
+        elif preview_changed:
+            self.request_drag_repaint()
 
     def update_bordering_preview(self, mouse_pos):
         self.bordering_path_preview = []
@@ -521,13 +1250,32 @@ class ImageViewer(QLabel):
             self.bordering_path_preview.append(self.to_widget_coords(QPointF(p_coords[0], p_coords[1])))
 
     def mouseReleaseEvent(self, event):
+        # Show the final drag position without waiting for the frame cap
+        if self._drag_repaint_timer.isActive():
+            self._flush_drag_repaint()
+        if self.active_tool == "select":
+            if event.button() == Qt.LeftButton:
+                self._select_release(event)
+            return
+        if self.active_tool == "mask":
+            if event.button() in (Qt.LeftButton, Qt.RightButton):
+                self._end_stroke()
+            return
         if event.button() == Qt.LeftButton:
+            self._finish_drag()
             self.selected_ann_index, self.selected_point_index = -1, -1
             self.moving_ann_index = -1
             self.moving_ann_initial_coords = None
             if self.active_tool == "bbox":
                 self.finalize_bbox()
 
+    def leaveEvent(self, event):
+        if self.brush_cursor_pos is not None:
+            old_rect = self._brush_cursor_rect()
+            self.brush_cursor_pos = None
+            self._update_brush_cursor(old_rect)
+        super().leaveEvent(event)
+
     def find_clicked_annotation(self, pos):
         # Iterate backwards to select the top-most annotation
         for i in range(len(self.annotations) - 1, -1, -1):
@@ -561,7 +1309,7 @@ class ImageViewer(QLabel):
         if not self.active_label:
             QMessageBox.warning(self, "No Label Selected", "Please select a class label before annotating.")
             self.start_point, self.end_point = QPoint(), QPoint()
-            self.update()
+            self.request_repaint()
             return
         
         start_rel, end_rel = self.to_relative_coords(self.start_point), self.to_relative_coords(self.end_point)
@@ -573,16 +1321,16 @@ class ImageViewer(QLabel):
             if rect.width() < 0.001 and rect.height() < 0.001:
                 return
             
-            self.annotations.append({"label": self.active_label, "type": "bbox", "coords": [rect.x(), rect.y(), rect.width(), rect.height()], "pinned": True})
-            self.annotationsChanged.emit()
+            new_ann = {"label": self.active_label, "type": "bbox", "coords": [rect.x(), rect.y(), rect.width(), rect.height()], "pinned": True}
+            self._execute(AddAnnotationsCommand([(len(self.annotations), new_ann)]))
             # Removed the call to self.center_on_point(rect.center())
-            self.update()
+            self.request_repaint()
 
     def finalize_polygon(self):
         if not self.active_label:
             QMessageBox.warning(self, "No Label Selected", "Please select a class label before annotating.")
             self.current_polygon_points = []
-            self.update()
+            self.request_repaint()
             return
             
         relative_points = [self.to_relative_coords(p) for p in self.current_polygon_points]
@@ -590,32 +1338,46 @@ class ImageViewer(QLabel):
         relative_points = [p for p in relative_points if p is not None]
         
         if len(relative_points) > 2:
-            self.annotations.append({"label": self.active_label, "type": "polygon", "coords": [[p.x(), p.y()] for p in relative_points], "pinned": True})
-            self.annotationsChanged.emit()
+            new_ann = {"label": self.active_label, "type": "polygon", "coords": [[p.x(), p.y()] for p in relative_points], "pinned": True}
+            self._execute(AddAnnotationsCommand([(len(self.annotations), new_ann)]))
             
             # Calculate centroid and center on it
             sum_x = sum(p.x() for p in relative_points)
             sum_y = sum(p.y() for p in relative_points)
             centroid = QPointF(sum_x / len(relative_points), sum_y / len(relative_points))
             self.center_on_point(centroid)
-        self.update()
+        self.request_repaint()
 
     def paintEvent(self, event):
+        self.repaints_painted += 1
         super().paintEvent(event)
         painter = QPainter(self)
         if not self.pixmap:
-            painter.drawText(self.rect(), Qt.AlignCenter, "No image loaded")
+            painter.drawText(self.rect(), Qt.AlignCenter, "Loading image..." if self.image_path else "No image loaded")
             return
 
         display_rect = self.get_display_rect()
         painter.drawPixmap(display_rect.toRect(), self.pixmap, self.pixmap.rect())
 
+        if self.mask_layer is not None:
+            # Only the exposed part of the mask is converted and scaled
+            x0, y0 = self._to_image_point(event.rect().topLeft())
+            x1, y1 = self._to_image_point(event.rect().bottomRight())
+            source = QRect(int(x0) - 1, int(y0) - 1, int(x1 - x0) + 3, int(y1 - y0) + 3).intersected(
+                QRect(0, 0, self.mask_layer.width, self.mask_layer.height))
+            if not source.isEmpty():
+                target = QRectF(self.pan_offset.x() + source.x() * self.scale,
+                                self.pan_offset.y() + source.y() * self.scale,
+                                source.width() * self.scale, source.height() * self.scale)
+                painter.drawImage(target, self.mask_layer.image(), QRectF(source))
+
         painter.setRenderHint(QPainter.Antialiasing)
         
+        multi_selected = set(self.selected_indices)
         for i, ann in enumerate(self.annotations):
             label, coords = ann.get("label", "N/A"), ann.get("coords", [])
             
-            is_selected = (i == self.selected_ann_index)
+            is_selected = (i == self.selected_ann_index or i in multi_selected)
             pen_color = QColor(255, 255, 0, 220) if is_selected else QColor(0, 255, 0, 180)
             pen_width = 4 if is_selected else 2
             painter.setPen(QPen(pen_color, pen_width))
@@ -712,4 +1474,28 @@ class ImageViewer(QLabel):
             # Draw the regular polyline for the new polygon
             painter.setPen(pen)
             points = self.current_polygon_points + [self.mapFromGlobal(self.cursor().pos())]
-            painter.drawPolyline(QPolygonF(points))
\ No newline at end of file
+            if self.livewire_preview:
+                points = self.current_polygon_points + self.livewire_preview[1:]
+            painter.drawPolyline(QPolygonF(points))
+        elif self.active_tool == "wand":
+            if self.wand_preview:
+                painter.setPen(QPen(QColor(0, 200, 255, 230), 2, Qt.DashLine))
+                painter.setBrush(QColor(0, 200, 255, 50))
+                painter.drawPolygon(QPolygonF([self.to_widget_coords(QPointF(p[0], p[1])) for p in self.wand_preview]))
+                painter.setBrush(Qt.NoBrush)
+            painter.setPen(QColor(255, 255, 255))
+            painter.drawText(10, 20, f"Tolerance: {self.wand_tolerance}  ([ / ] to adjust, Enter to accept)")
+        elif self.active_tool == "mask" and self.brush_cursor_pos is not None:
+            painter.setPen(QPen(QColor(255, 255, 255, 220), 1))
+            radius = self.brush_radius * self.scale
+            painter.drawEllipse(QPointF(self.brush_cursor_pos), radius, radius)
+
+        if self.active_tool == "polygon" and self.livewire_enabled:
+            painter.setPen(QColor(255, 255, 255))
+            status = "on" if self._livewire_ready else "building edge map..."
+            painter.drawText(10, 20, f"Livewire: {status}  (L to toggle)")
+
+        if self.rubber_band_origin is not None:
+            painter.setPen(QPen(QColor(0, 170, 255, 220), 1, Qt.DashLine))
+            painter.setBrush(QColor(0, 170, 255, 40))
+            painter.drawRect(QRect(self.rubber_band_origin, self.rubber_band_end).normalized())
@@ -0,0 +1,155 @@
+# C:\LabelAI\ui\livewire.py
+
+"""
+Livewire (intelligent scissors) support for the polygon tool.
+
+Uses OpenCV's IntelligentScissorsMB, which splits the work into three steps
+of very different cost:
+
+1. applyImage: the edge/gradient cost map, once per image.
+2. buildMap: shortest paths from an anchor to every pixel, once per anchor.
+3. getContour: reading one path out of that map, cheap enough for every
+   mouse move.
+
+The first two run on QThreadPool workers; only the third runs on the GUI
+thread. Large images are processed at a reduced size so both background
+steps stay quick.
+"""
+
+import threading
+
+import cv2
+import numpy as np
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+from .magic_wand import image_array_cache
+
+
+class LivewireSignals(QObject):
+    """
+    Signals:
+        imageReady (int): the cost map for the given image generation is built.
+        anchorReady (int, int): image generation and anchor generation whose
+            shortest-path map is built.
+    """
+    imageReady = pyqtSignal(int)
+    anchorReady = pyqtSignal(int, int)
+
+
+class Livewire:
+    """
+    Cost map and shortest-path state for one image. Points are in full
+    image pixel coordinates; scaling to the working size is internal.
+    """
+    MAX_SIDE = 2048
+
+    def __init__(self):
+        self.scissors = None
+        self.scale = 1.0
+        self.work_size = (0, 0)
+        self.anchor = None
+        self.map_ready = False
+        # IntelligentScissorsMB isn't thread-safe; workers and the GUI thread share it
+        self._lock = threading.Lock()
+
+    def apply_image(self, image):
+        height, width = image.shape[:2]
+        scale = min(1.0, self.MAX_SIDE / max(height, width))
+        if scale < 1.0:
+            image = cv2.resize(image, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA)
+        scissors = cv2.segmentation.IntelligentScissorsMB()
+        scissors.setEdgeFeatureCannyParameters(32, 100)
+        scissors.setGradientMagnitudeMaxLimit(200)
+        scissors.applyImage(image)
+        with self._lock:
+            self.scissors = scissors
+            self.scale = scale
+            self.work_size = (image.shape[1], image.shape[0])
+            self.anchor = None
+            self.map_ready = False
+
+    def _to_work(self, point):
+        """Image coordinates to a pixel of the working image, clamped to its bounds."""
+        x = min(self.work_size[0] - 1, max(0, int(point[0] * self.scale)))
+        y = min(self.work_size[1] - 1, max(0, int(point[1] * self.scale)))
+        return (x, y)
+
+    def build_map(self, anchor):
+        with self._lock:
+            if self.scissors is None:
+                return False
+            self.map_ready = False
+            self.anchor = anchor
+            self.scissors.buildMap(self._to_work(anchor))
+            self.map_ready = True
+            return True
+
+    def path_to(self, anchor, target, epsilon=1.0):
+        """
+        The edge-following path from `anchor` to `target`, simplified and in
+        image coordinates. Returns None unless the map for that anchor is built
+        and not in use by a worker.
+        """
+        if not self._lock.acquire(blocking=False):
+            return None
+        try:
+            if not self.map_ready or self.anchor != anchor:
+                return None
+            contour = self.scissors.getContour(self._to_work(target))
+        except cv2.error:
+            return None
+        finally:
+            self._lock.release()
+        if contour is None or len(contour) == 0:
+            return None
+        contour = cv2.approxPolyDP(contour, epsilon, False).reshape(-1, 2)
+        return (contour.astype(np.float64) / self.scale).tolist()
+
+
+class LivewireImageTask(QRunnable):
+    def __init__(self, livewire, signals, path, generation):
+        super().__init__()
+        self.livewire = livewire
+        self.signals = signals
+        self.path = path
+        self.generation = generation
+
+    def run(self):
+        image = image_array_cache.get(self.path)
+        if image is None:
+            return
+        try:
+            self.livewire.apply_image(image)
+        except cv2.error as e:
+            print(f"Could not build livewire cost map for {self.path}: {e}")
+            return
+        try:
+            self.signals.imageReady.emit(self.generation)
+        except RuntimeError:
+            pass  # The receiving viewer was deleted in the meantime
+
+
+class LivewireAnchorTask(QRunnable):
+    def __init__(self, livewire, signals, anchor, generation, anchor_generation):
+        super().__init__()
+        self.livewire = livewire
+        self.signals = signals
+        self.anchor = anchor
+        self.generation = generation
+        self.anchor_generation = anchor_generation
+
+    def run(self):
+        if not self.livewire.build_map(self.anchor):
+            return
+        try:
+            self.signals.anchorReady.emit(self.generation, self.anchor_generation)
+        except RuntimeError:
+            pass
+
+
+def start_cost_map(livewire, signals, path, generation):
+    QThreadPool.globalInstance().start(LivewireImageTask(livewire, signals, path, generation))
+
+
+def start_anchor_map(livewire, signals, anchor, generation, anchor_generation):
+    QThreadPool.globalInstance().start(LivewireAnchorTask(livewire, signals, anchor, generation, anchor_generation))
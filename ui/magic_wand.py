@@ -0,0 +1,136 @@
+# C:\LabelAI\ui\magic_wand.py
+
+"""
+Magic-wand region selection: flood fill from a seed pixel within a colour
+tolerance, then trace the filled region's outline as a polygon.
+
+Fills run on QThreadPool workers against decoded images kept in a small
+shared cache, so repeated clicks and tolerance changes on the same image
+never re-read the file.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+
+class ImageArrayCache:
+    """
+    Thread-safe LRU cache of decoded images as BGR uint8 arrays, keyed by
+    path and invalidated when the file's modification time changes.
+    """
+
+    def __init__(self, max_images=3):
+        self.max_images = max_images
+        self._entries = OrderedDict()  # path -> (mtime, array)
+        self._lock = threading.Lock()
+
+    def get(self, path):
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return None
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == mtime:
+                self._entries.move_to_end(path)
+                return entry[1]
+
+        # Decode outside the lock so other images stay available meanwhile
+        # Stored coordinates and the viewer use the pixels as stored, so
+        # EXIF orientation is not applied
+        array = cv2.imread(path, cv2.IMREAD_COLOR | cv2.IMREAD_IGNORE_ORIENTATION)
+        if array is None:
+            return None
+        with self._lock:
+            self._entries[path] = (mtime, array)
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_images:
+                self._entries.popitem(last=False)
+        return array
+
+    def discard(self, path):
+        with self._lock:
+            self._entries.pop(path, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+image_array_cache = ImageArrayCache()
+
+
+def flood_fill_polygon(image, seed, tolerance, epsilon=1.0):
+    """
+    Flood fills `image` from `seed` (x, y in pixels), accepting neighbours whose
+    colour differs from the seed colour by at most `tolerance` per channel.
+
+    Returns the outline of the filled region as [[x, y], ...] in pixels,
+    or None if the region is too small to form a polygon.
+    """
+    height, width = image.shape[:2]
+    x, y = int(seed[0]), int(seed[1])
+    if not (0 <= x < width and 0 <= y < height):
+        return None
+
+    # floodFill needs a mask two pixels larger than the image
+    mask = np.zeros((height + 2, width + 2), dtype=np.uint8)
+    diff = (tolerance,) * 3
+    flags = 8 | cv2.FLOODFILL_FIXED_RANGE | cv2.FLOODFILL_MASK_ONLY | (255 << 8)
+    cv2.floodFill(image, mask, (x, y), 0, diff, diff, flags)
+
+    contours, _ = cv2.findContours(mask[1:-1, 1:-1], cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if not contours:
+        return None
+    contour = max(contours, key=cv2.contourArea)
+    contour = cv2.approxPolyDP(contour, epsilon, True)
+    if len(contour) < 3:
+        return None
+    return contour.reshape(-1, 2).tolist()
+
+
+class MagicWandSignals(QObject):
+    """
+    Signals:
+        finished (int, object): request generation and the polygon in relative
+            image coordinates, or None if nothing usable was selected.
+    """
+    finished = pyqtSignal(int, object)
+
+
+class MagicWandTask(QRunnable):
+    """Runs one flood fill on a worker thread."""
+
+    def __init__(self, signals, path, seed, tolerance, generation):
+        super().__init__()
+        self.signals = signals
+        self.path = path
+        self.seed = seed
+        self.tolerance = tolerance
+        self.generation = generation
+
+    def run(self):
+        polygon = None
+        image = image_array_cache.get(self.path)
+        if image is not None:
+            try:
+                points = flood_fill_polygon(image, self.seed, self.tolerance)
+            except cv2.error as e:
+                print(f"Magic wand failed on {self.path}: {e}")
+                points = None
+            if points:
+                height, width = image.shape[:2]
+                polygon = [[px / width, py / height] for px, py in points]
+        try:
+            self.signals.finished.emit(self.generation, polygon)
+        except RuntimeError:
+            pass  # The receiving viewer was deleted in the meantime
+
+
+def start_magic_wand(signals, path, seed, tolerance, generation):
+    QThreadPool.globalInstance().start(MagicWandTask(signals, path, seed, tolerance, generation))
@@ -1,12 +1,13 @@
 import os
 import json
 import shutil
+from collections import OrderedDict
 
 from PyQt5.QtWidgets import (
     QMainWindow, QAction, QFileDialog, QTabWidget, QWidget, QHBoxLayout, 
     QVBoxLayout, QPushButton, QSplitter, QStackedWidget, QMessageBox, 
     QActionGroup, QButtonGroup, QStyle, QInputDialog, QLabel, QSpinBox,
-    QApplication
+    QApplication, QProgressDialog
 )
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QIcon
@@ -16,15 +17,50 @@ from .annotation_panel import AnnotationPanel
 from .welcome_screen import WelcomeScreen
 from .image_sidebar import ImageSidebar
 from .dialogs import HotkeyGuideDialog
+from .review_grid import ReviewGridDialog
 from backend.model_manager import ModelManager
 from backend.project_manager import ProjectManager
+from backend.thumbnail_cache import ThumbnailCache
 from backend.model_database import get_models_for_task, get_model_info
 from backend.yolo_inference import YOLOAdapter
 from backend.sam_inference import SAMAdapter
 from backend import exporter
+from backend import grabcut_refine
+from backend.mask_polygons import label_array_to_polygons, polygons_to_annotations
 
 
 class MainWindow(QMainWindow):
+    # Decoded pixmaps of inactive tabs are evicted (least recently used first)
+    # once they exceed this budget. Overridable per project via project.json.
+    PIXMAP_MEMORY_BUDGET_MB = 512
+    # Per-tab memory limit for undo history. Overridable per project via project.json.
+    UNDO_MEMORY_LIMIT_MB = 16
+    # Export dialog choices -> Exporter copy modes
+    EXPORT_COPY_MODES = OrderedDict([
+        ("Copy images", "copy"),
+        ("Hard link images (same drive, no extra space)", "hardlink"),
+        ("Symbolic link images", "symlink"),
+        ("Reference only (list source paths in images.txt)", "reference"),
+    ])
+    # Export dialog choices -> exporter layouts
+    EXPORT_LAYOUTS = OrderedDict([
+        ("Image and label files", "files"),
+        ("WebDataset tar shards (images and labels packed for training loaders)", "webdataset"),
+        ("Columnar labels (Parquet, or NPZ without pyarrow) with image files", "columnar"),
+        ("Image tensor pack (decoded uint8 images, memory-mapped) with columnar labels", "tensor_pack"),
+    ])
+    # Export dialog choices -> split ratios
+    EXPORT_SPLITS = OrderedDict([
+        ("No split", None),
+        ("Train / val / test (80 / 10 / 10)", (("train", 0.8), ("val", 0.1), ("test", 0.1))),
+        ("Train / val / test (70 / 20 / 10)", (("train", 0.7), ("val", 0.2), ("test", 0.1))),
+        ("Train / val (90 / 10)", (("train", 0.9), ("val", 0.1))),
+    ])
+    EXPORT_SPLIT_LAYOUTS = OrderedDict([
+        ("One folder per split", "folders"),
+        ("One export with train.txt / val.txt / test.txt lists", "lists"),
+    ])
+
     def __init__(self):
         super().__init__()
         
@@ -37,6 +73,10 @@ class MainWindow(QMainWindow):
         self.current_active_label = None
         self.current_model_info = None
         self.last_selected_tool = "bbox"
+        self.pixmap_memory_budget_mb = self.PIXMAP_MEMORY_BUDGET_MB
+        self.undo_memory_limit_mb = self.UNDO_MEMORY_LIMIT_MB
+        self._loaded_viewers = OrderedDict()  # viewer -> pixmap bytes, in LRU order
+        self.review_dialog = None
         
         self.setWindowTitle("LabelAI")
         self.resize(1400, 900)  # Increased default size for the new layout
@@ -112,22 +152,26 @@ class MainWindow(QMainWindow):
         tool_layout = QHBoxLayout()
         
         # Create tool buttons
+        self.select_tool_button = self._create_tool_button("Select", "select")
         self.bbox_tool_button = self._create_tool_button("BBox", "bbox", True)
         self.polygon_tool_button = self._create_tool_button("Polygon", "polygon")
         self.mask_tool_button = self._create_tool_button("Mask", "mask")
+        self.wand_tool_button = self._create_tool_button("Magic Wand", "wand")
         self.keypoint_tool_button = self._create_tool_button("Keypoint", "keypoint")
         
         # Add buttons to layout
-        for button in [self.bbox_tool_button, self.polygon_tool_button, 
-                      self.mask_tool_button, self.keypoint_tool_button]:
+        for button in [self.select_tool_button, self.bbox_tool_button, self.polygon_tool_button, 
+                      self.mask_tool_button, self.wand_tool_button, self.keypoint_tool_button]:
             tool_layout.addWidget(button)
         
         # Create button group for exclusive selection
         self.tool_button_group = QButtonGroup(self)
         self.tool_button_group.setExclusive(True)
+        self.tool_button_group.addButton(self.select_tool_button)
         self.tool_button_group.addButton(self.bbox_tool_button)
         self.tool_button_group.addButton(self.polygon_tool_button)
         self.tool_button_group.addButton(self.mask_tool_button)
+        self.tool_button_group.addButton(self.wand_tool_button)
         self.tool_button_group.addButton(self.keypoint_tool_button)
 
         tool_layout.addStretch()
@@ -152,6 +196,7 @@ class MainWindow(QMainWindow):
         self.image_sidebar.addImagesClicked.connect(self.add_images_to_project)
         self.image_sidebar.imageSelected.connect(self.open_image_tab)
         self.image_sidebar.imagesDeleted.connect(self.delete_images)
+        self.image_sidebar.set_query_handler(self.project_manager.query_images)
 
         # 2. Nested splitter for the main work area
         work_area_splitter = QSplitter(Qt.Horizontal)
@@ -165,6 +210,9 @@ class MainWindow(QMainWindow):
         self.annotation_panel.activeLabelChanged.connect(self.on_active_label_changed)
         self.annotation_panel.classLabelsChanged.connect(self.save_project_state)
         self.annotation_panel.annotationsUpdated.connect(self.on_annotations_updated_from_panel)
+        self.annotation_panel.deleteAnnotationsRequested.connect(self.on_delete_annotations_requested)
+        self.annotation_panel.relabelAnnotationsRequested.connect(self.on_relabel_annotations_requested)
+        self.annotation_panel.annotationSelectionChanged.connect(self.on_panel_selection_changed)
         self.annotation_panel.keypointDisplayOptionsChanged.connect(self.on_keypoint_display_options_changed)
         
         work_area_splitter.addWidget(self.tabs)
@@ -250,6 +298,34 @@ class MainWindow(QMainWindow):
         )
         back_to_projects_action.triggered.connect(self.prompt_save_and_return_to_welcome)
         self.file_menu.addAction(back_to_projects_action)
+
+        # Edit menu
+        edit_menu = menubar.addMenu("Edit")
+        undo_action = QAction("Undo", self)
+        undo_action.setShortcut("Ctrl+Z")
+        undo_action.triggered.connect(self.undo)
+        edit_menu.addAction(undo_action)
+
+        redo_action = QAction("Redo", self)
+        redo_action.setShortcuts(["Ctrl+Y", "Ctrl+Shift+Z"])
+        redo_action.triggered.connect(self.redo)
+        edit_menu.addAction(redo_action)
+
+        # Tools menu
+        tools_menu = menubar.addMenu("Tools")
+        review_action = QAction("Review Grid...", self)
+        review_action.setShortcut("Ctrl+R")
+        review_action.triggered.connect(self.open_review_grid)
+        tools_menu.addAction(review_action)
+        tools_menu.addSeparator()
+
+        grabcut_action = QAction("Refine Boxes to Polygons (GrabCut)...", self)
+        grabcut_action.triggered.connect(self.refine_boxes_with_grabcut)
+        tools_menu.addAction(grabcut_action)
+
+        masks_to_polygons_action = QAction("Convert Brush Masks to Polygons", self)
+        masks_to_polygons_action.triggered.connect(self.convert_masks_to_polygons)
+        tools_menu.addAction(masks_to_polygons_action)
         
         # Models menu
         self.models_menu = menubar.addMenu("Models")
@@ -304,6 +380,7 @@ class MainWindow(QMainWindow):
         self.update_menus_for_goal(annotation_goal, model_name)
         
         # Populate the sidebar with existing images
+        self.image_sidebar.set_thumbnail_cache(ThumbnailCache(self.project_manager.get_thumbnail_dir()))
         self.image_sidebar.populate_from_directory(self.project_manager.get_image_dir())
         
         # Load class labels and other state
@@ -412,6 +489,7 @@ class MainWindow(QMainWindow):
         model_tool = self.current_model_info.get("tool")
         self.polygon_tool_button.setVisible(model_tool in ["polygon", "mask"])
         self.mask_tool_button.setVisible(model_tool == "mask")
+        self.wand_tool_button.setVisible(model_tool in ["polygon", "mask"])
         self.keypoint_tool_button.setVisible(model_tool == "keypoint")
 
         # Show/hide keypoint options panel
@@ -428,15 +506,18 @@ class MainWindow(QMainWindow):
         """Validate the last selected tool and set appropriate tool."""
         if (self.last_selected_tool == "polygon" and not self.polygon_tool_button.isVisible() or
             self.last_selected_tool == "mask" and not self.mask_tool_button.isVisible() or
+            self.last_selected_tool == "wand" and not self.wand_tool_button.isVisible() or
             self.last_selected_tool == "keypoint" and not self.keypoint_tool_button.isVisible()):
             self.set_active_tool("bbox")
             self.bbox_tool_button.setChecked(True)
         else:
             # Re-apply the last used tool
             tool_button_map = {
+                "select": self.select_tool_button,
                 "bbox": self.bbox_tool_button,
                 "polygon": self.polygon_tool_button,
                 "mask": self.mask_tool_button,
+                "wand": self.wand_tool_button,
                 "keypoint": self.keypoint_tool_button
             }
             
@@ -468,21 +549,20 @@ class MainWindow(QMainWindow):
         )
         
         if paths:
-            copied_count = 0
+            copied_paths = []
             for path in paths:
                 try:
-                    shutil.copy(path, image_dir)
-                    copied_count += 1
+                    copied_paths.append(shutil.copy(path, image_dir))
                 except shutil.SameFileError:
                     pass  # File is already in the project
                 except Exception as e:
                     print(f"Could not copy file {path}: {e}")
             
-            if copied_count > 0:
-                self.image_sidebar.populate_from_directory(image_dir)
+            if copied_paths:
+                self.image_sidebar.add_image_paths(copied_paths)
             
             QMessageBox.information(
-                self, "Success", f"Added {copied_count} new image(s) to the project."
+                self, "Success", f"Added {len(copied_paths)} new image(s) to the project."
             )
 
     def delete_images(self, image_paths):
@@ -490,18 +570,19 @@ class MainWindow(QMainWindow):
         if not self.project_manager.is_project_active():
             return
 
-        deleted_count = 0
+        deleted_paths = []
         for path in image_paths:
             # Close the tab if the image is open
             for i in range(self.tabs.count()):
                 if self.tabs.widget(i).property("image_path") == path:
+                    self._loaded_viewers.pop(self.tabs.widget(i), None)
                     self.tabs.removeTab(i)
                     break
             
             # Delete the image file
             try:
                 os.remove(path)
-                deleted_count += 1
+                deleted_paths.append(path)
             except OSError as e:
                 print(f"Error deleting image file {path}: {e}")
                 continue
@@ -510,34 +591,73 @@ class MainWindow(QMainWindow):
             filename = os.path.basename(path)
             self.project_manager.delete_annotations(filename)
 
-        if deleted_count > 0:
-            QMessageBox.information(self, "Success", f"Deleted {deleted_count} image(s).")
-            # Refresh the sidebar to show the updated list of images
-            self.image_sidebar.populate_from_directory(self.project_manager.get_image_dir())
+        if deleted_paths:
+            # Remove just the deleted rows instead of rescanning the folder
+            self.image_sidebar.remove_items_by_path(deleted_paths)
+            QMessageBox.information(self, "Success", f"Deleted {len(deleted_paths)} image(s).")
+
+    def open_image_tab(self, path, activate=True):
+        """Open an image from a given path (called by the sidebar).
 
-    def open_image_tab(self, path):
-        """Open an image from a given path (called by the sidebar)."""
+        The image is only decoded once its tab becomes current, so tabs
+        restored from the project state open without touching the pixels.
+        """
         if not (path and os.path.exists(path)):
             return
             
         # Check if this image is already open in a tab
         for i in range(self.tabs.count()):
             if self.tabs.widget(i).property("image_path") == path:
-                self.tabs.setCurrentIndex(i)
+                if activate:
+                    self.tabs.setCurrentIndex(i)
                 return
 
         viewer = ImageViewer()
-        viewer.load_image(path)
+        viewer.set_image_source(path)
         viewer.setProperty("image_path", path)
+        viewer.history.set_memory_limit(self.undo_memory_limit_mb * 1024 * 1024)
         viewer.annotationsChanged.connect(lambda v=viewer: self.on_annotations_changed_in_viewer(v))
+        viewer.annotationsCommitted.connect(lambda v=viewer: self._save_annotations_for_viewer(v))
         viewer.toolChanged.connect(self.on_tool_changed_from_viewer)
+        viewer.selectionChanged.connect(lambda indices, v=viewer: self.on_viewer_selection_changed(v, indices))
+        viewer.pixmapChanged.connect(lambda v=viewer: self._on_viewer_pixmap_changed(v))
         
         self.load_annotations_for_viewer(viewer, path)
         filename = os.path.basename(path)
         self.tabs.addTab(viewer, filename)
-        self.tabs.setCurrentWidget(viewer)
-        self.on_annotations_changed_in_viewer(viewer)
-        self.set_active_tool(self.last_selected_tool)
+        if activate:
+            self.tabs.setCurrentWidget(viewer)
+            self.on_annotations_changed_in_viewer(viewer)
+            self._save_annotations_for_viewer(viewer)
+            self.set_active_tool(self.last_selected_tool)
+
+    def _activate_viewer_image(self, viewer):
+        """Start decoding the viewer's image (asynchronously) and mark it most recently used."""
+        viewer.ensure_image_loaded()
+        if viewer in self._loaded_viewers:
+            self._loaded_viewers.move_to_end(viewer)
+
+    def _on_viewer_pixmap_changed(self, viewer):
+        """Track decoded pixmap sizes and evict other tabs' pixmaps over budget."""
+        if not viewer.is_image_loaded():
+            self._loaded_viewers.pop(viewer, None)
+            return
+        self._loaded_viewers[viewer] = viewer.pixmap_bytes()
+        self._loaded_viewers.move_to_end(viewer)
+        self._enforce_pixmap_budget()
+
+    def _enforce_pixmap_budget(self):
+        """Unload least recently used pixmaps until the budget is respected."""
+        budget_bytes = self.pixmap_memory_budget_mb * 1024 * 1024
+        current = self.tabs.currentWidget()
+        total = sum(self._loaded_viewers.values())
+        for viewer in list(self._loaded_viewers):
+            if total <= budget_bytes:
+                break
+            if viewer is current:
+                continue
+            total -= self._loaded_viewers.pop(viewer)
+            viewer.unload_image()  # Emits pixmapChanged, which is a no-op once popped
 
     def save_all_annotations(self):
         """Save annotations for all currently open tabs."""
@@ -596,8 +716,12 @@ class MainWindow(QMainWindow):
     def reset_project_ui(self):
         """Clear all project-specific UI elements."""
         self.tabs.clear()
+        self._loaded_viewers.clear()
+        self.pixmap_memory_budget_mb = self.PIXMAP_MEMORY_BUDGET_MB
+        self.undo_memory_limit_mb = self.UNDO_MEMORY_LIMIT_MB
         self.annotation_panel.clear_all()
         self.image_sidebar.clear_all()
+        self.image_sidebar.set_thumbnail_cache(None)
         self.models_menu.clear()
         self.models_menu.setDisabled(True)
         self.current_active_label = None
@@ -609,6 +733,83 @@ class MainWindow(QMainWindow):
             "padding: 8px 16px; border-radius: 4px;"
         )
 
+    def open_review_grid(self):
+        """Open the thumbnail grid for approving or flagging images."""
+        if not self.project_manager.is_project_active():
+            return
+        # Reviewed thumbnails are read from disk, so flush open edits first
+        for i in range(self.tabs.count()):
+            self._save_annotations_for_viewer(self.tabs.widget(i))
+
+        # Review what the sidebar shows, so a filter or annotation query selects the QA set
+        image_paths = self.image_sidebar.visible_image_paths()
+        if self.review_dialog is not None:
+            self.review_dialog.close()
+        self.review_dialog = ReviewGridDialog(image_paths, self.project_manager, self.image_sidebar.thumbnail_cache, self)
+        self.review_dialog.imageActivated.connect(self.open_image_tab)
+        self.review_dialog.show()
+
+    def refine_boxes_with_grabcut(self):
+        """Convert every bbox in the project into a GrabCut polygon, with a progress dialog."""
+        if not self.project_manager.is_project_active():
+            return
+
+        reply = QMessageBox.question(
+            self, "Refine Boxes",
+            "Replace all bounding boxes in this project with GrabCut polygons?\n"
+            f"The original annotation files are kept in '{grabcut_refine.BACKUP_DIRNAME}'.",
+            QMessageBox.Yes | QMessageBox.No, QMessageBox.No
+        )
+        if reply != QMessageBox.Yes:
+            return
+
+        # The job rewrites annotation files, so flush open edits first
+        for i in range(self.tabs.count()):
+            self._save_annotations_for_viewer(self.tabs.widget(i))
+
+        progress_dialog = QProgressDialog("Refining boxes...", "Cancel", 0, 0, self)
+        progress_dialog.setWindowTitle("GrabCut Refinement")
+        progress_dialog.setWindowModality(Qt.WindowModal)
+        progress_dialog.setMinimumDuration(0)
+
+        def report(done, total):
+            progress_dialog.setMaximum(total)
+            progress_dialog.setValue(done)
+            QApplication.processEvents()
+            return not progress_dialog.wasCanceled()
+
+        summary = grabcut_refine.refine_project(self.project_manager.current_project_path, progress_callback=report)
+        progress_dialog.close()
+        self.project_manager.refresh_annotation_index()
+
+        # Show the refined polygons in open tabs
+        for i in range(self.tabs.count()):
+            viewer = self.tabs.widget(i)
+            if isinstance(viewer, ImageViewer):
+                self.load_annotations_for_viewer(viewer, viewer.property("image_path"))
+        self.on_tab_changed(self.tabs.currentIndex())
+
+        message = f"Refined {summary['boxes']} boxes in {summary['images']} images."
+        if summary["cancelled"]:
+            message += "\nThe job was cancelled; run it again to continue where it stopped."
+        if summary["errors"]:
+            message += "\n\nErrors:\n" + "\n".join(summary["errors"][:10])
+        QMessageBox.information(self, "GrabCut Refinement", message)
+
+    def convert_masks_to_polygons(self):
+        """Trace the current image's brush masks into polygon annotations (one undo step)."""
+        viewer = self.tabs.currentWidget()
+        if not isinstance(viewer, ImageViewer):
+            return
+        layer = viewer.mask_layer
+        if layer is None or layer.is_empty():
+            QMessageBox.information(self, "No Masks", "This image has no brush masks to convert.")
+            return
+
+        label_polygons = label_array_to_polygons(layer.labels, layer.class_names)
+        viewer.add_annotations(polygons_to_annotations(label_polygons, layer.width, layer.height))
+        self.statusBar().showMessage(f"Created {len(label_polygons)} polygons from brush masks.", 3000)
+
     def handle_export(self):
         """Handle the full export workflow."""
         if not self.current_model_info:
@@ -628,10 +829,24 @@ class MainWindow(QMainWindow):
         if not output_dir:
             return  # User cancelled
 
-        # 2. Gather all annotations from the project
-        all_annotations = self._gather_all_annotations()
-        
-        if not all_annotations:
+        # 2. Pick the images, optionally only those the sidebar filter shows
+        subset = None
+        if self.image_sidebar.has_active_filter():
+            visible_paths = self.image_sidebar.visible_image_paths()
+            reply = QMessageBox.question(
+                self, "Export Subset",
+                f"Export only the {len(visible_paths)} image(s) matching the current sidebar filter?",
+                QMessageBox.Yes | QMessageBox.No | QMessageBox.Cancel,
+                QMessageBox.Yes
+            )
+            if reply == QMessageBox.Cancel:
+                return
+            if reply == QMessageBox.Yes:
+                subset = visible_paths
+        image_paths = subset if subset is not None else self.image_sidebar.image_model.paths()
+        annotated_paths = [path for path in image_paths if os.path.exists(self._annotation_file(path))]
+
+        if not annotated_paths:
             QMessageBox.information(self, "No Annotations", "There are no annotations in this project to export.")
             return
 
@@ -639,12 +854,66 @@ class MainWindow(QMainWindow):
         class_labels = self.annotation_panel.get_class_labels()
         class_map = {label: i for i, label in enumerate(class_labels)}
 
-        # 4. Call the exporter
+        # 4. Choose the dataset layout, its options and, where images are placed, how
+        layout_label, ok = QInputDialog.getItem(
+            self, "Export Layout", "How should the dataset be laid out?", list(self.EXPORT_LAYOUTS), 0, False
+        )
+        if not ok:
+            return
+        layout = self.EXPORT_LAYOUTS[layout_label]
+
+        copy_mode = "copy"
+        layout_options = {}
+        if layout == "tensor_pack":
+            image_size, ok = QInputDialog.getInt(
+                self, "Tensor Pack", "Longest image side in pixels (0 keeps the original size):", 0, 0, 16384
+            )
+            if not ok:
+                return
+            layout_options["image_size"] = image_size
+        if layout in exporter.IMAGE_PLACING_LAYOUTS:
+            mode_labels = list(self.EXPORT_COPY_MODES)
+            mode_label, ok = QInputDialog.getItem(
+                self, "Export Images", "How should images be placed in the export?", mode_labels, 0, False
+            )
+            if not ok:
+                return
+            copy_mode = self.EXPORT_COPY_MODES[mode_label]
+
+        # 5. Optionally split into train/val/test, stratified by the labels in the annotation index
+        split_label, ok = QInputDialog.getItem(
+            self, "Export Splits", "Split the dataset?", list(self.EXPORT_SPLITS), 0, False
+        )
+        if not ok:
+            return
+        splits = self.EXPORT_SPLITS[split_label]
+        if splits:
+            split_layout_label, ok = QInputDialog.getItem(
+                self, "Export Splits", "How should the splits be written?", list(self.EXPORT_SPLIT_LAYOUTS), 0, False
+            )
+            if not ok:
+                return
+            split_layout = self.EXPORT_SPLIT_LAYOUTS[split_layout_label]
+            stratify = QMessageBox.question(
+                self, "Export Splits", "Balance each label across the splits (stratify)?",
+                QMessageBox.Yes | QMessageBox.No, QMessageBox.Yes
+            ) == QMessageBox.Yes
+
+        # 6. Call the exporter
         try:
             model_name = self.current_model_info['name']
-            warnings = exporter.export_annotations(all_annotations, output_dir, model_name, class_map)
+            if splits:
+                image_labels = self.project_manager.image_label_counts(annotated_paths) if stratify else None
+                warnings = exporter.export_split_annotations(
+                    annotated_paths, self._load_annotation_item, output_dir, model_name, class_map,
+                    splits=splits, image_labels=image_labels, split_layout=split_layout,
+                    copy_mode=copy_mode, layout=layout, **layout_options)
+            else:
+                warnings = exporter.export_annotations(self._gather_all_annotations(subset), output_dir,
+                                                       model_name, class_map,
+                                                       copy_mode=copy_mode, layout=layout, **layout_options)
             
-            # 5. Show success message
+            # 7. Show success message
             success_message = f"Annotations successfully exported for {model_name} to:\n{output_dir}"
             if warnings:
                 warnings_text = "\n\nWarnings:\n- " + "\n- ".join(warnings)
@@ -655,12 +924,30 @@ class MainWindow(QMainWindow):
         except Exception as e:
             QMessageBox.critical(self, "Export Error", f"An error occurred during export: {e}")
 
-    def _gather_all_annotations(self):
-        """Gather all annotation files from the project."""
+    def _annotation_file(self, image_path):
+        stem = os.path.splitext(os.path.basename(image_path))[0]
+        return os.path.join(self.project_manager.get_annotation_dir(), f"{stem}.json")
+
+    def _load_annotation_item(self, image_path):
+        """The annotation file of `image_path` as an export item, or None if it can't be read."""
+        try:
+            with open(self._annotation_file(image_path), 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"Could not read or parse annotation file for {image_path}: {e}")
+            return None
+
+    def _gather_all_annotations(self, image_paths=None):
+        """Gather all annotation files from the project, or only those of `image_paths`."""
         all_annotations = []
         annotation_dir = self.project_manager.get_annotation_dir()
         
-        for filename in os.listdir(annotation_dir):
+        if image_paths is None:
+            filenames = os.listdir(annotation_dir)
+        else:
+            filenames = [f"{os.path.splitext(os.path.basename(path))[0]}.json" for path in image_paths]
+            filenames = [f for f in filenames if os.path.exists(os.path.join(annotation_dir, f))]
+        for filename in filenames:
             if filename.endswith(".json"):
                 file_path = os.path.join(annotation_dir, filename)
                 try:
@@ -699,7 +986,9 @@ class MainWindow(QMainWindow):
         self.on_active_label_changed(self.current_active_label)
         active_viewer = self.tabs.currentWidget()
         if isinstance(active_viewer, ImageViewer):
+            self._activate_viewer_image(active_viewer)
             self.annotation_panel.update_annotations(active_viewer.annotations)
+            self.annotation_panel.select_annotations(active_viewer.selected_indices)
 
     def on_keypoint_display_options_changed(self, options):
         """Pass the keypoint display options to the current image viewer."""
@@ -721,10 +1010,12 @@ class MainWindow(QMainWindow):
         self.project_manager.save_state(state_data)
 
     def on_annotations_changed_in_viewer(self, viewer):
-        """Handle annotation changes in the image viewer."""
+        """Handle annotation changes in the image viewer.
+
+        Saving happens on annotationsCommitted instead, so drags are written once.
+        """
         if viewer:
             self.annotation_panel.update_annotations(viewer.annotations)
-            self._save_annotations_for_viewer(viewer)
 
             # Enable/disable export button based on annotations
             if self.current_model_info and viewer.annotations:
@@ -739,10 +1030,44 @@ class MainWindow(QMainWindow):
             viewer.load_annotations(annotations)
             self._save_annotations_for_viewer(viewer)
 
+    def on_delete_annotations_requested(self, ann_indices):
+        """Delete annotations selected in the panel through the viewer's undo history."""
+        viewer = self.tabs.currentWidget()
+        if isinstance(viewer, ImageViewer):
+            viewer.delete_annotations(ann_indices)
+
+    def on_relabel_annotations_requested(self, ann_indices, label):
+        """Relabel annotations selected in the panel through the viewer's undo history."""
+        viewer = self.tabs.currentWidget()
+        if isinstance(viewer, ImageViewer):
+            viewer.relabel_annotations(ann_indices, label)
+
+    def on_viewer_selection_changed(self, viewer, ann_indices):
+        if viewer is self.tabs.currentWidget():
+            self.annotation_panel.select_annotations(ann_indices)
+
+    def on_panel_selection_changed(self, ann_indices):
+        """Selecting rows in the panel selects the annotations in the viewer's Select tool."""
+        viewer = self.tabs.currentWidget()
+        if isinstance(viewer, ImageViewer) and viewer.active_tool == "select":
+            viewer.set_selection(ann_indices)
+
+    def undo(self):
+        viewer = self.tabs.currentWidget()
+        if isinstance(viewer, ImageViewer):
+            viewer.undo()
+
+    def redo(self):
+        viewer = self.tabs.currentWidget()
+        if isinstance(viewer, ImageViewer):
+            viewer.redo()
+
     def _save_annotations_for_viewer(self, viewer):
-        """Save annotations for a specific viewer."""
+        """Save annotations for a specific viewer, skipping it if nothing changed since the last save."""
         if not (viewer and self.project_manager.is_project_active()):
             return
+        if viewer.history.is_clean():
+            return
         
         image_path, image_w, image_h = viewer.get_image_details()
         
@@ -755,6 +1080,16 @@ class MainWindow(QMainWindow):
                 image_w, 
                 image_h
             )
+            if viewer.mask_layer is not None and viewer.mask_layer.dirty:
+                self.project_manager.save_masks(
+                    image_filename,
+                    viewer.mask_layer.labels,
+                    viewer.mask_layer.class_names,
+                    image_w,
+                    image_h
+                )
+                viewer.mask_layer.dirty = False
+            viewer.history.set_clean()
 
     def load_annotations_for_viewer(self, viewer, image_path):
         """Load annotations for a specific viewer."""
@@ -765,11 +1100,17 @@ class MainWindow(QMainWindow):
         annotations = self.project_manager.load_annotations(image_filename)
         if annotations:
             viewer.load_annotations(annotations)
+        masks = self.project_manager.load_masks(image_filename)
+        if masks:
+            viewer.set_masks(*masks)
+        # What was just read matches the files, so there is nothing to save until it is edited
+        viewer.history.set_clean()
 
     def close_tab(self, index):
         """Close a tab and clean up the widget."""
         widget = self.tabs.widget(index)
         if widget:
+            self._loaded_viewers.pop(widget, None)
             widget.deleteLater()
         self.tabs.removeTab(index)
 
@@ -779,11 +1120,21 @@ class MainWindow(QMainWindow):
 
     def on_tool_changed_from_viewer(self, tool_name):
         """Handle tool change signal from the image viewer (e.g., via hotkey)."""
-        if tool_name == "bbox":
+        if tool_name == "select":
+            self.select_tool_button.setChecked(True)
+        elif tool_name == "bbox":
             self.bbox_tool_button.setChecked(True)
         elif tool_name == "polygon":
             self.polygon_tool_button.setChecked(True)
-        # No need to handle mask, as it doesn't have a hotkey yet
+        elif tool_name == "mask":
+            # Only models with a mask tool offer the brush
+            if not self.mask_tool_button.isVisible():
+                return
+            self.mask_tool_button.setChecked(True)
+        elif tool_name == "wand":
+            if not self.wand_tool_button.isVisible():
+                return
+            self.wand_tool_button.setChecked(True)
         
         self.set_active_tool(tool_name)
 
@@ -800,7 +1151,20 @@ class MainWindow(QMainWindow):
         if state is None:
             state = self.project_manager.load_state()
             
-        open_files = state.get("open_files", [])
-        for file_path in open_files:
-            if os.path.exists(file_path):
-                self.open_image_tab(file_path)
\ No newline at end of file
+        self.pixmap_memory_budget_mb = state.get("pixmap_memory_budget_mb", self.PIXMAP_MEMORY_BUDGET_MB)
+        self.undo_memory_limit_mb = state.get("undo_memory_limit_mb", self.UNDO_MEMORY_LIMIT_MB)
+
+        # Tabs are restored lazily; only the last one is decoded, when it becomes current
+        # (signals are blocked, or the first addTab would make tab 0 current and decode it too)
+        open_files = [p for p in state.get("open_files", []) if os.path.exists(p)]
+        self.tabs.blockSignals(True)
+        try:
+            for file_path in open_files:
+                self.open_image_tab(file_path, activate=False)
+            if open_files:
+                self.tabs.setCurrentIndex(self.tabs.count() - 1)
+        finally:
+            self.tabs.blockSignals(False)
+        if open_files:
+            self.on_tab_changed(self.tabs.currentIndex())
+            self.set_active_tool(self.last_selected_tool)
\ No newline at end of file
@@ -0,0 +1,104 @@
+# C:\LabelAI\ui\mask_layer.py
+
+import numpy as np
+from PyQt5.QtCore import QRect
+from PyQt5.QtGui import QImage, QColor
+
+
+class MaskLayer:
+    """
+    A full-resolution brush mask for one image.
+
+    Pixels hold a class index (0 = background, i = class_names[i - 1]) in a
+    uint8 array. The overlay QImage is an Indexed8 view over that same buffer
+    with a translucent colour table, so painting never copies or converts the
+    mask; strokes only touch the array inside the brush's bounding box.
+    """
+    MAX_CLASSES = 255
+    OVERLAY_ALPHA = 110
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.labels = np.zeros((height, width), dtype=np.uint8)
+        self.class_names = []
+        self.dirty = False
+        self._image = None
+
+    def set_labels(self, labels, class_names):
+        """Replace the mask contents, e.g. with masks loaded from disk."""
+        self.labels = np.ascontiguousarray(labels, dtype=np.uint8)
+        self.height, self.width = self.labels.shape
+        self.class_names = list(class_names)[:self.MAX_CLASSES]
+        self.dirty = False
+        self._image = None
+
+    def class_value(self, label):
+        """The pixel value for a label, registering it if new. None if the table is full."""
+        if label in self.class_names:
+            return self.class_names.index(label) + 1
+        if len(self.class_names) >= self.MAX_CLASSES:
+            return None
+        self.class_names.append(label)
+        if self._image is not None:
+            self._image.setColorTable(self._color_table())
+        return len(self.class_names)
+
+    def is_empty(self):
+        return not self.labels.any()
+
+    def image(self):
+        """The overlay as a QImage sharing memory with the label array."""
+        if self._image is None:
+            self._image = QImage(self.labels.data, self.width, self.height,
+                                 self.labels.strides[0], QImage.Format_Indexed8)
+            self._image.setColorTable(self._color_table())
+        return self._image
+
+    def _color_table(self):
+        table = [QColor(0, 0, 0, 0).rgba()]
+        for i in range(1, 256):
+            table.append(QColor.fromHsv((i * 47) % 360, 200, 255, self.OVERLAY_ALPHA).rgba())
+        return table
+
+    # --- Painting ---
+    def stroke_rect(self, p0, p1, radius):
+        """Image-space QRect covered by a brush stroke segment, clipped to the image."""
+        x0 = int(min(p0[0], p1[0]) - radius) - 1
+        y0 = int(min(p0[1], p1[1]) - radius) - 1
+        x1 = int(max(p0[0], p1[0]) + radius) + 2
+        y1 = int(max(p0[1], p1[1]) + radius) + 2
+        return QRect(x0, y0, x1 - x0, y1 - y0).intersected(QRect(0, 0, self.width, self.height))
+
+    def paint_segment(self, p0, p1, radius, value):
+        """
+        Stamp a round brush of `radius` along the segment p0 -> p1 (image
+        coordinates), writing `value` (0 erases). Returns the touched QRect.
+        """
+        rect = self.stroke_rect(p0, p1, radius)
+        if rect.isEmpty():
+            return rect
+        x0, y0 = rect.x(), rect.y()
+        region = self.labels[y0:y0 + rect.height(), x0:x0 + rect.width()]
+
+        # Distance from every pixel centre in the region to the segment
+        ys, xs = np.ogrid[y0:y0 + rect.height(), x0:x0 + rect.width()]
+        px, py = xs + 0.5, ys + 0.5
+        ax, ay = p0
+        dx, dy = p1[0] - ax, p1[1] - ay
+        length_sq = dx * dx + dy * dy
+        if length_sq > 0:
+            t = np.clip(((px - ax) * dx + (py - ay) * dy) / length_sq, 0.0, 1.0)
+        else:
+            t = 0.0
+        dist_sq = (px - (ax + t * dx)) ** 2 + (py - (ay + t * dy)) ** 2
+        region[dist_sq <= radius * radius] = value
+        self.dirty = True
+        return rect
+
+    def read_patch(self, rect):
+        return self.labels[rect.y():rect.y() + rect.height(), rect.x():rect.x() + rect.width()].copy()
+
+    def write_patch(self, rect, patch):
+        self.labels[rect.y():rect.y() + rect.height(), rect.x():rect.x() + rect.width()] = patch
+        self.dirty = True
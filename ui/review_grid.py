@@ -0,0 +1,340 @@
+# C:\LabelAI\ui\review_grid.py
+
+"""
+Grid review mode: pages of thumbnails with their annotations burned in,
+for fast QA. Each image can be approved or flagged from the keyboard.
+
+Thumbnails are decoded at reduced size and their overlays painted on
+QThreadPool workers (QPainter on a QImage is safe off the GUI thread). The
+list view only asks for the rows it shows, so a page only costs what is
+on screen, and the next page is rendered ahead while the current one is
+reviewed.
+"""
+
+import os
+import json
+from collections import OrderedDict
+
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QListView, QLabel, QPushButton,
+    QStyledItemDelegate, QStyle, QShortcut, QAbstractItemView
+)
+from PyQt5.QtCore import (
+    Qt, QObject, QRunnable, QThreadPool, QAbstractListModel, QModelIndex,
+    QSize, QRect, QPointF, pyqtSignal
+)
+from PyQt5.QtGui import QImage, QImageReader, QPainter, QPen, QColor, QPolygonF, QKeySequence
+
+STATUS_APPROVED = "approved"
+STATUS_FLAGGED = "flagged"
+
+
+def render_overlay_thumbnail(image_path, annotation_path, size, thumbnail_path=None):
+    """
+    Decodes `image_path` at reduced size (fitting `size`) and paints the
+    annotations from the neutral JSON file at `annotation_path` onto it.
+    If a cached `thumbnail_path` is given it is decoded instead of the image.
+    Safe to call from worker threads.
+    """
+    full_size = QImageReader(image_path).size()
+    reader = QImageReader(thumbnail_path or image_path)
+    source_size = reader.size()
+    if source_size.isValid():
+        reader.setScaledSize(source_size.scaled(size, Qt.KeepAspectRatio))
+    image = reader.read()
+    if image.isNull():
+        return image
+    image = image.convertToFormat(QImage.Format_ARGB32_Premultiplied)
+
+    annotations, image_width, image_height = [], full_size.width(), full_size.height()
+    if annotation_path and os.path.exists(annotation_path):
+        try:
+            with open(annotation_path, 'r') as f:
+                data = json.load(f)
+            annotations = data.get("annotations", [])
+            image_width = data.get("image_width") or image_width
+            image_height = data.get("image_height") or image_height
+        except Exception as e:
+            print(f"Could not read annotations {annotation_path}: {e}")
+    if not annotations or image_width <= 0 or image_height <= 0:
+        return image
+
+    sx, sy = image.width() / image_width, image.height() / image_height
+    painter = QPainter(image)
+    painter.setRenderHint(QPainter.Antialiasing)
+    painter.setPen(QPen(QColor(0, 255, 0, 220), 2))
+    for ann in annotations:
+        points = ann.get("points") or []
+        ann_type = ann.get("type")
+        if ann_type == "bbox" and len(points) == 4:
+            x_min, y_min, x_max, y_max = points
+            painter.drawRect(QRect(int(x_min * sx), int(y_min * sy),
+                                   int((x_max - x_min) * sx), int((y_max - y_min) * sy)))
+        elif ann_type == "polygon" and len(points) > 2:
+            painter.setBrush(QColor(0, 255, 0, 50))
+            painter.drawPolygon(QPolygonF([QPointF(p[0] * sx, p[1] * sy) for p in points]))
+            painter.setBrush(Qt.NoBrush)
+        elif ann_type == "keypoint":
+            painter.setBrush(QColor(255, 0, 255, 220))
+            for p in points:
+                painter.drawEllipse(QPointF(p[0] * sx, p[1] * sy), 2, 2)
+            painter.setBrush(Qt.NoBrush)
+    painter.end()
+    return image
+
+
+class OverlayRenderSignals(QObject):
+    rendered = pyqtSignal(str, QImage)  # image path, thumbnail with overlay
+
+
+class OverlayRenderTask(QRunnable):
+    def __init__(self, signals, image_path, annotation_path, size, thumbnail_cache=None):
+        super().__init__()
+        self.signals = signals
+        self.image_path = image_path
+        self.annotation_path = annotation_path
+        self.size = size
+        self.thumbnail_cache = thumbnail_cache
+
+    def run(self):
+        thumbnail_path = self.thumbnail_cache.get(self.image_path) if self.thumbnail_cache is not None else None
+        image = render_overlay_thumbnail(self.image_path, self.annotation_path, self.size, thumbnail_path)
+        try:
+            self.signals.rendered.emit(self.image_path, image)
+        except RuntimeError:
+            pass  # The review window was closed in the meantime
+
+
+class ReviewGridModel(QAbstractListModel):
+    """
+    One page of images. Thumbnails are rendered on demand when the view asks
+    for a row's decoration, and kept in a small LRU cache shared across pages.
+    """
+    PathRole = Qt.UserRole
+    StatusRole = Qt.UserRole + 1
+    THUMBNAIL_SIZE = QSize(256, 256)
+    CACHE_SIZE = 300
+
+    def __init__(self, annotation_dir, statuses, thumbnail_cache=None, parent=None):
+        super().__init__(parent)
+        self.annotation_dir = annotation_dir
+        self.thumbnail_cache = thumbnail_cache
+        self.statuses = statuses  # image filename -> status, shared with the dialog
+        self._paths = []
+        self._rows = {}
+        self._cache = OrderedDict()
+        self._pending = set()
+        self._signals = OverlayRenderSignals(self)
+        self._signals.rendered.connect(self._on_rendered)
+
+    def set_page(self, paths):
+        self.beginResetModel()
+        self._paths = list(paths)
+        self._rows = {path: row for row, path in enumerate(self._paths)}
+        self.endResetModel()
+
+    def prefetch(self, paths):
+        for path in paths:
+            self._request(path)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._paths)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        path = self._paths[index.row()]
+        if role == Qt.DisplayRole:
+            return os.path.basename(path)
+        if role == Qt.DecorationRole:
+            image = self._cache.get(path)
+            if image is None:
+                self._request(path)
+                return None
+            self._cache.move_to_end(path)
+            return image
+        if role == self.PathRole:
+            return path
+        if role == self.StatusRole:
+            return self.statuses.get(os.path.basename(path))
+        return None
+
+    def status_changed(self, row):
+        index = self.index(row)
+        self.dataChanged.emit(index, index, [self.StatusRole])
+
+    def _request(self, path):
+        if path in self._cache or path in self._pending:
+            return
+        self._pending.add(path)
+        stem = os.path.splitext(os.path.basename(path))[0]
+        annotation_path = os.path.join(self.annotation_dir, f"{stem}.json")
+        QThreadPool.globalInstance().start(
+            OverlayRenderTask(self._signals, path, annotation_path, self.THUMBNAIL_SIZE, self.thumbnail_cache))
+
+    def _on_rendered(self, path, image):
+        self._pending.discard(path)
+        self._cache[path] = image
+        while len(self._cache) > self.CACHE_SIZE:
+            self._cache.popitem(last=False)
+        row = self._rows.get(path)
+        if row is not None:
+            index = self.index(row)
+            self.dataChanged.emit(index, index, [Qt.DecorationRole])
+
+
+class ReviewGridDelegate(QStyledItemDelegate):
+    """Paints a thumbnail (or a placeholder while it renders) with a status frame."""
+    CELL_SIZE = QSize(270, 290)
+    STATUS_COLORS = {STATUS_APPROVED: QColor(46, 160, 67), STATUS_FLAGGED: QColor(218, 54, 51)}
+
+    def sizeHint(self, option, index):
+        return self.CELL_SIZE
+
+    def paint(self, painter, option, index):
+        painter.save()
+        rect = option.rect.adjusted(4, 4, -4, -4)
+        if option.state & QStyle.State_Selected:
+            painter.fillRect(rect, QColor(33, 150, 243, 60))
+
+        image_rect = QRect(rect.left(), rect.top(), rect.width(), rect.height() - 20)
+        image = index.data(Qt.DecorationRole)
+        if image is None or image.isNull():
+            painter.fillRect(image_rect, QColor(230, 230, 230))
+            painter.drawText(image_rect, Qt.AlignCenter, "Loading...")
+        else:
+            target = QRect(0, 0, image.width(), image.height())
+            target.moveCenter(image_rect.center())
+            painter.drawImage(target, image)
+
+        status = index.data(ReviewGridModel.StatusRole)
+        if status in self.STATUS_COLORS:
+            painter.setPen(QPen(self.STATUS_COLORS[status], 4))
+            painter.drawRect(image_rect.adjusted(2, 2, -2, -2))
+
+        painter.setPen(option.palette.text().color())
+        text_rect = QRect(rect.left(), rect.bottom() - 18, rect.width(), 18)
+        text = painter.fontMetrics().elidedText(index.data(Qt.DisplayRole), Qt.ElideMiddle, rect.width())
+        painter.drawText(text_rect, Qt.AlignCenter, text)
+        painter.restore()
+
+
+class ReviewGridDialog(QDialog):
+    """
+    Pages through all project images in a thumbnail grid.
+
+    Keys: A approve, F flag, U clear (each moves to the next image),
+    Enter opens the image, Page Up / Page Down change page.
+
+    Signals:
+        imageActivated (str): the path of an image to open in a tab.
+    """
+    PAGE_SIZE = 48
+
+    imageActivated = pyqtSignal(str)
+
+    def __init__(self, image_paths, project_manager, thumbnail_cache=None, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Review Grid")
+        self.resize(1200, 850)
+        self.project_manager = project_manager
+        self.image_paths = list(image_paths)
+        self.statuses = project_manager.load_review_status()
+        self._dirty = False
+        self.page = 0
+
+        layout = QVBoxLayout(self)
+        self.model = ReviewGridModel(project_manager.get_annotation_dir(), self.statuses, thumbnail_cache, self)
+        self.view = QListView()
+        self.view.setViewMode(QListView.IconMode)
+        self.view.setResizeMode(QListView.Adjust)
+        self.view.setMovement(QListView.Static)
+        self.view.setUniformItemSizes(True)
+        self.view.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.view.setItemDelegate(ReviewGridDelegate(self.view))
+        self.view.setModel(self.model)
+        self.view.doubleClicked.connect(lambda index: self.imageActivated.emit(index.data(ReviewGridModel.PathRole)))
+        layout.addWidget(self.view, 1)
+
+        nav_layout = QHBoxLayout()
+        self.prev_button = QPushButton("< Previous Page")
+        self.prev_button.clicked.connect(lambda: self.show_page(self.page - 1))
+        self.next_button = QPushButton("Next Page >")
+        self.next_button.clicked.connect(lambda: self.show_page(self.page + 1))
+        self.page_label = QLabel()
+        self.summary_label = QLabel()
+        nav_layout.addWidget(self.prev_button)
+        nav_layout.addWidget(self.page_label)
+        nav_layout.addWidget(self.next_button)
+        nav_layout.addStretch()
+        nav_layout.addWidget(QLabel("A: approve   F: flag   U: clear   Enter: open"))
+        nav_layout.addWidget(self.summary_label)
+        layout.addLayout(nav_layout)
+
+        for key, handler in [
+            ("A", lambda: self.set_current_status(STATUS_APPROVED)),
+            ("F", lambda: self.set_current_status(STATUS_FLAGGED)),
+            ("U", lambda: self.set_current_status(None)),
+            ("Return", self.open_current),
+            ("PgDown", lambda: self.show_page(self.page + 1)),
+            ("PgUp", lambda: self.show_page(self.page - 1)),
+        ]:
+            QShortcut(QKeySequence(key), self, activated=handler)
+
+        self.show_page(0)
+
+    def page_count(self):
+        return max(1, (len(self.image_paths) + self.PAGE_SIZE - 1) // self.PAGE_SIZE)
+
+    def show_page(self, page):
+        if not 0 <= page < self.page_count():
+            return
+        self._save_statuses()
+        self.page = page
+        start = page * self.PAGE_SIZE
+        self.model.set_page(self.image_paths[start:start + self.PAGE_SIZE])
+        # Render the next page while this one is being reviewed
+        self.model.prefetch(self.image_paths[start + self.PAGE_SIZE:start + 2 * self.PAGE_SIZE])
+        self.view.setCurrentIndex(self.model.index(0))
+        self.page_label.setText(f"Page {page + 1} / {self.page_count()}")
+        self.prev_button.setEnabled(page > 0)
+        self.next_button.setEnabled(page + 1 < self.page_count())
+        self._update_summary()
+
+    def set_current_status(self, status):
+        index = self.view.currentIndex()
+        if not index.isValid():
+            return
+        filename = os.path.basename(index.data(ReviewGridModel.PathRole))
+        if status is None:
+            self.statuses.pop(filename, None)
+        else:
+            self.statuses[filename] = status
+        self._dirty = True
+        self.model.status_changed(index.row())
+        self._update_summary()
+
+        # Advance, moving on to the next page after the last image
+        if index.row() + 1 < self.model.rowCount():
+            self.view.setCurrentIndex(self.model.index(index.row() + 1))
+        else:
+            self.show_page(self.page + 1)
+
+    def open_current(self):
+        index = self.view.currentIndex()
+        if index.isValid():
+            self.imageActivated.emit(index.data(ReviewGridModel.PathRole))
+
+    def _update_summary(self):
+        approved = sum(1 for s in self.statuses.values() if s == STATUS_APPROVED)
+        flagged = sum(1 for s in self.statuses.values() if s == STATUS_FLAGGED)
+        self.summary_label.setText(f"Approved: {approved}   Flagged: {flagged}   Total: {len(self.image_paths)}")
+
+    def _save_statuses(self):
+        if self._dirty:
+            self.project_manager.save_review_status(self.statuses)
+            self._dirty = False
+
+    def done(self, result):
+        self._save_statuses()
+        super().done(result)
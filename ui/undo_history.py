@@ -0,0 +1,416 @@
+# C:\LabelAI\ui\undo_history.py
+
+"""
+Delta-based undo/redo for ImageViewer annotations.
+
+Commands store only what changed (an index, a vertex position, an offset, a
+label or a mask patch) instead of snapshots of the annotation list, so long
+editing sessions on large polygon sets stay cheap. Consecutive drag steps on
+the same target are merged into a single command, and the oldest commands are
+discarded once the estimated memory of the history (undo and redo) exceeds
+its limit.
+"""
+
+from collections import deque
+
+import numpy as np
+
+_BASE_COST = 64    # rough per-command overhead in bytes
+_VALUE_COST = 16   # rough cost of one stored coordinate or label
+
+
+def _annotation_cost(ann):
+    if not isinstance(ann, dict):
+        return _BASE_COST
+    values = ann.get("coords") or ann.get("points") or []
+    count = 0
+    for v in values:
+        count += len(v) if isinstance(v, (list, tuple)) else 1
+    return _BASE_COST + count * _VALUE_COST
+
+
+def _shift_annotation(ann, dx, dy):
+    """Translate an annotation in place by a relative offset."""
+    if ann.get("type") == "bbox":
+        ann["coords"][0] += dx
+        ann["coords"][1] += dy
+    elif ann.get("type") == "polygon":
+        for p in ann["coords"]:
+            p[0] += dx
+            p[1] += dy
+    elif ann.get("type") == "keypoint":
+        for p in ann["points"]:
+            p[0] += dx
+            p[1] += dy
+
+
+def _transform_annotations(annotations, ann_indices, sx, sy, tx, ty):
+    """
+    Applies p' = p * (sx, sy) + (tx, ty) to every point of the given
+    annotations. All points are gathered into one array so the transform
+    itself is a single vectorized operation, however large the selection.
+    """
+    targets = []  # (point list, number of points) in gather order
+    for i in ann_indices:
+        ann = annotations[i]
+        ann_type = ann.get("type")
+        if ann_type == "bbox":
+            targets.append(ann["coords"])
+        elif ann_type == "polygon":
+            targets.extend(ann["coords"])
+        elif ann_type == "keypoint":
+            targets.extend(ann["points"])
+    if not targets:
+        return
+
+    points = np.array([t[:2] for t in targets], dtype=np.float64)
+    points = points * (sx, sy) + (tx, ty)
+    for target, (x, y) in zip(targets, points.tolist()):
+        target[0], target[1] = x, y
+
+    # Box sizes scale but don't translate
+    for i in ann_indices:
+        ann = annotations[i]
+        if ann.get("type") == "bbox":
+            ann["coords"][2] *= sx
+            ann["coords"][3] *= sy
+
+
+class UndoCommand:
+    """Base class: a reversible change to an annotation list."""
+    merge_key = None
+
+    def redo(self, annotations):
+        raise NotImplementedError
+
+    def undo(self, annotations):
+        raise NotImplementedError
+
+    def merge(self, other):
+        """Absorb a following command with the same merge_key. Returns True on success."""
+        return False
+
+    def cost(self):
+        return _BASE_COST
+
+
+class AddAnnotationsCommand(UndoCommand):
+    """Inserts annotations at the given indices (ascending)."""
+
+    def __init__(self, items):
+        self.items = sorted(items, key=lambda item: item[0])  # [(index, ann), ...]
+
+    def redo(self, annotations):
+        for index, ann in self.items:
+            annotations.insert(index, ann)
+
+    def undo(self, annotations):
+        for index, _ in reversed(self.items):
+            del annotations[index]
+
+    def cost(self):
+        return sum(_annotation_cost(ann) for _, ann in self.items)
+
+
+class DeleteAnnotationsCommand(UndoCommand):
+    """Removes annotations, keeping the removed dicts so they can be restored."""
+
+    def __init__(self, annotations, indices):
+        self.items = [(i, annotations[i]) for i in sorted(set(indices))]
+
+    def redo(self, annotations):
+        for index, _ in reversed(self.items):
+            del annotations[index]
+
+    def undo(self, annotations):
+        for index, ann in self.items:
+            annotations.insert(index, ann)
+
+    def cost(self):
+        return sum(_annotation_cost(ann) for _, ann in self.items)
+
+
+class MoveVertexCommand(UndoCommand):
+    """Moves one polygon vertex or keypoint. Drag steps merge into one command."""
+
+    def __init__(self, ann_index, point_index, key, old_xy, new_xy, drag_id=None):
+        self.ann_index = ann_index
+        self.point_index = point_index
+        self.key = key  # "coords" for polygons, "points" for keypoints
+        self.old_xy = tuple(old_xy)
+        self.new_xy = tuple(new_xy)
+        if drag_id is not None:
+            self.merge_key = ("move_vertex", drag_id, ann_index, point_index)
+
+    def _set(self, annotations, xy):
+        point = annotations[self.ann_index][self.key][self.point_index]
+        point[0], point[1] = xy
+
+    def redo(self, annotations):
+        self._set(annotations, self.new_xy)
+
+    def undo(self, annotations):
+        self._set(annotations, self.old_xy)
+
+    def merge(self, other):
+        self.new_xy = other.new_xy
+        return True
+
+
+class InsertVertexCommand(UndoCommand):
+    """Inserts a polygon vertex or appends a keypoint."""
+
+    def __init__(self, ann_index, point_index, key, point):
+        self.ann_index = ann_index
+        self.point_index = point_index
+        self.key = key
+        self.point = list(point)
+
+    def redo(self, annotations):
+        annotations[self.ann_index][self.key].insert(self.point_index, list(self.point))
+
+    def undo(self, annotations):
+        del annotations[self.ann_index][self.key][self.point_index]
+
+    def cost(self):
+        return _BASE_COST + len(self.point) * _VALUE_COST
+
+
+class DeleteVertexCommand(UndoCommand):
+    """Removes a polygon vertex or keypoint."""
+
+    def __init__(self, annotations, ann_index, point_index, key):
+        self.ann_index = ann_index
+        self.point_index = point_index
+        self.key = key
+        self.point = list(annotations[ann_index][key][point_index])
+
+    def redo(self, annotations):
+        del annotations[self.ann_index][self.key][self.point_index]
+
+    def undo(self, annotations):
+        annotations[self.ann_index][self.key].insert(self.point_index, list(self.point))
+
+    def cost(self):
+        return _BASE_COST + len(self.point) * _VALUE_COST
+
+
+class MoveAnnotationsCommand(UndoCommand):
+    """Translates whole annotations by a relative offset; only the offset is stored."""
+
+    def __init__(self, ann_indices, dx, dy, drag_id=None):
+        self.ann_indices = list(ann_indices)
+        self.dx = dx
+        self.dy = dy
+        if drag_id is not None:
+            self.merge_key = ("move_annotations", drag_id, tuple(self.ann_indices))
+
+    def redo(self, annotations):
+        for i in self.ann_indices:
+            _shift_annotation(annotations[i], self.dx, self.dy)
+
+    def undo(self, annotations):
+        for i in self.ann_indices:
+            _shift_annotation(annotations[i], -self.dx, -self.dy)
+
+    def merge(self, other):
+        self.dx += other.dx
+        self.dy += other.dy
+        return True
+
+    def cost(self):
+        return _BASE_COST + len(self.ann_indices) * _VALUE_COST
+
+
+class TransformAnnotationsCommand(UndoCommand):
+    """
+    Scales and translates a group of annotations: p' = p * (sx, sy) + (tx, ty),
+    in relative coordinates. Only the transform is stored; consecutive drag
+    steps compose into one transform.
+    """
+
+    def __init__(self, ann_indices, sx=1.0, sy=1.0, tx=0.0, ty=0.0, drag_id=None):
+        self.ann_indices = list(ann_indices)
+        self.sx, self.sy, self.tx, self.ty = sx, sy, tx, ty
+        if drag_id is not None:
+            self.merge_key = ("transform", drag_id, tuple(self.ann_indices))
+
+    def redo(self, annotations):
+        _transform_annotations(annotations, self.ann_indices, self.sx, self.sy, self.tx, self.ty)
+
+    def undo(self, annotations):
+        _transform_annotations(annotations, self.ann_indices, 1.0 / self.sx, 1.0 / self.sy,
+                               -self.tx / self.sx, -self.ty / self.sy)
+
+    def merge(self, other):
+        # Applying self then other: p * s1 * s2 + t1 * s2 + t2
+        self.tx = self.tx * other.sx + other.tx
+        self.ty = self.ty * other.sy + other.ty
+        self.sx *= other.sx
+        self.sy *= other.sy
+        return True
+
+    def cost(self):
+        return _BASE_COST + len(self.ann_indices) * _VALUE_COST
+
+
+class RelabelCommand(UndoCommand):
+    """Changes the label of one or more annotations."""
+
+    def __init__(self, annotations, ann_indices, new_label):
+        self.old_labels = [(i, annotations[i].get("label")) for i in ann_indices]
+        self.new_label = new_label
+
+    def redo(self, annotations):
+        for i, _ in self.old_labels:
+            annotations[i]["label"] = self.new_label
+
+    def undo(self, annotations):
+        for i, label in self.old_labels:
+            annotations[i]["label"] = label
+
+    def cost(self):
+        return _BASE_COST + len(self.old_labels) * _VALUE_COST
+
+
+class MaskStrokeCommand(UndoCommand):
+    """
+    A brush stroke on a MaskLayer. Only the stroke's bounding box is stored,
+    before and after, instead of the whole mask.
+    """
+
+    def __init__(self, layer, rect, before, after):
+        self.layer = layer
+        self.rect = rect
+        self.before = before
+        self.after = after
+
+    def redo(self, annotations):
+        self.layer.write_patch(self.rect, self.after)
+
+    def undo(self, annotations):
+        self.layer.write_patch(self.rect, self.before)
+
+    def cost(self):
+        return _BASE_COST + self.before.nbytes + self.after.nbytes
+
+
+class UndoHistory:
+    """
+    Bounded undo/redo stacks of UndoCommand objects.
+
+    The history also tracks the "clean" state, i.e. the position at which the
+    annotations were last written to disk, so the save path can skip writes
+    when undo/redo returns to the saved state.
+    """
+    DEFAULT_MEMORY_LIMIT = 16 * 1024 * 1024
+
+    _UNKNOWN = None   # never saved: always dirty
+    _BOTTOM = 0       # clean state is the one with nothing left to undo
+    _UNREACHABLE = -1
+
+    def __init__(self, memory_limit=DEFAULT_MEMORY_LIMIT):
+        self.memory_limit = memory_limit
+        self._undo = deque()
+        self._redo = deque()
+        self._memory = 0  # Estimated bytes held by both stacks
+        self._merge_open = False
+        self._serial = 0
+        self._clean_marker = self._UNKNOWN
+
+    def set_memory_limit(self, memory_limit):
+        self.memory_limit = memory_limit
+        self._enforce_limit()
+
+    def memory_usage(self):
+        return self._memory
+
+    def can_undo(self):
+        return bool(self._undo)
+
+    def can_redo(self):
+        return bool(self._redo)
+
+    def push(self, command, merge=False):
+        """Record a command that has already been applied to the annotations."""
+        self._drop_redo()
+        top = self._undo[-1] if self._undo else None
+        if (merge and self._merge_open and top is not None and command.merge_key is not None
+                and top[1].merge_key == command.merge_key and top[1].merge(command)):
+            if self._clean_marker == top[0]:
+                self._clean_marker = self._UNREACHABLE
+            return
+        self._serial += 1
+        cost = command.cost()
+        self._undo.append((self._serial, command, cost))
+        self._memory += cost
+        self._merge_open = merge
+        self._enforce_limit()
+
+    def close_merge(self):
+        """End the current drag. Returns True if a mergeable command was open."""
+        was_open = self._merge_open and bool(self._undo)
+        self._merge_open = False
+        return was_open
+
+    def undo(self, annotations):
+        """Revert the most recent command. Returns it, or None if there is nothing to undo."""
+        self._merge_open = False
+        if not self._undo:
+            return None
+        entry = self._undo.pop()
+        entry[1].undo(annotations)
+        self._redo.append(entry)
+        return entry[1]
+
+    def redo(self, annotations):
+        """Re-apply the most recently undone command. Returns it, or None."""
+        self._merge_open = False
+        if not self._redo:
+            return None
+        entry = self._redo.pop()
+        entry[1].redo(annotations)
+        self._undo.append(entry)
+        return entry[1]
+
+    def clear(self):
+        self._undo = deque()
+        self._redo = deque()
+        self._memory = 0  # Estimated bytes held by both stacks
+        self._merge_open = False
+        self._clean_marker = self._UNKNOWN
+
+    # --- Save-state tracking ---
+    def set_clean(self):
+        self._clean_marker = self._undo[-1][0] if self._undo else self._BOTTOM
+
+    def mark_dirty(self):
+        self._clean_marker = self._UNKNOWN
+
+    def is_clean(self):
+        if self._clean_marker is self._UNKNOWN:
+            return False
+        current = self._undo[-1][0] if self._undo else self._BOTTOM
+        return current == self._clean_marker
+
+    def _drop_redo(self):
+        if any(serial == self._clean_marker for serial, _, _ in self._redo):
+            self._clean_marker = self._UNREACHABLE
+        self._memory -= sum(cost for _, _, cost in self._redo)
+        self._redo.clear()
+
+    def _enforce_limit(self):
+        # The newest command is always kept so the last edit can be undone
+        while self._memory > self.memory_limit and len(self._undo) > 1:
+            serial, _, cost = self._undo.popleft()
+            self._memory -= cost
+            if self._clean_marker == serial:
+                self._clean_marker = self._BOTTOM
+            elif self._clean_marker == self._BOTTOM:
+                self._clean_marker = self._UNREACHABLE
+        # Then the redo entries furthest from the current state
+        while self._memory > self.memory_limit and self._redo and len(self._undo) + len(self._redo) > 1:
+            serial, _, cost = self._redo.popleft()
+            self._memory -= cost
+            if self._clean_marker == serial:
+                self._clean_marker = self._UNREACHABLE
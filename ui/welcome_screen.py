@@ -1,73 +1,108 @@
 import os
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QLabel, QListWidget,
                              QPushButton, QHBoxLayout, QFrame, QDialog,
-                             QLineEdit, QSplitter, QListWidgetItem, QMenu,
-                             QMessageBox, QAction)
-from PyQt5.QtCore import Qt, pyqtSignal, QSize
-from PyQt5.QtGui import QIcon, QPainter, QColor # We'll need icons later
+                             QLineEdit, QSplitter, QListView, QMenu,
+                             QMessageBox, QStyledItemDelegate, QStyle)
+from PyQt5.QtCore import (Qt, pyqtSignal, QSize, QRect, QAbstractListModel,
+                          QModelIndex, QSortFilterProxyModel)
+from PyQt5.QtGui import QPainter, QColor, QFont
 
 from .new_project_dialog import NewProjectDialog
 from backend.project_manager import ProjectManager
 
 
-class ProjectCard(QWidget):
+class ProjectListModel(QAbstractListModel):
     """
-    A custom widget to display project information in a card-like format.
+    The projects in the projects root, one row per project.
+    Qt.UserRole holds the project name, as the list items did before.
     """
-    def __init__(self, project_details, parent=None):
+    NameRole = Qt.UserRole
+    GoalRole = Qt.UserRole + 1
+    MetaRole = Qt.UserRole + 2
+
+    def __init__(self, parent=None):
         super().__init__(parent)
-        self.project_name = project_details['name']
-        self.annotation_goal = project_details['annotation_goal']
-        self.image_count = project_details['image_count']
-        self.last_modified = project_details['last_modified'].strftime("%Y-%m-%d %H:%M")
-
-        self.setMinimumHeight(80)
-        self.layout = QHBoxLayout(self)
-        self.layout.setContentsMargins(15, 10, 15, 10)
-        self.layout.setSpacing(15)
-
-        # Annotation Icon (Placeholder)
-        self.icon = QLabel(self.annotation_goal[0]) # First letter as icon
-        self.icon.setObjectName("taskIcon")
-        self.icon.setFixedSize(40, 40)
-        self.icon.setAlignment(Qt.AlignCenter)
-
-        # Project Info
-        info_layout = QVBoxLayout()
-        info_layout.setSpacing(2)
-        self.name_label = QLabel(self.project_name)
-        self.name_label.setObjectName("projectName")
-        self.meta_label = QLabel(f"{self.image_count} images - Last modified: {self.last_modified}")
-        self.meta_label.setObjectName("projectMeta")
-        
-        info_layout.addWidget(self.name_label)
-        info_layout.addWidget(self.meta_label)
-        info_layout.addStretch()
-
-        self.layout.addWidget(self.icon)
-        self.layout.addLayout(info_layout)
-        self.layout.addStretch()
-
-        # Hover effect setup
-        self.hovered = False
-        self.setAutoFillBackground(True)
-        self.update_background()
-
-    def enterEvent(self, event):
-        self.hovered = True
-        self.update_background()
-
-    def leaveEvent(self, event):
-        self.hovered = False
-        self.update_background()
-
-    def update_background(self):
-        p = self.palette()
-        if self.hovered:
-            p.setColor(self.backgroundRole(), QColor("#3A3A3C"))
-        else:
-            p.setColor(self.backgroundRole(), QColor("#2C2C2E"))
-        self.setPalette(p)
+        self._projects = []
+
+    def set_projects(self, projects):
+        self.beginResetModel()
+        self._projects = list(projects)
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._projects)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        project = self._projects[index.row()]
+        if role in (Qt.DisplayRole, self.NameRole):
+            return project['name']
+        if role == self.GoalRole:
+            return project['annotation_goal']
+        if role == self.MetaRole:
+            last_modified = project['last_modified'].strftime("%Y-%m-%d %H:%M")
+            return f"{project['image_count']} images - Last modified: {last_modified}"
+        return None
+
+
+class ProjectCardDelegate(QStyledItemDelegate):
+    """
+    Paints a project card (task icon, name and metadata) directly, so the
+    browser needs no widget per project.
+    """
+    CARD_HEIGHT = 80
+    SPACING = 4
+    BACKGROUND = QColor("#2C2C2E")
+    HOVER_BACKGROUND = QColor("#3A3A3C")
+    ICON_BACKGROUND = QColor("#0A84FF")
+    NAME_COLOR = QColor("#F2F2F7")
+    META_COLOR = QColor("#8E8E93")
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.icon_font = QFont()
+        self.icon_font.setPixelSize(20)
+        self.icon_font.setWeight(QFont.DemiBold)
+        self.name_font = QFont()
+        self.name_font.setPixelSize(16)
+        self.name_font.setWeight(QFont.Medium)
+        self.meta_font = QFont()
+        self.meta_font.setPixelSize(12)
+
+    def sizeHint(self, option, index):
+        return QSize(option.rect.width(), self.CARD_HEIGHT + 2 * self.SPACING)
+
+    def paint(self, painter, option, index):
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+        card = option.rect.adjusted(0, self.SPACING, 0, -self.SPACING)
+        hovered = option.state & (QStyle.State_MouseOver | QStyle.State_Selected)
+        painter.fillRect(card, self.HOVER_BACKGROUND if hovered else self.BACKGROUND)
+
+        # Task icon: first letter of the annotation goal on a rounded square
+        icon_rect = QRect(card.left() + 15, card.center().y() - 20, 40, 40)
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(self.ICON_BACKGROUND)
+        painter.drawRoundedRect(icon_rect, 8, 8)
+        goal = index.data(ProjectListModel.GoalRole) or "?"
+        painter.setPen(QColor("#FFFFFF"))
+        painter.setFont(self.icon_font)
+        painter.drawText(icon_rect, Qt.AlignCenter, goal[0])
+
+        text_left = icon_rect.right() + 16
+        text_width = card.right() - text_left - 15
+        name_rect = QRect(text_left, card.top() + 14, text_width, 24)
+        meta_rect = QRect(text_left, name_rect.bottom() + 2, text_width, 18)
+        painter.setFont(self.name_font)
+        painter.setPen(self.NAME_COLOR)
+        name = painter.fontMetrics().elidedText(index.data(Qt.DisplayRole), Qt.ElideRight, text_width)
+        painter.drawText(name_rect, Qt.AlignLeft | Qt.AlignVCenter, name)
+        painter.setFont(self.meta_font)
+        painter.setPen(self.META_COLOR)
+        painter.drawText(meta_rect, Qt.AlignLeft | Qt.AlignVCenter, index.data(ProjectListModel.MetaRole))
+        painter.restore()
+
 
 class WelcomeScreen(QWidget):
     # Emit project name and selected model
@@ -128,9 +163,20 @@ class WelcomeScreen(QWidget):
         self.search_bar.setPlaceholderText("Search projects...")
         self.search_bar.textChanged.connect(self.filter_projects)
 
-        self.project_browser_list = QListWidget()
+        # Filtering only invalidates the proxy; cards are painted by the delegate
+        self.project_model = ProjectListModel(self)
+        self.project_proxy = QSortFilterProxyModel(self)
+        self.project_proxy.setSourceModel(self.project_model)
+        self.project_proxy.setFilterCaseSensitivity(Qt.CaseInsensitive)
+
+        self.project_browser_list = QListView()
         self.project_browser_list.setObjectName("projectCardList")
-        self.project_browser_list.itemDoubleClicked.connect(self.open_selected_project)
+        self.project_browser_list.setModel(self.project_proxy)
+        self.project_browser_list.setItemDelegate(ProjectCardDelegate(self.project_browser_list))
+        self.project_browser_list.setUniformItemSizes(True)
+        self.project_browser_list.setMouseTracking(True)
+        self.project_browser_list.setEditTriggers(QListView.NoEditTriggers)
+        self.project_browser_list.doubleClicked.connect(self.open_selected_project)
         # We'll need a custom context menu for deletion
         self.project_browser_list.setContextMenuPolicy(Qt.CustomContextMenu)
         self.project_browser_list.customContextMenuRequested.connect(self.show_project_context_menu)
@@ -159,23 +205,12 @@ class WelcomeScreen(QWidget):
         for proj in recent_projects:
             self.recent_projects_list.addItem(proj['name'])
 
-        # Populate the main project browser (initially with all projects)
-        self.filter_projects("")
+        # Populate the main project browser; the current search stays applied
+        self.project_model.set_projects(self.all_projects)
 
     def filter_projects(self, query):
         """Filters the project browser based on the search query."""
-        self.project_browser_list.clear()
-        query = query.lower()
-        
-        filtered_projects = [p for p in self.all_projects if query in p['name'].lower()]
-
-        for proj in filtered_projects:
-            card = ProjectCard(proj)
-            item = QListWidgetItem(self.project_browser_list)
-            item.setSizeHint(card.sizeHint())
-            item.setData(Qt.UserRole, proj['name']) # Store project name for selection logic
-            self.project_browser_list.addItem(item)
-            self.project_browser_list.setItemWidget(item, card)
+        self.project_proxy.setFilterFixedString(query)
 
     def create_new_project(self):
         existing_projects = [p['name'] for p in self.all_projects]
@@ -191,8 +226,9 @@ class WelcomeScreen(QWidget):
                 self.projectSelected.emit(project_name, model_name)
 
     def open_selected_project(self, item):
+        """Opens the project of a recent-projects item or a browser index."""
         project_name = item.data(Qt.UserRole)
-        if project_name is None:
+        if project_name is None and hasattr(item, "text"):
             project_name = item.text()
         
         if project_name:
@@ -211,18 +247,18 @@ class WelcomeScreen(QWidget):
         pass
 
     def show_project_context_menu(self, pos):
-        item = self.project_browser_list.itemAt(pos)
-        if not item:
+        index = self.project_browser_list.indexAt(pos)
+        if not index.isValid():
             return
 
-        project_name = item.data(Qt.UserRole)
+        project_name = index.data(Qt.UserRole)
         if not project_name:
             return
 
         menu = QMenu()
         delete_action = menu.addAction("Delete Project")
         
-        action = menu.exec_(self.project_browser_list.mapToGlobal(pos))
+        action = menu.exec_(self.project_browser_list.viewport().mapToGlobal(pos))
         
         if action == delete_action:
             self.delete_project(project_name)